@@ -10,14 +10,75 @@ class Settings(BaseModel):
     api_key: str
     api_hash: str
     bot_username: str
+    telegram_sessions: list[str] = ["tbot-service-session"]
     core_api_svc_account_username: str
     core_api_svc_account_password: str
     core_api_max_auth_retires: int
+    core_api_token_lifetime: float | None = None
+    core_api_token_refresh_margin: float = 60
+    core_api_max_connections: int = 100
+    core_api_max_keepalive_connections: int = 20
+    core_api_keepalive_expiry: float = 30
+    core_api_http2: bool = False
+    core_api_connect_timeout: float = 5
+    core_api_read_timeout: float = 10
+    core_api_resolve_batching: bool = False
+    core_api_resolve_batch_window_ms: float = 5
+    core_api_resolve_batch_max_size: int = 100
 
     core_api_base: str
 
     hash_key: bytes
 
+    webhook_ack_mode: bool = False
+    webhook_workers: int = 8
+    webhook_queue_size: int = 1000
+    update_dedup_window: int = 10000
+    update_dedup_path: str = ""
+
+    bot_global_rate: float = 30
+    bot_group_rate_per_minute: float = 20
+    bot_private_rate: float = 1
+    bot_retry_after_retries: int = 2
+
+    relay_album_delay: float = 1.0
+    relay_coalesce_window_ms: float = 0
+    relay_coalesce_max_delay_ms: float = 1000
+    relay_outbox_path: str = ""
+    relay_outbox_max_attempts: int = 20
+    message_map_capacity: int = 1024
+    message_map_chats: int = 2048
+    message_map_path: str = ""
+    message_map_write_through: bool = False
+
+    routing_cache_size: int = 10000
+    routing_cache_ttl: float = 3600
+    routing_index_preload: bool = False
+    routing_index_page_size: int = 1000
+    routing_index_snapshot_path: str = ""
+    counselor_cache_ttl: float = 60
+    counselor_cache_max_stale: float = 600
+
+    account_max_concurrency: int = 4
+    account_max_flood_sleep: float = 10
+    account_flood_retries: int = 2
+
+    leader_mode: bool = False
+    leader_lease_path: str = "leader.sqlite3"
+    leader_lease_ttl: float = 15
+    leader_heartbeat_interval: float = 5
+    leader_forward_timeout: float = 60
+    instance_address: str = "http://localhost:8000"
+    internal_secret: str = ""
+
+    session_saga_path: str = "sessions.sqlite3"
+    session_record_attempts: int = 3
+    session_abandon_after: float = 3600
+
+    group_pool_size: int = 0
+    group_pool_path: str = "group-pool.json"
+    group_pool_refill_interval: float = 30
+
 
 settings = Settings(
     bot_token=os.environ["TELEGRAM_BOT_TOKEN"],
@@ -28,7 +89,64 @@ settings = Settings(
     api_key=os.environ["API_KEY"],
     api_hash=os.environ["API_HASH"],
     bot_username=os.environ["BOT_USERNAME"],
+    telegram_sessions=[
+        session.strip()
+        for session in os.environ.get("TELEGRAM_SESSIONS", "tbot-service-session").split(",")
+        if session.strip()
+    ],
     core_api_svc_account_username=os.environ["CORE_API_SVC_ACCOUNT_USERNAME"],
     core_api_svc_account_password=os.environ["CORE_API_SVC_ACCOUNT_PASSWORD"],
     core_api_max_auth_retires=os.environ["CORE_API_MAX_AUTH_RETIRES"],
+    core_api_token_lifetime=os.environ.get("CORE_API_TOKEN_LIFETIME") or None,
+    core_api_token_refresh_margin=os.environ.get("CORE_API_TOKEN_REFRESH_MARGIN", "60"),
+    core_api_max_connections=os.environ.get("CORE_API_MAX_CONNECTIONS", "100"),
+    core_api_max_keepalive_connections=os.environ.get("CORE_API_MAX_KEEPALIVE_CONNECTIONS", "20"),
+    core_api_keepalive_expiry=os.environ.get("CORE_API_KEEPALIVE_EXPIRY", "30"),
+    core_api_http2=os.environ.get("CORE_API_HTTP2", "false"),
+    core_api_connect_timeout=os.environ.get("CORE_API_CONNECT_TIMEOUT", "5"),
+    core_api_read_timeout=os.environ.get("CORE_API_READ_TIMEOUT", "10"),
+    core_api_resolve_batching=os.environ.get("CORE_API_RESOLVE_BATCHING", "false"),
+    core_api_resolve_batch_window_ms=os.environ.get("CORE_API_RESOLVE_BATCH_WINDOW_MS", "5"),
+    core_api_resolve_batch_max_size=os.environ.get("CORE_API_RESOLVE_BATCH_MAX_SIZE", "100"),
+    webhook_ack_mode=os.environ.get("WEBHOOK_ACK_MODE", "false"),
+    webhook_workers=os.environ.get("WEBHOOK_WORKERS", "8"),
+    webhook_queue_size=os.environ.get("WEBHOOK_QUEUE_SIZE", "1000"),
+    update_dedup_window=os.environ.get("UPDATE_DEDUP_WINDOW", "10000"),
+    update_dedup_path=os.environ.get("UPDATE_DEDUP_PATH", ""),
+    bot_global_rate=os.environ.get("BOT_GLOBAL_RATE", "30"),
+    bot_group_rate_per_minute=os.environ.get("BOT_GROUP_RATE_PER_MINUTE", "20"),
+    bot_private_rate=os.environ.get("BOT_PRIVATE_RATE", "1"),
+    bot_retry_after_retries=os.environ.get("BOT_RETRY_AFTER_RETRIES", "2"),
+    relay_album_delay=os.environ.get("RELAY_ALBUM_DELAY", "1.0"),
+    relay_coalesce_window_ms=os.environ.get("RELAY_COALESCE_WINDOW_MS", "0"),
+    relay_coalesce_max_delay_ms=os.environ.get("RELAY_COALESCE_MAX_DELAY_MS", "1000"),
+    relay_outbox_path=os.environ.get("RELAY_OUTBOX_PATH", ""),
+    relay_outbox_max_attempts=os.environ.get("RELAY_OUTBOX_MAX_ATTEMPTS", "20"),
+    message_map_capacity=os.environ.get("MESSAGE_MAP_CAPACITY", "1024"),
+    message_map_chats=os.environ.get("MESSAGE_MAP_CHATS", "2048"),
+    message_map_path=os.environ.get("MESSAGE_MAP_PATH", ""),
+    message_map_write_through=os.environ.get("MESSAGE_MAP_WRITE_THROUGH", "false"),
+    routing_cache_size=os.environ.get("ROUTING_CACHE_SIZE", "10000"),
+    routing_cache_ttl=os.environ.get("ROUTING_CACHE_TTL", "3600"),
+    routing_index_preload=os.environ.get("ROUTING_INDEX_PRELOAD", "false"),
+    routing_index_page_size=os.environ.get("ROUTING_INDEX_PAGE_SIZE", "1000"),
+    routing_index_snapshot_path=os.environ.get("ROUTING_INDEX_SNAPSHOT_PATH", ""),
+    counselor_cache_ttl=os.environ.get("COUNSELOR_CACHE_TTL", "60"),
+    counselor_cache_max_stale=os.environ.get("COUNSELOR_CACHE_MAX_STALE", "600"),
+    account_max_concurrency=os.environ.get("ACCOUNT_MAX_CONCURRENCY", "4"),
+    account_max_flood_sleep=os.environ.get("ACCOUNT_MAX_FLOOD_SLEEP", "10"),
+    account_flood_retries=os.environ.get("ACCOUNT_FLOOD_RETRIES", "2"),
+    leader_mode=os.environ.get("LEADER_MODE", "false"),
+    leader_lease_path=os.environ.get("LEADER_LEASE_PATH", "leader.sqlite3"),
+    leader_lease_ttl=os.environ.get("LEADER_LEASE_TTL", "15"),
+    leader_heartbeat_interval=os.environ.get("LEADER_HEARTBEAT_INTERVAL", "5"),
+    leader_forward_timeout=os.environ.get("LEADER_FORWARD_TIMEOUT", "60"),
+    instance_address=os.environ.get("INSTANCE_ADDRESS", "http://localhost:8000"),
+    internal_secret=os.environ.get("INTERNAL_SECRET", ""),
+    session_saga_path=os.environ.get("SESSION_SAGA_PATH", "sessions.sqlite3"),
+    session_record_attempts=os.environ.get("SESSION_RECORD_ATTEMPTS", "3"),
+    session_abandon_after=os.environ.get("SESSION_ABANDON_AFTER", "3600"),
+    group_pool_size=os.environ.get("GROUP_POOL_SIZE", "0"),
+    group_pool_path=os.environ.get("GROUP_POOL_PATH", "group-pool.json"),
+    group_pool_refill_interval=os.environ.get("GROUP_POOL_REFILL_INTERVAL", "30"),
 )
@@ -1,8 +1,61 @@
 from fastapi import APIRouter
 
+from app.services.core.api import (
+    counselor_directory,
+    read_coalescer,
+    resolve_batcher,
+    routing_cache,
+    routing_index,
+)
+from app.services.core.auth import auth_client
+from app.services.taccount.api import (
+    account_owner,
+    account_pool,
+    group_pool,
+    session_sagas,
+    session_timings,
+)
+from app.telegram.app import bot_rate_limiter
+from app.telegram.handlers.callbacks import session_jobs
+from app.telegram.handlers.relay import (
+    album_buffer,
+    message_map,
+    relay_coalescer,
+    relay_outbox,
+)
+from app.telegram.webhook import update_deduplicator, update_dispatcher, update_filter
+from app.util.context import update_context_stats
+
 router = APIRouter()
 
 
 @router.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@router.get("/stats")
+async def stats():
+    return {
+        "dispatcher": update_dispatcher.stats(),
+        "update_filter": update_filter.stats(),
+        "update_dedup": update_deduplicator.stats(),
+        "bot_rate_limiter": bot_rate_limiter.stats(),
+        "album_buffer": album_buffer.stats(),
+        "message_map": message_map.stats(),
+        "relay_coalescer": relay_coalescer.stats(),
+        "relay_outbox": relay_outbox.stats(),
+        "routing_index": routing_index.stats(),
+        "routing_cache": routing_cache.stats(),
+        "counselor_directory": counselor_directory.stats(),
+        "core_api": auth_client.auth.stats(),
+        "read_coalescer": read_coalescer.stats(),
+        "resolve_batcher": resolve_batcher.stats(),
+        "update_context": update_context_stats,
+        "session_timings": session_timings.stats(),
+        "group_pool": group_pool.stats(),
+        "accounts": account_pool.stats(),
+        "account_owner": account_owner.stats(),
+        "session_jobs": session_jobs.stats(),
+        "session_sagas": session_sagas.stats(),
+    }
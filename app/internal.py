@@ -0,0 +1,46 @@
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.config import settings
+from app.services.taccount.api import account_owner, create_session
+from app.services.taccount.model import CreateSessionRequest, CreateSessionResponse  # noqa: TC001
+from app.services.taccount.scheduler import AccountBusyError
+from app.telegram.handlers.callbacks import session_jobs
+from app.util.hash import get_hash
+
+router = APIRouter(prefix="/internal")
+
+
+def _check_secret(x_internal_secret: str):
+    if not settings.internal_secret or not secrets.compare_digest(
+        x_internal_secret, settings.internal_secret
+    ):
+        raise HTTPException(status_code=403, detail="Invalid internal secret")
+
+
+@router.post("/sessions")
+async def internal_create_session(
+    body: CreateSessionRequest, x_internal_secret: str = Header(default="")
+) -> CreateSessionResponse:
+    _check_secret(x_internal_secret)
+    if not account_owner.is_leader:
+        raise HTTPException(status_code=503, detail="Replica does not own the service accounts")
+
+    try:
+        return await create_session(body.telegram_user_id, body.counselor_id)
+    except AccountBusyError as e:
+        raise HTTPException(
+            status_code=429, detail={"seconds": e.seconds, "queue_position": e.queue_position}
+        ) from e
+
+
+@router.get("/session-jobs/{telegram_user_id}/{counselor_id}")
+async def session_job_state(
+    telegram_user_id: int, counselor_id: int, x_internal_secret: str = Header(default="")
+):
+    _check_secret(x_internal_secret)
+    job = session_jobs.get((get_hash(str(telegram_user_id)), counselor_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="No session job for this user and counselor")
+    return job.describe()
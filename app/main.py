@@ -1,19 +1,34 @@
 from contextlib import asynccontextmanager
 
-import httpx
 from fastapi import FastAPI
 
+from app.config import settings
 from app.healthcheck import router as healthcheck_router
+from app.internal import router as internal_router
+from app.services.core.api import load_routing_index, save_routing_index
+from app.services.core.auth import auth_client
+from app.services.taccount.api import account_owner, forward_client, session_sagas
 from app.telegram.app import set_webhook, telegram_app
-from app.telegram.client import telegram_client
-from app.telegram.handlers.callbacks import callback_handler
-from app.telegram.handlers.relay import relay_handler
+from app.telegram.handlers.callbacks import callback_handler, session_jobs
+from app.telegram.handlers.relay import (
+    album_buffer,
+    message_map,
+    relay_coalescer,
+    relay_edit_handler,
+    relay_handler,
+    relay_outbox,
+)
 from app.telegram.handlers.start import start_handler
 from app.telegram.webhook import router as telegram_router
+from app.telegram.webhook import update_dispatcher
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    # Without a secret the owner rejects every forwarded session start
+    if settings.leader_mode and not settings.internal_secret:
+        raise RuntimeError("INTERNAL_SECRET must be set when LEADER_MODE is on")
+
     # Startup
     # telegram bot
     await telegram_app.initialize()
@@ -21,20 +36,39 @@ async def lifespan(_app: FastAPI):
     telegram_app.add_handler(start_handler)
     telegram_app.add_handler(callback_handler)
     telegram_app.add_handler(relay_handler)
+    telegram_app.add_handler(relay_edit_handler)
+    if settings.webhook_ack_mode:
+        await update_dispatcher.start()
+    if settings.routing_index_preload:
+        await load_routing_index()
+    await session_sagas.start()
+    await relay_outbox.start()
 
-    # telegram client
-    await telegram_client.start()
+    # telegram client, connected only while this replica owns the service accounts
+    await account_owner.start()
     yield
     # Shutdown
     # telegram bot
+    await update_dispatcher.stop()
+    await session_jobs.stop()
+    await session_sagas.stop()
+    await album_buffer.stop()
+    await relay_coalescer.stop()
+    await relay_outbox.stop()
+    await message_map.flush()
     await telegram_app.shutdown()
-    await httpx.AsyncClient().aclose()
+
+    # core api
+    await save_routing_index()
+    await auth_client.aclose()
 
     # telegram client
-    telegram_client.disconnect()
+    await account_owner.stop()
+    await forward_client.aclose()
 
 
 app = FastAPI(title="TBot Service", lifespan=lifespan)
 
 app.include_router(telegram_router)
 app.include_router(healthcheck_router)
+app.include_router(internal_router)
@@ -1,51 +1,145 @@
-from httpx import HTTPStatusError
+import asyncio
+import logging
+from functools import partial
+from http import HTTPStatus
+
+from httpx import HTTPError, HTTPStatusError, Request, Response
+from pydantic import TypeAdapter, ValidationError
 
 from app.config import settings
 from app.services.core.auth import auth_client
+from app.services.core.batch import MicroBatcher
+from app.services.core.cache import CacheEntry, StaleWhileRevalidateCache, TTLCache
+from app.services.core.coalesce import RequestCoalescer
 from app.services.core.model import (
     AliasRequest,
     AliasResponse,
+    BulkResolveGroupRequest,
+    BulkResolveGroupResponse,
     CounselorInfo,
+    CounselorListingEntry,
     CounselorResponse,
     CreateGroupRequest,
     GroupLinkRequest,
     GroupLinkResponse,
+    GroupRoutesPage,
     ResolveGroupRequest,
     ResolveGroupResponse,
 )
+from app.services.core.routing_index import RoutingIndex
+from app.util.context import memoize_per_update
 from app.util.hash import get_hash
 from app.util.helpers import sanitize_supergroup_id_to_negative
 
+logger = logging.getLogger(__name__)
+
+# Group pairings never change once created, so relays only pay for resolve_group on a miss.
+routing_index = RoutingIndex()
+routing_cache = TTLCache(maxsize=settings.routing_cache_size, ttl=settings.routing_cache_ttl)
+
+# The counselor directory rarely changes, so /start and profile taps are served from memory and
+# refreshed behind the user's back.
+counselor_directory = StaleWhileRevalidateCache(
+    fresh_ttl=settings.counselor_cache_ttl, max_stale=settings.counselor_cache_max_stale
+)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+_COUNSELOR_LIST = TypeAdapter(list[CounselorListingEntry])
+
+# Concurrent identical reads (e.g. many users hitting /start at once) share one HTTP call
+read_coalescer = RequestCoalescer()
+
+_VALIDATOR_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
+
+def _validators(r: Response) -> dict[str, str]:
+    return {
+        request_header: r.headers[response_header]
+        for response_header, request_header in _VALIDATOR_HEADERS.items()
+        if response_header in r.headers
+    }
+
+
+async def _read(method: str, url: str, **kwargs) -> Response:
+    """Sends an idempotent read, joining an identical request that is already in flight."""
+    send = auth_client.get if method == "GET" else auth_client.post
+    key = (method, url, repr(sorted(kwargs.items())))
+    return await read_coalescer.run(key, partial(send, url, **kwargs))
+
+
+async def _conditional_get(url: str, cached: CacheEntry | None) -> Response:
+    if cached is not None and cached.validators:
+        return await _read("GET", url, headers=cached.validators)
+    return await _read("GET", url)
+
 
+@memoize_per_update
 async def create_or_get_alias(telegram_user_id: int) -> str:
-    r = await auth_client.post(
+    r = await _read(
+        "POST",
         f"{settings.core_api_base}/aliases",
-        data=AliasRequest(telegram_user_id=get_hash(str(telegram_user_id))).model_dump_json(),
+        content=AliasRequest(telegram_user_id=get_hash(str(telegram_user_id))).model_dump_json(),
+        headers=JSON_HEADERS,
     )
     r.raise_for_status()
-    response = AliasResponse(**r.json())
-    return response.alias
+    return AliasResponse.model_validate_json(r.content).alias
 
 
-async def get_counselors() -> list[CounselorInfo]:
-    r = await auth_client.get(f"{settings.core_api_base}/counselors")
+async def _load_counselors(cached: CacheEntry | None) -> CacheEntry:
+    r = await _conditional_get(f"{settings.core_api_base}/counselors", cached)
+    if cached is not None and r.status_code == HTTPStatus.NOT_MODIFIED:
+        return cached.refreshed()
     r.raise_for_status()
-    return [CounselorInfo(**row) for row in r.json()]
 
+    entries = _COUNSELOR_LIST.validate_json(r.content)
+    counselors = []
+    for entry in entries:
+        counselors.append(CounselorInfo(id=entry.id, name=entry.name))
+        # Records that come with a full profile let get_counselor skip its own request
+        if entry.telegram_user_id is not None and entry.bio is not None:
+            counselor_directory.put(
+                ("counselor", entry.id),
+                CounselorResponse(
+                    id=entry.id,
+                    telegram_user_id=entry.telegram_user_id,
+                    name=entry.name,
+                    bio=entry.bio,
+                ),
+            )
 
-async def get_counselor(counselor_id: int) -> CounselorResponse:
-    r = await auth_client.get(f"{settings.core_api_base}/counselors/{counselor_id}")
+    return CacheEntry(counselors, validators=_validators(r))
+
+
+async def _load_counselor(counselor_id: int, cached: CacheEntry | None) -> CacheEntry:
+    r = await _conditional_get(f"{settings.core_api_base}/counselors/{counselor_id}", cached)
+    if cached is not None and r.status_code == HTTPStatus.NOT_MODIFIED:
+        return cached.refreshed()
     r.raise_for_status()
-    return CounselorResponse(**r.json())
+    return CacheEntry(CounselorResponse.model_validate_json(r.content), validators=_validators(r))
+
+
+@memoize_per_update
+async def get_counselors() -> list[CounselorInfo]:
+    return list(await counselor_directory.get("counselors", _load_counselors))
+
 
+@memoize_per_update
+async def get_counselor(counselor_id: int) -> CounselorResponse:
+    return await counselor_directory.get(
+        ("counselor", counselor_id), partial(_load_counselor, counselor_id)
+    )
 
+
+@memoize_per_update
 async def get_group_link(telegram_user_id: int, counselor_id: int) -> str | None:
-    r = await auth_client.post(
+    r = await _read(
+        "POST",
         f"{settings.core_api_base}/groups/link",
-        data=GroupLinkRequest(
+        content=GroupLinkRequest(
             telegram_user_id=get_hash(str(telegram_user_id)),
             counselor_id=counselor_id,
         ).model_dump_json(),
+        headers=JSON_HEADERS,
     )
     try:
         r.raise_for_status()
@@ -54,17 +148,123 @@ async def get_group_link(telegram_user_id: int, counselor_id: int) -> str | None
             return None
         raise
 
-    response = GroupLinkResponse(**r.json())
-    return response.group_link
+    return GroupLinkResponse.model_validate_json(r.content).group_link
 
 
-async def resolve_group(group_id: int) -> ResolveGroupResponse:
+async def resolve_groups(group_ids: list[int]) -> dict[int, ResolveGroupResponse]:
     r = await auth_client.post(
+        f"{settings.core_api_base}/groups/resolve/bulk",
+        content=BulkResolveGroupRequest(group_ids=group_ids).model_dump_json(),
+        headers=JSON_HEADERS,
+    )
+    r.raise_for_status()
+    response = BulkResolveGroupResponse.model_validate_json(r.content)
+    return {
+        group.group_id: ResolveGroupResponse(
+            target_group_id=group.target_group_id, display_name=group.display_name
+        )
+        for group in response.groups
+    }
+
+
+def _group_not_found(group_id: int) -> HTTPStatusError:
+    """The error /groups/resolve raises for an unpaired group, for groups left out of a batch."""
+    request = Request(
+        "POST",
         f"{settings.core_api_base}/groups/resolve",
-        data=ResolveGroupRequest(group_id=group_id).model_dump_json(),
+        content=ResolveGroupRequest(group_id=group_id).model_dump_json(),
+        headers=JSON_HEADERS,
     )
+    response = Response(HTTPStatus.NOT_FOUND, json={"detail": "Group not found"}, request=request)
+    return HTTPStatusError(f"Group {group_id} not found", request=request, response=response)
+
+
+resolve_batcher = MicroBatcher(
+    resolve_groups,
+    window=settings.core_api_resolve_batch_window_ms / 1000,
+    max_size=settings.core_api_resolve_batch_max_size,
+    missing=_group_not_found,
+)
+
+
+async def list_group_routes(cursor: str | None = None) -> GroupRoutesPage:
+    params = {"limit": settings.routing_index_page_size}
+    if cursor is not None:
+        params["cursor"] = cursor
+    r = await auth_client.get(f"{settings.core_api_base}/groups/routes", params=params)
     r.raise_for_status()
-    return ResolveGroupResponse(**r.json())
+    return GroupRoutesPage.model_validate_json(r.content)
+
+
+async def load_routing_index():
+    """Fills the routing index from the last snapshot, or else from the Core API listing.
+
+    Failures are logged and leave the index empty; resolve_group then asks the Core API.
+    """
+    path = settings.routing_index_snapshot_path
+    if path:
+        try:
+            await asyncio.to_thread(routing_index.load_snapshot, path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):  # fmt: skip
+            logger.warning("Ignoring unreadable routing snapshot %s", path, exc_info=True)
+        else:
+            logger.info("Loaded %s routes from %s", len(routing_index), path)
+            return
+
+    routes: list[tuple[int, int, str]] = []
+    cursor = None
+    try:
+        while True:
+            page = await list_group_routes(cursor)
+            routes.extend(
+                (group.group_id, group.target_group_id, group.display_name) for group in page.groups
+            )
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+    except (HTTPError, ValidationError):  # fmt: skip
+        logger.exception("Failed to preload routes, resolving them on demand")
+        return
+    routing_index.load(routes)
+    logger.info("Loaded %s routes from the Core API", len(routing_index))
+
+
+async def save_routing_index():
+    path = settings.routing_index_snapshot_path
+    if not path or not routing_index.loaded:
+        return
+    try:
+        await asyncio.to_thread(routing_index.save_snapshot, path)
+    except OSError:
+        logger.exception("Failed to write routing snapshot %s", path)
+
+
+@memoize_per_update
+async def resolve_group(group_id: int) -> ResolveGroupResponse:
+    indexed = routing_index.get(group_id)
+    if indexed is not None:
+        return indexed
+
+    cached = routing_cache.get(group_id)
+    if cached is not None:
+        return cached
+
+    if settings.core_api_resolve_batching:
+        routing = await resolve_batcher.submit(group_id)
+    else:
+        r = await _read(
+            "POST",
+            f"{settings.core_api_base}/groups/resolve",
+            content=ResolveGroupRequest(group_id=group_id).model_dump_json(),
+            headers=JSON_HEADERS,
+        )
+        r.raise_for_status()
+        routing = ResolveGroupResponse.model_validate_json(r.content)
+    routing_cache.set(group_id, routing)
+    routing_index.add(group_id, routing)
+    return routing
 
 
 async def create_group(
@@ -73,15 +273,32 @@ async def create_group(
     user_group_id: int,
     counselor_id: int,
     counselor_group_id: int,
+    *,
+    counselor_name: str | None = None,
 ) -> None:
+    request = CreateGroupRequest(
+        user_alias=user_alias,
+        user_group_link=user_group_link,
+        user_group_id=sanitize_supergroup_id_to_negative(user_group_id),
+        counselor_id=counselor_id,
+        counselor_group_id=sanitize_supergroup_id_to_negative(counselor_group_id),
+    )
     r = await auth_client.post(
         f"{settings.core_api_base}/groups",
-        data=CreateGroupRequest(
-            user_alias=user_alias,
-            user_group_link=user_group_link,
-            user_group_id=sanitize_supergroup_id_to_negative(user_group_id),
-            counselor_id=counselor_id,
-            counselor_group_id=sanitize_supergroup_id_to_negative(counselor_group_id),
-        ).model_dump_json(),
+        content=request.model_dump_json(),
+        headers=JSON_HEADERS,
     )
     r.raise_for_status()
+
+    # Seed both directions so the first relay in a new session skips /groups/resolve
+    user_routing = ResolveGroupResponse(
+        target_group_id=request.counselor_group_id, display_name=user_alias
+    )
+    routing_cache.set(request.user_group_id, user_routing)
+    routing_index.add(request.user_group_id, user_routing)
+    if counselor_name is not None:
+        counselor_routing = ResolveGroupResponse(
+            target_group_id=request.user_group_id, display_name=counselor_name
+        )
+        routing_cache.set(request.counselor_group_id, counselor_routing)
+        routing_index.add(request.counselor_group_id, counselor_routing)
@@ -1,69 +1,168 @@
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections import Counter
 from http import HTTPStatus
 
 import httpx
 
 from app.config import settings
 from app.services.core.model import LoginRequest, LoginResponse
+from app.services.core.retry import Outcome, policy_for, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+
+def _jwt_expires_in(token: str) -> float | None:
+    """Seconds until the token's `exp` claim, or None if the token carries no readable expiry."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - time.time()
+    except (IndexError, KeyError, TypeError, ValueError):  # fmt: skip
+        return None
 
 
 class BearerAuthWithRefresh(httpx.Auth):
-    def __init__(self, token_url: str, client_credentials: LoginRequest, max_retries: int = 3):
+    # Read the body before the flow decides on a retry, so a rejected response hands its
+    # connection back to the pool before the token refresh needs one.
+    requires_response_body = True
+
+    def __init__(
+        self,
+        token_url: str,
+        client_credentials: LoginRequest,
+        max_retries: int = 3,
+        token_lifetime: float | None = None,
+        refresh_margin: float = 60.0,
+    ):
         self.token_url = token_url
         self.client_credentials = client_credentials
         self.max_retries = max_retries
+        self.token_lifetime = token_lifetime
+        self.refresh_margin = refresh_margin
+        # Client used for the token endpoint; set to the pooled client that uses this auth
+        self.client: httpx.AsyncClient | None = None
         self._token: str | None = None
+        self._expires_at: float | None = None
+        self._refresh_lock = asyncio.Lock()
+        self._background_refresh: asyncio.Task | None = None
+        self.refreshes = 0
+        self.retries: Counter[str] = Counter()
 
-    def sync_get_token(self):
-        with httpx.Client() as client:
-            resp = client.post(self.token_url, data=self.client_credentials.model_dump_json())
-            return LoginResponse(**resp.json()).access_token
-
-    def auth_flow(self, request):
-        if not self._token:
-            self._token = self.sync_get_token()
-        request.headers["Authorization"] = f"Bearer {self._token}"
-        response = yield request
-        retries = 0
-        while response.status_code in (401, 403, 404) and retries < self.max_retries:
-            retries += 1
-            self._token = self.sync_get_token()
-            request.headers["Authorization"] = f"Bearer {self._token}"
-            yield request
+    def sync_auth_flow(self, _request):
+        # Refreshing from a sync flow would block the event loop on a login round trip
+        raise RuntimeError("BearerAuthWithRefresh only supports httpx.AsyncClient")
 
     async def _async_get_new_token(self):
         """Calls the /token endpoint to generate a new token."""
-        # Note: We use a separate client to avoid recursion issues
-        async with httpx.AsyncClient() as client:
-            response = await client.post(self.token_url, data=self.client_credentials.model_dump_json())
-            if response.status_code != HTTPStatus.OK:
-                # Forward the error gotten from /token if refresh fails
-                response.raise_for_status()
-
-            return LoginResponse(**response.json()).access_token
-
-    async def async_sync_auth_flow(self, request):
-        # 1. Inject existing token if it exists
-        if not self._token:
-            self._token = await self._async_get_new_token()
-
-        request.headers["Authorization"] = f"Bearer {self._token}"
+        if self.client is None:
+            async with httpx.AsyncClient() as client:
+                return await self._login(client)
+        return await self._login(self.client)
+
+    async def _login(self, client: httpx.AsyncClient) -> str:
+        # auth=None bypasses this auth on the shared client to avoid recursion
+        response = await client.post(
+            self.token_url,
+            content=self.client_credentials.model_dump_json(),
+            headers={"Content-Type": "application/json"},
+            auth=None,
+        )
+        if response.status_code != HTTPStatus.OK:
+            # Forward the error gotten from /token if refresh fails
+            response.raise_for_status()
+
+        return LoginResponse.model_validate_json(response.content).access_token
+
+    def _is_usable(self, stale_token: str | None) -> bool:
+        if not self._token or self._token == stale_token:
+            return False
+        return self._expires_at is None or self._expires_at > time.monotonic()
+
+    def _is_due_for_refresh(self) -> bool:
+        return self._expires_at is not None and (
+            self._expires_at - self.refresh_margin <= time.monotonic()
+        )
+
+    async def get_token(self, stale_token: str | None = None) -> str:
+        """Returns a usable token, sharing a single refresh between all concurrent callers.
+
+        ``stale_token`` is the token a caller saw rejected; it is only replaced if nobody else
+        has refreshed it in the meantime.
+        """
+        if self._is_usable(stale_token):
+            if self._is_due_for_refresh():
+                self._schedule_refresh()
+            return self._token
+
+        async with self._refresh_lock:
+            if not self._is_usable(stale_token):
+                await self._refresh()
+            return self._token
+
+    async def _refresh(self):
+        token = await self._async_get_new_token()
+        expires_in = _jwt_expires_in(token)
+        if expires_in is None:
+            expires_in = self.token_lifetime
+
+        self._token = token
+        self._expires_at = time.monotonic() + expires_in if expires_in is not None else None
+        self.refreshes += 1
+
+    def _schedule_refresh(self):
+        if self._background_refresh is None or self._background_refresh.done():
+            self._background_refresh = asyncio.create_task(self._refresh_ahead(self._token))
+
+    async def _refresh_ahead(self, current_token: str):
+        try:
+            await self.get_token(stale_token=current_token)
+        except Exception:
+            # The current token is still valid; the next request retries the refresh
+            logger.exception("Failed to refresh Core API token ahead of expiry")
+
+    async def async_auth_flow(self, request):
+        policy = policy_for(request)
+
+        # 1. Inject a valid token, waiting only if no usable token exists yet
+        token = await self.get_token()
+        request.headers["Authorization"] = f"Bearer {token}"
 
         # 2. Send the request
         response = yield request
 
-        # 3. Intercept 401, 403, or 404 for retry/refresh logic
+        # 3. Refresh on auth failures and back off on retryable statuses; anything else is final
+        auth_retries = 0
         retries = 0
-        while response.status_code in (401, 403, 404) and retries < self.max_retries:
-            retries += 1
-
-            # Refresh the token
-            self._token = await self._async_get_new_token()
-            request.headers["Authorization"] = f"Bearer {self._token}"
+        while True:
+            outcome = policy.classify(response.status_code)
+            if outcome is Outcome.AUTH and auth_retries < self.max_retries:
+                auth_retries += 1
+                self.retries["auth"] += 1
+                # Refresh the rejected token, unless a concurrent request already did
+                token = await self.get_token(stale_token=token)
+                request.headers["Authorization"] = f"Bearer {token}"
+            elif outcome is Outcome.RETRY and retries < policy.max_retries:
+                delay = policy.backoff(retries, retry_after_seconds(response))
+                if delay is None:
+                    self.retries["retry_after_too_long"] += 1
+                    return
+                retries += 1
+                self.retries[f"status_{response.status_code}"] += 1
+                await asyncio.sleep(delay)
+            else:
+                if outcome in (Outcome.AUTH, Outcome.RETRY):
+                    self.retries["budget_exhausted"] += 1
+                return
 
             # Yield the request again for a retry
             response = yield request
 
-        # Final response is returned automatically
+    def stats(self) -> dict[str, int]:
+        return {"token_refreshes": self.refreshes, **self.retries}
 
 
 _token_url = settings.core_api_base + "/account/token"
@@ -74,5 +173,19 @@ _auth = BearerAuthWithRefresh(
     token_url=_token_url,
     client_credentials=_credential,
     max_retries=settings.core_api_max_auth_retires,
+    token_lifetime=settings.core_api_token_lifetime,
+    refresh_margin=settings.core_api_token_refresh_margin,
+)
+auth_client = httpx.AsyncClient(
+    auth=_auth,
+    http2=settings.core_api_http2,
+    limits=httpx.Limits(
+        max_connections=settings.core_api_max_connections,
+        max_keepalive_connections=settings.core_api_max_keepalive_connections,
+        keepalive_expiry=settings.core_api_keepalive_expiry,
+    ),
+    timeout=httpx.Timeout(
+        settings.core_api_read_timeout, connect=settings.core_api_connect_timeout
+    ),
 )
-auth_client = httpx.AsyncClient(auth=_auth)
+_auth.client = auth_client
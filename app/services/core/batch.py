@@ -0,0 +1,84 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable  # noqa: TC003
+from typing import Any
+
+
+class MicroBatcher:
+    """Collects lookups for up to ``window`` seconds (or ``max_size`` keys) into one bulk call.
+
+    ``resolve_many`` receives the distinct keys of a batch and returns the values it found;
+    waiters for keys missing from the result get the exception built by ``missing``, a
+    LookupError by default.
+    """
+
+    def __init__(
+        self,
+        resolve_many: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+        window: float,
+        max_size: int,
+        missing: Callable[[Hashable], Exception] | None = None,
+    ):
+        self.resolve_many = resolve_many
+        self.missing = missing or (lambda key: LookupError(f"No result for {key!r} in batch"))
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.keys = 0
+        self.largest_batch = 0
+
+    async def submit(self, key: Hashable) -> Any:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        self.batches += 1
+        self.keys += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        task = asyncio.create_task(self._resolve(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _resolve(self, batch: dict[Hashable, asyncio.Future]):
+        try:
+            results = await self.resolve_many(list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for key, future in batch.items():
+            if future.done():
+                continue
+            if key in results:
+                future.set_result(results[key])
+            else:
+                future.set_exception(self.missing(key))
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "keys": self.keys,
+            "avg_batch_size": self.keys / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable  # noqa: TC003
+from dataclasses import dataclass, field, replace
+from typing import Any, Self
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl`` seconds after they are written."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    stored_at: float = field(default_factory=time.monotonic)
+    # Request headers that let the origin answer 304 Not Modified for this entry
+    validators: dict[str, str] = field(default_factory=dict)
+
+    def refreshed(self) -> Self:
+        return replace(self, stored_at=time.monotonic())
+
+
+class StaleWhileRevalidateCache:
+    """Serves entries up to ``fresh_ttl + max_stale`` old, revalidating stale ones in the background.
+
+    ``load`` receives the previous entry (if any) so it can send a conditional request and
+    return ``previous.refreshed()`` when the origin reports the data unchanged.
+    """
+
+    def __init__(self, fresh_ttl: float, max_stale: float):
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self._entries: dict[Hashable, CacheEntry] = {}
+        self._revalidating: dict[Hashable, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidation_errors = 0
+
+    async def get(
+        self, key: Hashable, load: Callable[[CacheEntry | None], Awaitable[CacheEntry]]
+    ) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < self.fresh_ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.fresh_ttl + self.max_stale:
+                self.stale_hits += 1
+                self._revalidate_in_background(key, load)
+                return entry.value
+
+        self.misses += 1
+        entry = await load(entry)
+        self._entries[key] = entry
+        return entry.value
+
+    def put(self, key: Hashable, value: Any, validators: dict[str, str] | None = None):
+        self._entries[key] = CacheEntry(value, validators=validators or {})
+
+    def clear(self):
+        for task in self._revalidating.values():
+            task.cancel()
+        self._revalidating.clear()
+        self._entries.clear()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidation_errors = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidating": len(self._revalidating),
+            "revalidation_errors": self.revalidation_errors,
+        }
+
+    def _revalidate_in_background(
+        self, key: Hashable, load: Callable[[CacheEntry | None], Awaitable[CacheEntry]]
+    ):
+        if key in self._revalidating:
+            return
+        self._revalidating[key] = asyncio.create_task(self._revalidate(key, load))
+
+    async def _revalidate(
+        self, key: Hashable, load: Callable[[CacheEntry | None], Awaitable[CacheEntry]]
+    ):
+        try:
+            self._entries[key] = await load(self._entries.get(key))
+        except Exception:
+            # Keep serving the stale entry; the next stale read tries again
+            self.revalidation_errors += 1
+            logger.exception("Failed to revalidate cache entry %s", key)
+        finally:
+            self._revalidating.pop(key, None)
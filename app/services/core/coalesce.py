@@ -0,0 +1,61 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Hashable  # noqa: TC003
+from typing import Any
+
+
+class RequestCoalescer:
+    """Shares one in-flight call between all concurrent callers asking for the same key.
+
+    A call is only shared while it is running; once it finishes the next caller starts a new
+    one, so this sits underneath caches rather than replacing them.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, tuple[float, asyncio.Task]] = {}
+        self._waiters: dict[Hashable, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = (time.monotonic(), task)
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            task = inflight[1]
+            self.coalesced += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        # Shielded so one caller being cancelled does not fail everybody sharing the call
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[1] is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+
+    def inflight(self) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "key": repr(key),
+                "waiters": self._waiters.get(key, 0),
+                "age_ms": (now - started) * 1000,
+            }
+            for key, (started, _task) in self._inflight.items()
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight(),
+        }
@@ -23,6 +23,12 @@ class CounselorResponse(BaseModel):
     bio: str
 
 
+class CounselorListingEntry(CounselorInfo):
+    # Set when the listing carries the full counselor record
+    telegram_user_id: int | None = None
+    bio: str | None = None
+
+
 class ResolveGroupResponse(BaseModel):
     target_group_id: int
     display_name: str
@@ -32,6 +38,23 @@ class ResolveGroupRequest(BaseModel):
     group_id: int
 
 
+class BulkResolveGroupRequest(BaseModel):
+    group_ids: list[int]
+
+
+class ResolvedGroup(ResolveGroupResponse):
+    group_id: int
+
+
+class BulkResolveGroupResponse(BaseModel):
+    groups: list[ResolvedGroup]  # groups that are not paired are left out
+
+
+class GroupRoutesPage(BaseModel):
+    groups: list[ResolvedGroup]
+    next_cursor: str | None = None  # None on the last page
+
+
 class GroupLinkResponse(BaseModel):
     group_link: str | None = None
 
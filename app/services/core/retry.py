@@ -0,0 +1,79 @@
+import random
+import re
+from dataclasses import dataclass
+from enum import StrEnum
+
+import httpx  # noqa: TC002
+
+
+class Outcome(StrEnum):
+    SUCCESS = "success"
+    AUTH = "auth"
+    RETRY = "retry"
+    TERMINAL = "terminal"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    auth_statuses: frozenset[int] = frozenset({401, 403})
+    retryable_statuses: frozenset[int] = frozenset({429, 502, 503, 504})
+    max_retries: int = 2
+    backoff_base: float = 0.1
+    backoff_max: float = 2.0
+
+    def classify(self, status_code: int) -> Outcome:
+        if status_code < 400:  # noqa: PLR2004
+            return Outcome.SUCCESS
+        if status_code in self.auth_statuses:
+            return Outcome.AUTH
+        if status_code in self.retryable_statuses:
+            return Outcome.RETRY
+        return Outcome.TERMINAL
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """Full-jitter exponential delay before retry ``attempt`` (0-based).
+
+        Returns None when the server asks us to wait longer than ``backoff_max``, since
+        holding the caller that long is worse than failing.
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.backoff_max else None
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    method: str
+    path: re.Pattern
+    policy: RetryPolicy
+
+    def matches(self, request: httpx.Request) -> bool:
+        return request.method == self.method and self.path.search(request.url.path) is not None
+
+
+# 404 is terminal everywhere: for /groups/link it means "no group for this pair yet", which is
+# an answer rather than a failure.
+DEFAULT_POLICY = RetryPolicy()
+
+ENDPOINT_POLICIES = (
+    # Creating the group record is not idempotent, so only retry when the server refused the
+    # request before processing it.
+    EndpointPolicy(
+        "POST", re.compile(r"/groups$"), RetryPolicy(retryable_statuses=frozenset({429, 503}))
+    ),
+    EndpointPolicy("GET", re.compile(r"/counselors(/\d+)?$"), RetryPolicy(max_retries=3)),
+)
+
+
+def policy_for(request: httpx.Request) -> RetryPolicy:
+    for endpoint in ENDPOINT_POLICIES:
+        if endpoint.matches(request):
+            return endpoint.policy
+    return DEFAULT_POLICY
+
+
+def retry_after_seconds(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):  # fmt: skip
+        return None
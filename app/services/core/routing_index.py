@@ -0,0 +1,211 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections.abc import Iterable, Iterator  # noqa: TC003
+from pathlib import Path
+from typing import Any
+
+from app.services.core.model import ResolveGroupResponse
+
+# Snapshot layout: this header, the group ids, the target group ids, the name ids, and the
+# name table as a JSON list. The header keeps the int64 arrays 8-byte aligned.
+_HEADER = struct.Struct("=4sIQQ")  # magic, version, routes, length of the name table
+_MAGIC = b"TBRI"
+_VERSION = 1
+
+_Arrays = tuple[array | memoryview, array | memoryview, array | memoryview, list[str]]
+
+
+def _build(routes: Iterable[tuple[int, int, str]]) -> _Arrays:
+    """Packs ``routes`` into arrays sorted by group id, interning the display names."""
+    keys, targets, name_ids = array("q"), array("q"), array("i")
+    names: list[str] = []
+    interned: dict[str, int] = {}
+    for group_id, target_group_id, display_name in routes:
+        name_id = interned.setdefault(display_name, len(names))
+        if name_id == len(names):
+            names.append(display_name)
+        keys.append(group_id)
+        targets.append(target_group_id)
+        name_ids.append(name_id)
+
+    # The Core API lists routes in group id order, so this is usually a single pass
+    if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        keys = array("q", [keys[i] for i in order])
+        targets = array("q", [targets[i] for i in order])
+        name_ids = array("i", [name_ids[i] for i in order])
+    return keys, targets, name_ids, names
+
+
+def _read_header(path: str, mapped: mmap.mmap) -> int:
+    """Returns the number of routes in the snapshot, checked against the file size."""
+    if len(mapped) < _HEADER.size:
+        msg = f"{path} is not a routing index snapshot"
+        raise ValueError(msg)
+    magic, version, count, names_length = _HEADER.unpack_from(mapped)
+    if magic != _MAGIC or version != _VERSION:
+        msg = f"{path} is not a routing index snapshot"
+        raise ValueError(msg)
+    if len(mapped) != _HEADER.size + 20 * count + names_length:
+        msg = f"{path} is truncated"
+        raise ValueError(msg)
+    return count
+
+
+class RoutingIndex:
+    """Every group pairing, held in parallel arrays and found by binary search.
+
+    Group ids and their target group ids live in two sorted int64 arrays next to an int32
+    index into a table of interned display names: 20 bytes per route plus each distinct name
+    once, instead of a response model per route. Pairings never change, so the index is
+    filled once at startup, either from the Core API listing or by memory-mapping the
+    snapshot written on the last shutdown. Routes resolved after that are kept in a dict
+    next to the arrays until the next snapshot.
+    """
+
+    def __init__(self):
+        self._keys: array | memoryview = array("q")
+        self._targets: array | memoryview = array("q")
+        self._name_ids: array | memoryview = array("i")
+        self._names: list[str] = []
+        self._interned: dict[str, int] = {}
+        self._learned: dict[int, tuple[int, int]] = {}
+        self._mmap: mmap.mmap | None = None
+        self.loaded = False
+        self.source: str | None = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._learned)
+
+    def get(self, group_id: int) -> ResolveGroupResponse | None:
+        i = bisect.bisect_left(self._keys, group_id)
+        if i < len(self._keys) and self._keys[i] == group_id:
+            target_group_id, name_id = self._targets[i], self._name_ids[i]
+        elif (learned := self._learned.get(group_id)) is not None:
+            target_group_id, name_id = learned
+        else:
+            if self.loaded:
+                self.misses += 1
+            return None
+
+        self.hits += 1
+        return ResolveGroupResponse(
+            target_group_id=target_group_id, display_name=self._names[name_id]
+        )
+
+    def add(self, group_id: int, routing: ResolveGroupResponse):
+        """Keeps a route resolved after loading; ignored until the index is loaded."""
+        if not self.loaded:
+            return
+        name_id = self._interned.setdefault(routing.display_name, len(self._names))
+        if name_id == len(self._names):
+            self._names.append(routing.display_name)
+        self._learned[group_id] = (routing.target_group_id, name_id)
+
+    def items(self) -> Iterator[tuple[int, int, str]]:
+        """Yields ``(group_id, target_group_id, display_name)`` for every route."""
+        for group_id, target_group_id, name_id in zip(
+            self._keys, self._targets, self._name_ids, strict=True
+        ):
+            if group_id not in self._learned:
+                yield group_id, target_group_id, self._names[name_id]
+        for group_id, (target_group_id, name_id) in self._learned.items():
+            yield group_id, target_group_id, self._names[name_id]
+
+    def load(self, routes: Iterable[tuple[int, int, str]], source: str = "core_api"):
+        """Replaces the index with ``routes`` of ``(group_id, target_group_id, display_name)``."""
+        self._replace(_build(routes), source=source)
+
+    def load_snapshot(self, path: str):
+        """Maps the snapshot at ``path``; its arrays are paged in as lookups touch them."""
+        with Path(path).open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            count = _read_header(path, mapped)
+            keys_end = _HEADER.size + 8 * count
+            targets_end = keys_end + 8 * count
+            name_ids_end = targets_end + 4 * count
+            names = json.loads(mapped[name_ids_end:])
+        except BaseException:
+            mapped.close()
+            raise
+
+        view = memoryview(mapped)
+        arrays = (
+            view[_HEADER.size : keys_end].cast("q"),
+            view[keys_end:targets_end].cast("q"),
+            view[targets_end:name_ids_end].cast("i"),
+            names,
+        )
+        view.release()
+        self._replace(arrays, source="snapshot", mapped=mapped)
+
+    def save_snapshot(self, path: str):
+        """Writes every route to ``path``, replacing the previous snapshot atomically."""
+        if self._learned:
+            keys, targets, name_ids, names = _build(self.items())
+        else:
+            keys, targets, name_ids, names = self._keys, self._targets, self._name_ids, self._names
+        names_blob = json.dumps(names).encode()
+
+        target = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, len(keys), len(names_blob)))
+                f.write(keys)
+                f.write(targets)
+                f.write(name_ids)
+                f.write(names_blob)
+                f.flush()
+                os.fsync(f.fileno())
+            Path(tmp).replace(target)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def clear(self):
+        self._replace((array("q"), array("q"), array("i"), []), source=None)
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "source": self.source,
+            "routes": len(self),
+            "learned": len(self._learned),
+            "names": len(self._names),
+            "memory_bytes": sum(
+                len(values) * values.itemsize
+                for values in (self._keys, self._targets, self._name_ids)
+            ),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _replace(self, arrays: _Arrays, *, source: str | None, mapped: mmap.mmap | None = None):
+        previous = (self._keys, self._targets, self._name_ids)
+        previous_mmap = self._mmap
+        self._keys, self._targets, self._name_ids, self._names = arrays
+        self._interned = {name: name_id for name_id, name in enumerate(self._names)}
+        self._learned = {}
+        self._mmap = mapped
+        self.loaded = True
+        self.source = source
+
+        # The old views have to go before the file they map can be closed
+        for values in previous:
+            if isinstance(values, memoryview):
+                values.release()
+        if previous_mmap is not None:
+            previous_mmap.close()
@@ -0,0 +1,109 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from telethon import TelegramClient  # noqa: TC002
+
+from app.services.taccount.scheduler import AccountBusyError, AccountScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceAccount:
+    """One Telethon session together with its request scheduler and health counters."""
+
+    def __init__(self, name: str, client: TelegramClient, scheduler_options: dict[str, Any]):
+        self.name = name
+        self.client = client
+        self.scheduler = AccountScheduler(self._send, **scheduler_options)
+        self._bot_entity = None
+
+        self.in_flight = 0
+        self.leases = 0
+        self.failures = 0
+        self.flooded_until = 0.0
+
+    async def call(self, request: Any) -> Any:
+        return await self.scheduler.call(request)
+
+    async def bot_entity(self, bot_username: str):
+        # Input entities carry a per-account access hash, so each account resolves its own
+        if self._bot_entity is None:
+            self._bot_entity = await self.client.get_input_entity(bot_username)
+        return self._bot_entity
+
+    def flooded_for(self) -> float:
+        return max(0.0, self.flooded_until - time.monotonic())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "leases": self.leases,
+            "failures": self.failures,
+            "flooded_for_s": round(self.flooded_for(), 1),
+            "scheduler": self.scheduler.stats(),
+        }
+
+    async def _send(self, request: Any) -> Any:
+        return await self.client(request)
+
+
+_current_account: ContextVar[ServiceAccount | None] = ContextVar("current_account", default=None)
+
+
+class AccountPool:
+    """Spreads group-creation work over several service accounts.
+
+    Each lease goes to the available account with the fewest pipelines in flight, ties going
+    to the one flooded least recently. An account that hits a FloodWait too long to sleep out
+    is taken out of rotation until the wait is over.
+    """
+
+    def __init__(self, accounts: list[ServiceAccount]):
+        if not accounts:
+            raise ValueError("At least one service account is required")
+        self.accounts = accounts
+
+    def current(self) -> ServiceAccount:
+        """The account leased by the running pipeline, or the first one outside of a lease."""
+        return _current_account.get() or self.accounts[0]
+
+    def available(self) -> list[ServiceAccount]:
+        return [account for account in self.accounts if account.flooded_for() == 0]
+
+    @asynccontextmanager
+    async def lease(self):
+        """Runs the block on one account; calls made through ``current()`` inside use it."""
+        account = self._choose()
+        account.in_flight += 1
+        account.leases += 1
+        token = _current_account.set(account)
+        try:
+            yield account
+        except AccountBusyError as e:
+            account.failures += 1
+            account.flooded_until = max(account.flooded_until, time.monotonic() + e.seconds)
+            logger.warning("Service account %s out of rotation for %ss", account.name, e.seconds)
+            raise
+        except BaseException:
+            account.failures += 1
+            raise
+        finally:
+            _current_account.reset(token)
+            account.in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {account.name: account.stats() for account in self.accounts}
+
+    def _choose(self) -> ServiceAccount:
+        candidates = self.available()
+        if not candidates:
+            wait = min(account.flooded_for() for account in self.accounts)
+            queued = sum(account.scheduler.queue_depth() for account in self.accounts)
+            raise AccountBusyError(wait, queued + 1)
+        return min(
+            candidates,
+            key=lambda account: (account.in_flight, account.scheduler.last_flood_at or 0.0),
+        )
@@ -1,88 +1,402 @@
+import asyncio
+import logging
+
+import httpx
 from telegram.constants import ChatMemberStatus
+from telegram.error import BadRequest, Forbidden
 from telethon import functions
 from telethon.tl import types
 
 from app.config import settings
 from app.services.core.api import create_or_get_alias, get_counselor
-from app.services.taccount.model import CreateSessionResponse
+from app.services.taccount.accounts import AccountPool, ServiceAccount
+from app.services.taccount.leader import LeaderElection, SqliteLease, default_holder_id
+from app.services.taccount.model import CreateSessionRequest, CreateSessionResponse
+from app.services.taccount.pool import PooledGroup, WarmGroupPool
+from app.services.taccount.saga import SessionSagaLog
+from app.services.taccount.scheduler import AccountBusyError, Priority, lane
 from app.telegram.app import telegram_app
-from app.telegram.client import telegram_client
+from app.telegram.client import telegram_clients
 from app.util.helpers import sanitize_supergroup_id_to_negative
+from app.util.timing import PhaseTimings
+
+logger = logging.getLogger(__name__)
+
+session_timings = PhaseTimings()
+
+account_pool = AccountPool(
+    [
+        ServiceAccount(
+            session,
+            client,
+            {
+                "max_concurrency": settings.account_max_concurrency,
+                "max_sleep": settings.account_max_flood_sleep,
+                "max_retries": settings.account_flood_retries,
+            },
+        )
+        for session, client in zip(settings.telegram_sessions, telegram_clients, strict=True)
+    ]
+)
+
+BOT_ADMIN_RIGHTS = types.ChatAdminRights(
+    change_info=True,
+    post_messages=True,
+    edit_messages=True,
+    delete_messages=True,
+    ban_users=True,
+    invite_users=True,
+    pin_messages=True,
+    add_admins=False,
+    anonymous=False,
+    manage_call=True,
+    other=True,
+)
+
+POOLED_GROUP_NAME = "Counseling"
+
+# Attempts at leaving new session groups before they are deleted instead
+LEAVE_ATTEMPTS = 3
+
+INTERNAL_SECRET_HEADER = "X-Internal-Secret"
+
+forward_client = httpx.AsyncClient(timeout=settings.leader_forward_timeout)
 
 
 async def create_session(telegram_user_id: int, counselor_id: int) -> CreateSessionResponse:
-    bot_entity = await telegram_client.get_input_entity(settings.bot_username)
-    counselor = await get_counselor(counselor_id)
-    user_alias = await create_or_get_alias(telegram_user_id)
-    counselor_group_id = await create_telegram_group(
-        bot_entity, counselor.telegram_user_id, f"Counseling with {user_alias}"
-    )
-    user_group_id = await create_telegram_group(
-        bot_entity, telegram_user_id, f"Counseling with {counselor.name}"
-    )
-    user_group_link = await get_telegram_group_link(user_group_id)
+    if not account_owner.is_leader:
+        return await _forward_create_session(telegram_user_id, counselor_id)
+
+    with session_timings.measure("total"):
+        with session_timings.measure("lookups"):
+            counselor, user_alias = await _gather_or_cancel(
+                get_counselor(counselor_id),
+                create_or_get_alias(telegram_user_id),
+            )
+
+        counselor_group_id, user_group_id = await _create_session_groups(
+            (counselor.telegram_user_id, f"Counseling with {user_alias}"),
+            (telegram_user_id, f"Counseling with {counselor.name}"),
+        )
+
+        with session_timings.measure("invite_link"):
+            user_group_link = await get_telegram_group_link(user_group_id)
+
     return CreateSessionResponse(
         counselor_group_id=counselor_group_id,
         user_group_id=user_group_id,
         user_group_link=user_group_link,
+        counselor_name=counselor.name,
     )
 
 
-async def create_telegram_group(bot_entity, target_user_id, group_name: str) -> int:
-    target_user = types.InputPeerUser(
-        user_id=target_user_id,
-        access_hash=0,  # Telethon fills this
-    )
+async def _forward_create_session(
+    telegram_user_id: int, counselor_id: int
+) -> CreateSessionResponse:
+    """Hands the session start to the replica that owns the service accounts."""
+    address = await account_owner.leader_address()
+    if address is None:
+        # Ownership is failing over; a new owner is elected within one lease period
+        raise AccountBusyError(settings.leader_lease_ttl, 1)
+
+    with session_timings.measure("forwarded"):
+        r = await forward_client.post(
+            f"{address}/internal/sessions",
+            content=CreateSessionRequest(
+                telegram_user_id=telegram_user_id, counselor_id=counselor_id
+            ).model_dump_json(),
+            headers={
+                "Content-Type": "application/json",
+                INTERNAL_SECRET_HEADER: settings.internal_secret,
+            },
+        )
+    if r.status_code == httpx.codes.TOO_MANY_REQUESTS:
+        detail = r.json()["detail"]
+        raise AccountBusyError(detail["seconds"], detail["queue_position"])
+    if r.status_code == httpx.codes.SERVICE_UNAVAILABLE:
+        # The replica we reached has just lost ownership
+        raise AccountBusyError(settings.leader_heartbeat_interval, 1)
+    r.raise_for_status()
+    return CreateSessionResponse.model_validate_json(r.content)
+
+
+async def _create_session_groups(*groups: tuple[int, str]) -> list[int]:
+    """Creates the session groups on a leased service account.
+
+    When the account gets flooded before the groups exist, the work moves to the next
+    available account, so callers do not see which account served them. Once they exist,
+    only leaving them is retried.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        group_ids = None
+        try:
+            async with account_pool.lease() as account:
+                bot_entity = await account.bot_entity(settings.bot_username)
+                with session_timings.measure("provision_groups"):
+                    group_ids = await provision_telegram_groups(bot_entity, *groups)
+                with session_timings.measure("leave_groups"):
+                    await _leave_session_groups(group_ids)
+                return group_ids
+        except AccountBusyError:
+            # A new pair on another account would leave this one behind
+            if group_ids is not None:
+                raise
+            if attempt >= len(account_pool.accounts) or not account_pool.available():
+                raise
+            logger.warning("Retrying session groups on another service account")
+
+
+async def _leave_session_groups(group_ids: list[int]):
+    """Takes the service account out of the new groups, retrying the ones it is still in.
+
+    Groups the account cannot leave are deleted, so a failed session start does not leave
+    them behind with the service account still a member. The account can no longer delete
+    the groups it did leave, so the bot leaves those instead.
+    """
+    remaining = group_ids
+    for attempt in range(1, LEAVE_ATTEMPTS + 1):
+        results = await asyncio.gather(
+            *(leave_telegram_group(group_id) for group_id in remaining), return_exceptions=True
+        )
+        failed = [
+            (group_id, result)
+            for group_id, result in zip(remaining, results, strict=True)
+            if isinstance(result, Exception)
+        ]
+        if not failed:
+            return
+        remaining = [group_id for group_id, _ in failed]
+        error = failed[0][1]
+        # The scheduler has already slept out the short FloodWaits
+        if isinstance(error, AccountBusyError) or attempt == LEAVE_ATTEMPTS:
+            break
+        logger.warning("Retrying to leave session groups %s", remaining, exc_info=error)
 
-    created_chat = await telegram_client(
-        functions.messages.CreateChatRequest(users=[bot_entity, target_user], title=group_name)
+    await asyncio.gather(
+        *(delete_telegram_group(group_id) for group_id in remaining),
+        *(abandon_telegram_group(group_id) for group_id in group_ids if group_id not in remaining),
     )
+    raise error
+
+
+async def create_telegram_group(bot_entity, target_user_id, group_name: str) -> int:
+    supergroup_id = await provision_telegram_group(bot_entity, target_user_id, group_name)
+    await leave_telegram_group(supergroup_id)
+    return supergroup_id
+
+
+async def provision_telegram_groups(bot_entity, *groups: tuple[int, str]) -> list[int]:
+    """Provisions one group per ``(target_user_id, group_name)`` concurrently, claiming
+    pre-provisioned groups from ``group_pool`` when it has any.
+
+    If any of them fails, the others are cancelled and the ones that were already
+    provisioned are deleted, so a failed session start leaves no groups behind.
+    """
+    tasks = [
+        asyncio.create_task(_obtain_telegram_group(bot_entity, target_user_id, group_name))
+        for target_user_id, group_name in groups
+    ]
+    try:
+        return await _gather_or_cancel(*tasks)
+    except BaseException:
+        provisioned = [
+            task.result()
+            for task in tasks
+            if task.done() and not task.cancelled() and task.exception() is None
+        ]
+        await asyncio.gather(*(delete_telegram_group(group_id) for group_id in provisioned))
+        raise
+
 
-    basic_chat = created_chat.updates.chats[0]
-    print(f"✅ Group created (ID: {basic_chat.id})")
-
-    # Migrate to supergroup
-    migrate_result = await telegram_client(functions.messages.MigrateChatRequest(basic_chat.id))
-    supergroup_id = migrate_result.chats[1].id
-    print(f"Supergroup created: {supergroup_id}")
-
-    # Promote bot to admin
-    await telegram_client(
-        functions.channels.EditAdminRequest(
-            channel=supergroup_id,
-            user_id=bot_entity,
-            admin_rights=types.ChatAdminRights(
-                change_info=True,
-                post_messages=True,
-                edit_messages=True,
-                delete_messages=True,
-                ban_users=True,
-                invite_users=True,
-                pin_messages=True,
-                add_admins=False,
-                anonymous=False,
-                manage_call=True,
-                other=True,
-            ),
-            rank="Admin",
+async def _obtain_telegram_group(bot_entity, target_user_id: int, group_name: str) -> int:
+    group_id = group_pool.claim(account_pool.current().name)
+    if group_id is not None:
+        try:
+            await assign_pooled_group(group_id, target_user_id, group_name)
+        except Exception:
+            # The pooled group may have been removed since it was provisioned; make a fresh one
+            logger.exception("Failed to claim pooled group %s", group_id)
+        else:
+            return group_id
+    return await provision_telegram_group(bot_entity, target_user_id, group_name)
+
+
+async def provision_telegram_group(bot_entity, target_user_id: int | None, group_name: str) -> int:
+    """Creates a supergroup with the bot as admin. The service account stays in it as creator.
+
+    Deletes what it created if a later step fails or the call is cancelled.
+    """
+    users = [bot_entity]
+    if target_user_id is not None:
+        users.append(
+            types.InputPeerUser(
+                user_id=target_user_id,
+                access_hash=0,  # Telethon fills this
+            )
+        )
+
+    with session_timings.measure("provision_group"):
+        created_chat = await account_pool.current().call(
+            functions.messages.CreateChatRequest(users=users, title=group_name)
         )
+        basic_chat = created_chat.updates.chats[0]
+        logger.info("Group created (ID: %s)", basic_chat.id)
+
+        # Migrate to supergroup
+        try:
+            migrate_result = await account_pool.current().call(
+                functions.messages.MigrateChatRequest(basic_chat.id)
+            )
+        except BaseException:
+            await _discard(functions.messages.DeleteChatRequest(chat_id=basic_chat.id))
+            raise
+        supergroup_id = migrate_result.chats[1].id
+        logger.info("Supergroup created: %s", supergroup_id)
+
+        # Promote bot to admin
+        try:
+            await account_pool.current().call(
+                functions.channels.EditAdminRequest(
+                    channel=supergroup_id,
+                    user_id=bot_entity,
+                    admin_rights=BOT_ADMIN_RIGHTS,
+                    rank="Admin",
+                )
+            )
+        except BaseException:
+            await delete_telegram_group(supergroup_id)
+            raise
+        logger.info("Bot promoted to admin in %s", supergroup_id)
+
+    return supergroup_id
+
+
+async def assign_pooled_group(supergroup_id: int, target_user_id: int, group_name: str):
+    """Renames a pooled group and adds its participant. Deletes the group if either step fails."""
+    target_user = types.InputPeerUser(user_id=target_user_id, access_hash=0)
+    with session_timings.measure("claim_group"):
+        try:
+            await account_pool.current().call(
+                functions.channels.EditTitleRequest(channel=supergroup_id, title=group_name)
+            )
+            await account_pool.current().call(
+                functions.channels.InviteToChannelRequest(
+                    channel=supergroup_id, users=[target_user]
+                )
+            )
+        except BaseException:
+            await delete_telegram_group(supergroup_id)
+            raise
+
+
+async def _provision_pooled_group() -> PooledGroup:
+    async with account_pool.lease() as account:
+        bot_entity = await account.bot_entity(settings.bot_username)
+        with lane(Priority.BACKGROUND):
+            group_id = await provision_telegram_group(bot_entity, None, POOLED_GROUP_NAME)
+        return PooledGroup(group_id, account.name)
+
+
+group_pool = WarmGroupPool(
+    _provision_pooled_group,
+    path=settings.group_pool_path,
+    target_size=settings.group_pool_size,
+    refill_interval=settings.group_pool_refill_interval,
+    # The single service account from before groups were spread over several
+    legacy_account=settings.telegram_sessions[0],
+)
+
+
+async def _take_account_ownership():
+    await asyncio.gather(*(client.start() for client in telegram_clients))
+    await group_pool.start()
+
+
+async def _release_account_ownership():
+    await group_pool.stop()
+    for client in telegram_clients:
+        await client.disconnect()
+
+
+account_owner = LeaderElection(
+    SqliteLease(
+        settings.leader_lease_path,
+        name="telegram-accounts",
+        holder=default_holder_id(),
+        address=settings.instance_address,
+        ttl=settings.leader_lease_ttl,
     )
-    print("Bot promoted to admin")
+    if settings.leader_mode
+    else None,
+    on_elected=_take_account_ownership,
+    on_demoted=_release_account_ownership,
+    heartbeat_interval=settings.leader_heartbeat_interval,
+)
 
+
+async def leave_telegram_group(supergroup_id: int):
     # Remove service account (creator)
-    await telegram_client(
-        functions.channels.LeaveChannelRequest(
-            channel=supergroup_id,
+    with session_timings.measure("leave_group"):
+        await account_pool.current().call(
+            functions.channels.LeaveChannelRequest(channel=supergroup_id)
         )
-    )
-    print("Service account removed")
+    logger.info("Service account removed from %s", supergroup_id)
 
-    return supergroup_id
+
+async def delete_telegram_group(supergroup_id: int):
+    await _discard(functions.channels.DeleteChannelRequest(channel=supergroup_id))
+
+
+async def _discard(request):
+    """Best-effort cleanup request; failures are logged rather than masking the original error."""
+    try:
+        await account_pool.current().call(request)
+    except Exception:
+        logger.exception("Failed to clean up after group creation: %s", request)
+
+
+async def _gather_or_cancel(*aws) -> list:
+    """Like ``asyncio.gather``, but cancels the remaining awaitables as soon as one fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        # Let cancelled tasks run their cleanup before the caller inspects them
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def abandon_session_groups(session: CreateSessionResponse):
+    """Takes the bot out of both groups of a session that could not be recorded."""
+    for group_id in (session.counselor_group_id, session.user_group_id):
+        await abandon_telegram_group(group_id)
+
+
+async def abandon_telegram_group(group_id: int):
+    try:
+        await telegram_app.bot.leave_chat(sanitize_supergroup_id_to_negative(group_id))
+    except (BadRequest, Forbidden) as e:
+        # Already gone, e.g. a previous attempt got this far
+        logger.info("Bot could not leave abandoned group %s: %s", group_id, e)
+
+
+session_sagas = SessionSagaLog(
+    settings.session_saga_path,
+    abandon_session_groups,
+    max_record_attempts=settings.session_record_attempts,
+    abandon_after=settings.session_abandon_after,
+)
 
 
 async def get_telegram_group_link(group_chat_id: int) -> str:
     print(f"Group chat id: {group_chat_id}")
-    member = await telegram_app.bot.get_chat_member(sanitize_supergroup_id_to_negative(group_chat_id), telegram_app.bot.id)
+    member = await telegram_app.bot.get_chat_member(
+        sanitize_supergroup_id_to_negative(group_chat_id), telegram_app.bot.id
+    )
     if member.status not in (
         ChatMemberStatus.ADMINISTRATOR,
         ChatMemberStatus.OWNER,
@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseHolder(NamedTuple):
+    holder: str
+    address: str
+    expires_at: float
+
+
+class SqliteLease:
+    """Named lease shared by processes that can open the same SQLite file.
+
+    Wall-clock time is used for expiry because the holders are separate processes.
+    """
+
+    def __init__(self, path: str, name: str, holder: str, address: str, ttl: float):
+        self.path = path
+        self.name = name
+        self.holder = holder
+        self.address = address
+        self.ttl = ttl
+        with contextlib.closing(self._connect()) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "name TEXT PRIMARY KEY, holder TEXT NOT NULL, address TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+
+    def try_acquire(self) -> bool:
+        """Takes the lease if it is free or expired, or renews it if we already hold it."""
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row is not None and row[0] != self.holder and row[1] > now:
+                db.execute("ROLLBACK")
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO leases (name, holder, address, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.name, self.holder, self.address, now + self.ttl),
+            )
+            db.execute("COMMIT")
+            return True
+        finally:
+            db.close()
+
+    def current(self) -> LeaseHolder | None:
+        with contextlib.closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT holder, address, expires_at FROM leases WHERE name = ?", (self.name,)
+            ).fetchone()
+        if row is None or row[2] <= time.time():
+            return None
+        return LeaseHolder(*row)
+
+    def release(self):
+        with contextlib.closing(self._connect()) as db:
+            db.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; try_acquire manages its own transaction
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+
+def default_holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderElection:
+    """Keeps at most one replica in charge of the Telethon accounts.
+
+    Every ``heartbeat_interval`` seconds each replica tries to take or renew the lease.
+    ``on_elected`` runs when this replica becomes the owner and ``on_demoted`` when it loses
+    the lease, including when it cannot renew before the lease runs out. When disabled,
+    this replica always owns the accounts.
+    """
+
+    def __init__(
+        self,
+        lease: SqliteLease | None,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        heartbeat_interval: float,
+    ):
+        self.lease = lease
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.heartbeat_interval = heartbeat_interval
+        self.is_leader = lease is None
+        self._renewed_until = 0.0
+        self._task: asyncio.Task | None = None
+
+        self.elections = 0
+        self.demotions = 0
+        self.heartbeat_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.lease is not None
+
+    async def start(self):
+        if not self.enabled:
+            await self.on_elected()
+            return
+        await self.heartbeat()
+        self._task = asyncio.create_task(self._run(), name="leader-heartbeat")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await self.on_demoted()
+            if self.enabled:
+                await asyncio.to_thread(self.lease.release)
+
+    async def leader_address(self) -> str | None:
+        """Address of the current owner, or None when ownership is being failed over."""
+        if not self.enabled:
+            return None
+        holder = await asyncio.to_thread(self.lease.current)
+        return holder.address if holder is not None else None
+
+    async def heartbeat(self):
+        try:
+            acquired = await asyncio.to_thread(self.lease.try_acquire)
+        except sqlite3.Error:
+            self.heartbeat_errors += 1
+            logger.exception("Leader lease heartbeat failed")
+            # Another replica may take over once our lease runs out, so stop using the accounts
+            if self.is_leader and time.time() >= self._renewed_until:
+                await self._demote()
+            return
+
+        if acquired:
+            self._renewed_until = time.time() + self.lease.ttl
+            if not self.is_leader:
+                self.is_leader = True
+                self.elections += 1
+                logger.info("This replica now owns the Telegram service accounts")
+                try:
+                    await self.on_elected()
+                except Exception:
+                    # Hand the lease to a replica that can connect
+                    logger.exception("Failed to take over the Telegram service accounts")
+                    self.is_leader = False
+                    await asyncio.to_thread(self.lease.release)
+        elif self.is_leader:
+            await self._demote()
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "is_leader": self.is_leader,
+            "elections": self.elections,
+            "demotions": self.demotions,
+            "heartbeat_errors": self.heartbeat_errors,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await self.heartbeat()
+
+    async def _demote(self):
+        self.is_leader = False
+        self.demotions += 1
+        logger.warning("This replica no longer owns the Telegram service accounts")
+        try:
+            await self.on_demoted()
+        except Exception:
+            logger.exception("Failed to release the Telegram service accounts")
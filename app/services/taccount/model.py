@@ -1,7 +1,13 @@
 from pydantic import BaseModel
 
 
+class CreateSessionRequest(BaseModel):
+    telegram_user_id: int
+    counselor_id: int
+
+
 class CreateSessionResponse(BaseModel):
     counselor_group_id: int
     user_group_id: int
     user_group_link: str
+    counselor_name: str | None = None
@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import json
+import logging
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from pathlib import Path
+from typing import NamedTuple
+
+from telethon.errors import FloodWaitError
+
+from app.services.taccount.scheduler import AccountBusyError
+
+logger = logging.getLogger(__name__)
+
+
+class PooledGroup(NamedTuple):
+    group_id: int
+    # Only the service account that created the group can hand it over
+    account: str
+
+
+class WarmGroupPool:
+    """Inventory of pre-provisioned supergroups that session starts can claim instead of creating.
+
+    A background task tops the pool up to ``target_size``, one group every ``refill_interval``
+    seconds, and sleeps out any FloodWait Telegram asks for. The inventory is written to ``path``
+    after every change so groups provisioned before a restart are not lost. Inventories from
+    before groups recorded their account are handed to ``legacy_account``.
+    """
+
+    def __init__(
+        self,
+        provision: Callable[[], Awaitable[PooledGroup]],
+        path: str,
+        target_size: int,
+        refill_interval: float,
+        legacy_account: str | None = None,
+    ):
+        self.provision = provision
+        self.path = Path(path)
+        self.legacy_account = legacy_account
+        self.target_size = target_size
+        self.refill_interval = refill_interval
+        self._groups: list[PooledGroup] = []
+        self._wanted = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+
+        self.claimed = 0
+        self.misses = 0
+        self.provisioned = 0
+        self.provision_failures = 0
+        self.flood_waits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.target_size > 0
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    async def start(self):
+        if not self.enabled or self._refill_task is not None:
+            return
+        self._groups = self._load()
+        self._wanted.set()
+        self._refill_task = asyncio.create_task(self._refill(), name="group-pool-refill")
+
+    async def stop(self):
+        if self._refill_task is None:
+            return
+        self._refill_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._refill_task
+        self._refill_task = None
+        self._save()
+
+    def claim(self, account: str) -> int | None:
+        """Takes the oldest group created by ``account``, or returns None if it has none."""
+        if not self.enabled:
+            return None
+        for index, group in enumerate(self._groups):
+            if group.account == account:
+                del self._groups[index]
+                self.claimed += 1
+                self._save()
+                self._wanted.set()
+                return group.group_id
+
+        self.misses += 1
+        self._wanted.set()
+        return None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "depth": len(self._groups),
+            "target_size": self.target_size,
+            "claimed": self.claimed,
+            "misses": self.misses,
+            "provisioned": self.provisioned,
+            "provision_failures": self.provision_failures,
+            "flood_waits": self.flood_waits,
+        }
+
+    async def _refill(self):
+        while True:
+            if len(self._groups) >= self.target_size:
+                self._wanted.clear()
+                await self._wanted.wait()
+                continue
+
+            try:
+                group = await self.provision()
+            except (FloodWaitError, AccountBusyError) as e:
+                self.flood_waits += 1
+                logger.warning("Group pool refill paused for %ss by FloodWait", e.seconds)
+                await asyncio.sleep(e.seconds)
+                continue
+            except Exception:
+                self.provision_failures += 1
+                logger.exception("Failed to provision a pooled group")
+            else:
+                self._groups.append(group)
+                self.provisioned += 1
+                self._save()
+
+            await asyncio.sleep(self.refill_interval)
+
+    def _load(self) -> list[PooledGroup]:
+        try:
+            groups = json.loads(self.path.read_text())["groups"]
+            return [self._restore(group) for group in groups if self._restorable(group)]
+        except FileNotFoundError:
+            return []
+        except (KeyError, TypeError, ValueError):  # fmt: skip
+            logger.exception("Ignoring unreadable group pool inventory at %s", self.path)
+            return []
+
+    def _restorable(self, group: int | list) -> bool:
+        if isinstance(group, int) and self.legacy_account is None:
+            logger.warning("Dropping pooled group %s saved without its service account", group)
+            return False
+        return True
+
+    def _restore(self, group: int | list) -> PooledGroup:
+        # Inventories written before groups were spread over accounts hold bare group ids
+        if isinstance(group, int):
+            return PooledGroup(group, self.legacy_account)
+        group_id, account = group
+        return PooledGroup(int(group_id), str(account))
+
+    def _save(self):
+        # Write then rename, so a crash mid-write never leaves a truncated inventory behind
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps({"groups": self._groups}))
+            tmp_path.replace(self.path)
+        except OSError:
+            logger.exception("Failed to persist group pool inventory to %s", self.path)
@@ -0,0 +1,251 @@
+import asyncio
+import contextlib
+import logging
+import sqlite3
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from app.services.taccount.model import CreateSessionResponse
+
+logger = logging.getLogger(__name__)
+
+
+class SagaStep(StrEnum):
+    STARTED = "started"
+    GROUPS_CREATED = "groups_created"
+    RECORDED = "recorded"
+    COMPENSATED = "compensated"
+
+
+@dataclass(frozen=True)
+class SessionSaga:
+    key: str
+    step: SagaStep
+    session: CreateSessionResponse | None
+    attempts: int
+    updated_at: float
+
+
+class SessionInProgressError(Exception):
+    """Another worker is creating the groups for this session right now."""
+
+
+class SessionSagaLog:
+    """Durable progress of each session start, keyed by (hashed user, counselor).
+
+    A session start claims its key before creating groups, so a duplicate tap on any replica
+    sharing the SQLite file cannot build a second pair. Once the groups exist they are logged,
+    so a retry after a Core API failure only records them instead of creating them again.
+    Groups that are never recorded, because recording failed ``max_record_attempts`` times or
+    nobody retried within ``abandon_after`` seconds, are handed to ``compensate`` in the
+    background.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compensate: Callable[[CreateSessionResponse], Awaitable[None]],
+        max_record_attempts: int = 3,
+        abandon_after: float = 3600,
+        claim_timeout: float = 300,
+    ):
+        self.path = path
+        self.compensate = compensate
+        self.max_record_attempts = max_record_attempts
+        self.abandon_after = abandon_after
+        # A claim older than this belongs to a worker that died mid-way
+        self.claim_timeout = claim_timeout
+        self._compensating: dict[str, asyncio.Task] = {}
+        self._sweeper: asyncio.Task | None = None
+        self.events: Counter[str] = Counter()
+        with contextlib.closing(self._connect()) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS session_sagas ("
+                "key TEXT PRIMARY KEY, step TEXT NOT NULL, session TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+            )
+
+    async def begin(self, key: str) -> SessionSaga | None:
+        """Claims ``key`` for a new session start.
+
+        Returns None when the caller should create the groups, or the existing saga when
+        they already exist. Raises SessionInProgressError while another claim is live.
+        """
+        if key in self._compensating:
+            raise SessionInProgressError(key)
+        saga = await asyncio.to_thread(self._begin, key)
+        if saga is not None:
+            self.events["resumed" if saga.step == SagaStep.GROUPS_CREATED else "reused"] += 1
+        return saga
+
+    async def abort(self, key: str):
+        """Releases a claim whose group creation failed, so the next tap starts over."""
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM session_sagas WHERE key = ? AND step = ?",
+            (key, SagaStep.STARTED),
+        )
+
+    async def groups_created(self, key: str, session: CreateSessionResponse):
+        try:
+            await asyncio.to_thread(
+                self._execute,
+                "UPDATE session_sagas SET step = ?, session = ?, updated_at = ? WHERE key = ?",
+                (SagaStep.GROUPS_CREATED, session.model_dump_json(), time.time(), key),
+            )
+        except sqlite3.Error:
+            # Without a log entry nobody could resume these groups
+            logger.exception("Failed to log created groups for %s", key)
+            self._compensate_in_background(key, session)
+            raise
+
+    async def recorded(self, key: str):
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE session_sagas SET step = ?, updated_at = ? WHERE key = ?",
+            (SagaStep.RECORDED, time.time(), key),
+        )
+        self.events["recorded"] += 1
+
+    async def closed(self, key: str):
+        """Forgets a recorded session that is no longer open, so the next start creates one."""
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM session_sagas WHERE key = ? AND step = ?",
+            (key, SagaStep.RECORDED),
+        )
+        self.events["closed"] += 1
+
+    async def record_failed(self, key: str, session: CreateSessionResponse):
+        attempts = await asyncio.to_thread(self._record_failed, key)
+        self.events["record_failures"] += 1
+        if attempts >= self.max_record_attempts:
+            logger.warning("Giving up on recording session %s after %s attempts", key, attempts)
+            self._compensate_in_background(key, session)
+
+    async def start(self, sweep_interval: float = 60):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep(sweep_interval), name="saga-sweeper")
+
+    async def stop(self):
+        tasks = list(self._compensating.values())
+        if self._sweeper is not None:
+            tasks.append(self._sweeper)
+            self._sweeper = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def sweep(self):
+        """Compensates groups that were created but left unrecorded for ``abandon_after``."""
+        abandoned = await asyncio.to_thread(self._abandoned)
+        for saga in abandoned:
+            self._compensate_in_background(saga.key, saga.session)
+
+    def clear(self):
+        self._execute("DELETE FROM session_sagas", ())
+        self.events.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"compensating": len(self._compensating), **self.events}
+
+    def _compensate_in_background(self, key: str, session: CreateSessionResponse):
+        if key not in self._compensating:
+            self._compensating[key] = asyncio.create_task(self._compensate(key, session))
+
+    async def _compensate(self, key: str, session: CreateSessionResponse):
+        try:
+            await self.compensate(session)
+            await asyncio.to_thread(
+                self._execute,
+                "UPDATE session_sagas SET step = ?, updated_at = ? WHERE key = ?",
+                (SagaStep.COMPENSATED, time.time(), key),
+            )
+            self.events["compensated"] += 1
+        except Exception:
+            # The sweeper picks it up again later
+            self.events["compensation_failures"] += 1
+            logger.exception("Failed to clean up unrecorded groups for %s", key)
+        finally:
+            self._compensating.pop(key, None)
+
+    async def _sweep(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except sqlite3.Error:
+                logger.exception("Session saga sweep failed")
+
+    def _begin(self, key: str) -> SessionSaga | None:
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT key, step, session, attempts, updated_at FROM session_sagas WHERE key = ?",
+                (key,),
+            ).fetchone()
+            saga = self._saga(row) if row is not None else None
+            if saga is not None and saga.step in (SagaStep.GROUPS_CREATED, SagaStep.RECORDED):
+                db.execute("ROLLBACK")
+                return saga
+            if (
+                saga is not None
+                and saga.step == SagaStep.STARTED
+                and now - saga.updated_at < self.claim_timeout
+            ):
+                db.execute("ROLLBACK")
+                raise SessionInProgressError(key)
+            db.execute(
+                "INSERT OR REPLACE INTO session_sagas (key, step, session, attempts, updated_at) "
+                "VALUES (?, ?, NULL, 0, ?)",
+                (key, SagaStep.STARTED, now),
+            )
+            db.execute("COMMIT")
+            return None
+        finally:
+            db.close()
+
+    def _record_failed(self, key: str) -> int:
+        with contextlib.closing(self._connect()) as db:
+            db.execute(
+                "UPDATE session_sagas SET attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            row = db.execute("SELECT attempts FROM session_sagas WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def _abandoned(self) -> list[SessionSaga]:
+        with contextlib.closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT key, step, session, attempts, updated_at FROM session_sagas "
+                "WHERE step = ? AND updated_at < ?",
+                (SagaStep.GROUPS_CREATED, time.time() - self.abandon_after),
+            ).fetchall()
+        return [self._saga(row) for row in rows]
+
+    def _execute(self, sql: str, params: tuple):
+        with contextlib.closing(self._connect()) as db:
+            db.execute(sql, params)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; _begin manages its own transaction
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    @staticmethod
+    def _saga(row: tuple) -> SessionSaga:
+        key, step, session, attempts, updated_at = row
+        return SessionSaga(
+            key=key,
+            step=SagaStep(step),
+            session=CreateSessionResponse.model_validate_json(session) if session else None,
+            attempts=attempts,
+            updated_at=updated_at,
+        )
@@ -0,0 +1,189 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any
+
+from telethon.errors import FloodWaitError
+
+from app.util.timing import PhaseTimings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_lane: ContextVar[Priority] = ContextVar("account_lane", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def lane(priority: Priority):
+    """Runs the account calls made inside the block (and tasks it spawns) in ``priority``."""
+    token = _lane.set(priority)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class AccountBusyError(Exception):
+    """Raised instead of waiting out a FloodWait that is too long to hold a user for."""
+
+    def __init__(self, seconds: float, queue_position: int):
+        self.seconds = seconds
+        # How many requests were waiting for the account; the request itself is not queued
+        self.queue_position = queue_position
+        super().__init__(
+            "Telegram is asking us to slow down, so we could not start this yet. "
+            f"Please try again in about {math.ceil(seconds)} seconds."
+        )
+
+
+class AccountScheduler:
+    """Coordinates MTProto requests sent with the service account.
+
+    At most ``max_concurrency`` requests are in flight; waiting requests are admitted by
+    priority lane, then in arrival order. Each request type is paced by an interval learned
+    from the FloodWaits it has received: it doubles on a flood and decays back on success.
+    FloodWaits up to ``max_sleep`` seconds are slept out and retried, longer ones fail fast
+    with ``AccountBusyError``.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any], Awaitable[Any]],
+        max_concurrency: int = 4,
+        max_sleep: float = 10,
+        max_retries: int = 2,
+        max_interval: float = 30,
+    ):
+        self.send = send
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_sleep = max_sleep
+        self.max_retries = max_retries
+        self.max_interval = max_interval
+
+        self._active = 0
+        self._waiters: list[tuple[Priority, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._interval: dict[str, float] = {}
+        self._next_send: dict[str, float] = {}
+        self._blocked_until: dict[str, float] = {}
+
+        self.queue_wait = PhaseTimings()
+        self.floods: Counter[str] = Counter()
+        self.flood_retries = 0
+        self.rejected = 0
+        self.last_flood_at: float | None = None
+
+    async def call(self, request: Any) -> Any:
+        method = type(request).__name__
+        priority = _lane.get()
+        attempt = 0
+        while True:
+            await self._pace(method)
+
+            enqueued_at = time.monotonic()
+            await self._acquire(priority)
+            self.queue_wait.record(priority.name.lower(), time.monotonic() - enqueued_at)
+            try:
+                result = await self.send(request)
+            except FloodWaitError as e:
+                self._learn_flood(method, e.seconds)
+                if attempt >= self.max_retries or e.seconds > self.max_sleep:
+                    self.rejected += 1
+                    raise AccountBusyError(e.seconds, self.queue_depth() + 1) from e
+            else:
+                self._learn_success(method)
+                return result
+            finally:
+                self._release()
+
+            attempt += 1
+            self.flood_retries += 1
+
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": self._active,
+            "queue_depth": self.queue_depth(),
+            "queue_wait": self.queue_wait.stats(),
+            "flood_waits": dict(self.floods),
+            "flood_retries": self.flood_retries,
+            "rejected": self.rejected,
+            "intervals": {
+                method: round(interval, 3) for method, interval in self._interval.items()
+            },
+        }
+
+    async def _pace(self, method: str):
+        now = time.monotonic()
+        send_at = max(now, self._next_send.get(method, 0.0), self._blocked_until.get(method, 0.0))
+        if send_at - now > self.max_sleep:
+            self.rejected += 1
+            raise AccountBusyError(send_at - now, self.queue_depth() + 1)
+        # Reserve the slot before sleeping so concurrent callers of the same method spread out
+        self._next_send[method] = send_at + self._interval.get(method, 0.0)
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+    def _learn_flood(self, method: str, seconds: float):
+        self.floods[method] += 1
+        self.last_flood_at = time.monotonic()
+        self._blocked_until[method] = time.monotonic() + seconds
+        # Spread the calls that got us flooded over the wait we were given
+        self._interval[method] = min(
+            self.max_interval, max(self._interval.get(method, 0.0) * 2, seconds / 10, 0.5)
+        )
+        logger.warning(
+            "FloodWait of %ss on %s, pacing it every %.2fs", seconds, method, self._interval[method]
+        )
+
+    def _learn_success(self, method: str):
+        interval = self._interval.get(method)
+        if interval is None:
+            return
+        interval *= 0.9
+        if interval < 0.05:  # noqa: PLR2004
+            del self._interval[method]
+        else:
+            self._interval[method] = interval
+
+    async def _acquire(self, priority: Priority):
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us just before we were cancelled; pass it on
+                self._release()
+            else:
+                self._waiters = [waiter for waiter in self._waiters if waiter[2] is not future]
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the next waiter; _active stays the same
+                future.set_result(None)
+                return
+        self._active -= 1
@@ -0,0 +1,89 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from typing import Any
+
+from telegram import Message  # noqa: TC002
+
+logger = logging.getLogger(__name__)
+
+# Telegram albums hold at most 10 items
+MAX_ALBUM_SIZE = 10
+
+
+class AlbumBuffer:
+    """Collects the messages of a media group so they can be relayed as one album.
+
+    Telegram delivers every album item as its own update. Items are held until no further
+    item of the same group has arrived for ``delay`` seconds, or the album is full, and are
+    then passed to ``flush`` together in message order.
+    """
+
+    def __init__(self, flush: Callable[[list[Message]], Awaitable[None]], delay: float = 1.0):
+        self.flush = flush
+        self.delay = delay
+        self._pending: dict[tuple[int, str], list[Message]] = {}
+        self._timers: dict[tuple[int, str], asyncio.Task] = {}
+
+        self.albums = 0
+        self.items = 0
+        self.failures = 0
+
+    def add(self, message: Message):
+        key = (message.chat_id, message.media_group_id)
+        items = self._pending.setdefault(key, [])
+        items.append(message)
+        self.items += 1
+
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        delay = 0 if len(items) >= MAX_ALBUM_SIZE else self.delay
+        self._timers[key] = asyncio.create_task(self._flush_later(key, delay))
+
+    async def stop(self):
+        """Relays the albums still being collected instead of dropping them."""
+        timers = list(self._timers.values())
+        self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        for timer in timers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await timer
+        for key in list(self._pending):
+            await self._flush(key)
+
+    def clear(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pending.clear()
+        self.albums = 0
+        self.items = 0
+        self.failures = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "collecting": len(self._pending),
+            "albums": self.albums,
+            "items": self.items,
+            "failures": self.failures,
+        }
+
+    async def _flush_later(self, key: tuple[int, str], delay: float):
+        await asyncio.sleep(delay)
+        # From here on a late item starts a new album instead of cancelling this flush
+        self._timers.pop(key, None)
+        await self._flush(key)
+
+    async def _flush(self, key: tuple[int, str]):
+        messages = self._pending.pop(key, None)
+        if not messages:
+            return
+        try:
+            await self.flush(sorted(messages, key=lambda message: message.message_id))
+            self.albums += 1
+        except Exception:
+            self.failures += 1
+            logger.exception("Failed to relay album %s from chat %s", key[1], key[0])
@@ -1,12 +1,22 @@
 from telegram.ext import Application
 
 from app.config import settings
+from app.telegram.ratelimit import BotRateLimiter
 
-telegram_app = Application.builder().token(settings.bot_token).build()
+bot_rate_limiter = BotRateLimiter(
+    global_rate=settings.bot_global_rate,
+    group_rate=settings.bot_group_rate_per_minute / 60,
+    private_rate=settings.bot_private_rate,
+    max_retries=settings.bot_retry_after_retries,
+)
+
+telegram_app = (
+    Application.builder().token(settings.bot_token).rate_limiter(bot_rate_limiter).build()
+)
 
 
 async def set_webhook():
     await telegram_app.bot.set_webhook(
         url=f"{settings.public_webhook_base}/webhook/{settings.webhook_secret}",
-        allowed_updates=["message", "callback_query"],
+        allowed_updates=["message", "edited_message", "callback_query"],
     )
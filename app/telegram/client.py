@@ -2,4 +2,8 @@ from telethon import TelegramClient
 
 from app.config import settings
 
-telegram_client = TelegramClient("tbot-service-session", settings.api_key, settings.api_hash)
+telegram_clients = [
+    TelegramClient(session, settings.api_key, settings.api_hash)
+    for session in settings.telegram_sessions
+]
+telegram_client = telegram_clients[0]
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from dataclasses import dataclass, field
+from typing import Any
+
+from telegram import Message  # noqa: TC002
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    started_at: float = field(default_factory=time.monotonic)
+    messages: list[Message] = field(default_factory=list)
+    length: int = 0
+
+
+class RelayCoalescer:
+    """Merges bursts of text messages from one group into a single relayed message.
+
+    A burst is sent once no further message arrived for ``window`` seconds, but never later
+    than ``max_delay`` seconds after its first message, or earlier when the next message
+    would take it past ``max_length`` characters. Bursts of one chat are sent in order, and
+    ``flush`` lets a message that is not coalesced wait until the texts before it are out.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[Message]], Awaitable[None]],
+        window: float = 0.3,
+        max_delay: float = 1.0,
+        max_length: int = 4096,
+        remember: int = 1024,
+    ):
+        self.send = send
+        self.window = window
+        self.max_delay = max(window, max_delay)
+        self.max_length = max_length
+        self.remember_size = remember
+        self._bursts: dict[int, _Burst] = {}
+        self._timers: dict[int, asyncio.Task] = {}
+        self._sending: dict[int, asyncio.Task] = {}
+        # Parts of recently merged messages, by (source chat, message id) of each part
+        self._merged: OrderedDict[tuple[int, int], list[Message]] = OrderedDict()
+
+        self.messages = 0
+        self.sent_messages = 0
+        self.sends = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def add(self, message: Message):
+        chat_id = message.chat.id
+        burst = self._bursts.get(chat_id)
+        separator = 1 if burst is not None and burst.messages else 0
+        if burst is not None and burst.length + separator + len(message.text) > self.max_length:
+            self._start_send(chat_id)
+            burst = None
+        if burst is None:
+            burst = self._bursts[chat_id] = _Burst()
+            separator = 0
+        burst.messages.append(message)
+        burst.length += separator + len(message.text)
+        self.messages += 1
+
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        delay = min(self.window, burst.started_at + self.max_delay - time.monotonic())
+        self._timers[chat_id] = asyncio.create_task(self._send_later(chat_id, max(0.0, delay)))
+
+    async def flush(self, chat_id: int):
+        """Sends the pending burst of ``chat_id`` and waits until it is out."""
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        if chat_id in self._bursts:
+            self._start_send(chat_id)
+        sending = self._sending.get(chat_id)
+        if sending is not None:
+            await asyncio.wait([sending])
+
+    async def stop(self):
+        for chat_id in list(self._bursts) + list(self._sending):
+            await self.flush(chat_id)
+
+    def remember(self, chat_id: int, messages: list[Message]):
+        """Keeps the parts of a merged message so an edit of one part can be mirrored."""
+        for message in messages:
+            self._merged[chat_id, message.message_id] = messages
+        while len(self._merged) > self.remember_size:
+            self._merged.popitem(last=False)
+
+    def edited_text(self, chat_id: int, edited: Message) -> str | None:
+        """The merged text with ``edited`` swapped in, or None if it was not merged."""
+        messages = self._merged.get((chat_id, edited.message_id))
+        if messages is None:
+            return None
+        for index, message in enumerate(messages):
+            if message.message_id == edited.message_id:
+                messages[index] = edited
+        return join(messages)
+
+    def clear(self):
+        for task in (*self._timers.values(), *self._sending.values()):
+            task.cancel()
+        self._timers.clear()
+        self._sending.clear()
+        self._bursts.clear()
+        self._merged.clear()
+        self.messages = 0
+        self.sent_messages = 0
+        self.sends = 0
+        self.failures = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._bursts),
+            "messages": self.messages,
+            "sends": self.sends,
+            "sends_saved": self.sent_messages - self.sends,
+            "failures": self.failures,
+        }
+
+    async def _send_later(self, chat_id: int, delay: float):
+        await asyncio.sleep(delay)
+        # From here on a new message starts the next burst instead of cancelling this one
+        self._timers.pop(chat_id, None)
+        self._start_send(chat_id)
+
+    def _start_send(self, chat_id: int):
+        burst = self._bursts.pop(chat_id)
+        previous = self._sending.get(chat_id)
+        task = asyncio.create_task(self._send(burst, previous))
+        self._sending[chat_id] = task
+        task.add_done_callback(
+            lambda done: self._sending.pop(chat_id) if self._sending.get(chat_id) is done else None
+        )
+
+    async def _send(self, burst: _Burst, previous: asyncio.Task | None):
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await self.send(burst.messages)
+        except Exception:
+            self.failures += 1
+            logger.exception("Failed to relay %s coalesced messages", len(burst.messages))
+        finally:
+            self.sends += 1
+            self.sent_messages += len(burst.messages)
+
+
+def join(messages: list[Message]) -> str:
+    return "\n".join(message.text for message in messages)
@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteUpdateLog:
+    """update_ids claimed by any replica that can open the same SQLite file.
+
+    One connection is kept open for the life of the process. WAL mode with
+    ``synchronous=NORMAL`` skips the fsync on commit: a crash can only forget the last few
+    claims, which at worst lets one redelivery through.
+    """
+
+    def __init__(self, path: str, window: int):
+        self.path = path
+        self.window = window
+        self._claims = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen_updates ("
+            "update_id INTEGER PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+
+    def claim(self, update_ids: list[int]) -> list[bool]:
+        """Claims ``update_ids`` in one transaction; False where another replica had them."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # The same statement text reuses the connection's prepared INSERT
+                claimed = [
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO seen_updates (update_id, seen_at) VALUES (?, ?)",
+                        (update_id, now),
+                    ).rowcount
+                    == 1
+                    for update_id in update_ids
+                ]
+                previous, self._claims = self._claims, self._claims + len(update_ids)
+                # update_ids only grow, so everything a window behind can no longer be redelivered
+                if previous // self.window != self._claims // self.window:
+                    self._db.execute(
+                        "DELETE FROM seen_updates WHERE update_id < ?",
+                        (max(update_ids) - self.window,),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                with contextlib.suppress(sqlite3.Error):
+                    self._db.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def release(self, update_id: int):
+        with self._lock:
+            self._db.execute("DELETE FROM seen_updates WHERE update_id = ?", (update_id,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM seen_updates")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class UpdateDeduplicator:
+    """Drops webhook updates that were already accepted.
+
+    Telegram redelivers an update when the webhook answers slowly or with an error. The last
+    ``window`` update_ids are remembered in process, which answers a redelivery to the same
+    replica with a set lookup. With a ``shared`` log, ids not seen locally are also claimed
+    there so a redelivery that lands on another replica is dropped too. Claims arriving while
+    a write is running are written together by the next one, so concurrent updates share a
+    transaction. If the shared log fails, the update is processed rather than lost.
+    """
+
+    def __init__(self, window: int = 10000, shared: SqliteUpdateLog | None = None):
+        self.window = max(1, window)
+        self.shared = shared
+        self._seen: set[int] = set()
+        self._order: deque[int] = deque()
+        self._pending: list[tuple[int, asyncio.Future]] = []
+        self._writer: asyncio.Task | None = None
+
+        self.accepted = 0
+        self.shared_writes = 0
+        self.duplicates = 0
+        self.shared_duplicates = 0
+        self.shared_errors = 0
+
+    async def claim(self, update_id: int) -> bool:
+        """Returns True the first time ``update_id`` is seen and False for redeliveries."""
+        if update_id in self._seen:
+            self.duplicates += 1
+            return False
+        self._remember(update_id)
+
+        if self.shared is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending.append((update_id, future))
+            if self._writer is None:
+                self._writer = asyncio.create_task(self._write(), name="update-dedup-writer")
+            if not await future:
+                self.duplicates += 1
+                self.shared_duplicates += 1
+                return False
+
+        self.accepted += 1
+        return True
+
+    async def release(self, update_id: int):
+        """Forgets an update that failed, so Telegram's redelivery is processed again."""
+        self._seen.discard(update_id)
+        if self.shared is not None:
+            try:
+                await asyncio.to_thread(self.shared.release, update_id)
+            except sqlite3.Error:
+                self.shared_errors += 1
+                logger.exception("Failed to release update %s", update_id)
+
+    def clear(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        self._pending.clear()
+        self._seen.clear()
+        self._order.clear()
+        if self.shared is not None:
+            self.shared.clear()
+        self.accepted = 0
+        self.shared_writes = 0
+        self.duplicates = 0
+        self.shared_duplicates = 0
+        self.shared_errors = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "shared": self.shared is not None,
+            "window": len(self._seen),
+            "accepted": self.accepted,
+            "duplicates_dropped": self.duplicates,
+            "shared_writes": self.shared_writes,
+            "shared_duplicates_dropped": self.shared_duplicates,
+            "shared_errors": self.shared_errors,
+        }
+
+    async def _write(self):
+        try:
+            while self._pending:
+                # Let the updates arriving in this loop iteration join the batch
+                await asyncio.sleep(0)
+                batch, self._pending = self._pending, []
+                update_ids = [update_id for update_id, _ in batch]
+                try:
+                    claimed = await asyncio.to_thread(self.shared.claim, update_ids)
+                except sqlite3.Error:
+                    self.shared_errors += 1
+                    logger.exception(
+                        "Shared update log unavailable, accepting %s updates", len(batch)
+                    )
+                    claimed = [True] * len(batch)
+                self.shared_writes += 1
+                for (_, future), result in zip(batch, claimed, strict=True):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._writer = None
+
+    def _remember(self, update_id: int):
+        self._seen.add(update_id)
+        self._order.append(update_id)
+        if len(self._order) > self.window:
+            self._seen.discard(self._order.popleft())
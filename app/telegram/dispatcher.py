@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable  # noqa: TC003
+
+from telegram import Update  # noqa: TC002
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDispatcher:
+    """Bounded in-process queue drained by a pool of workers.
+
+    Updates are sharded over the workers by chat id, so updates from the same chat are
+    processed one at a time in arrival order while different chats run concurrently.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Update], Awaitable[None]],
+        workers: int = 8,
+        max_queue_size: int = 1000,
+        drain_timeout: float = 10.0,
+    ):
+        self.process = process
+        self.worker_count = max(1, workers)
+        self.max_queue_size = max_queue_size
+        self.drain_timeout = drain_timeout
+        self._queues: list[asyncio.Queue[tuple[float, Update]]] = []
+        self._workers: list[asyncio.Task] = []
+
+        self._enqueued = 0
+        self._processed = 0
+        self._failed = 0
+        self._max_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def start(self):
+        if self.running:
+            return
+        shard_size = max(1, self.max_queue_size // self.worker_count)
+        self._queues = [asyncio.Queue(maxsize=shard_size) for _ in range(self.worker_count)]
+        self._workers = [
+            asyncio.create_task(self._work(queue), name=f"update-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+
+    async def stop(self):
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)),
+                timeout=self.drain_timeout,
+            )
+        except TimeoutError:
+            logger.warning("Dropping %s queued updates on shutdown", self.depth())
+
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await worker
+        self._workers = []
+        self._queues = []
+
+    async def enqueue(self, update: Update):
+        if not self.running:
+            raise RuntimeError("Update dispatcher is not running")
+
+        queue = self._queues[self._shard(update)]
+        # Waits for room when the shard is full, which pushes back on Telegram instead of
+        # growing memory without bound.
+        await queue.put((time.monotonic(), update))
+        self._enqueued += 1
+        self._max_depth = max(self._max_depth, self.depth())
+
+    def stats(self) -> dict[str, int | float]:
+        started = self._processed + self._failed
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self.depth(),
+            "queue_capacity": sum(queue.maxsize for queue in self._queues),
+            "max_queue_depth": self._max_depth,
+            "enqueued": self._enqueued,
+            "processed": self._processed,
+            "failed": self._failed,
+            "avg_wait_ms": (self._wait_total / started * 1000) if started else 0.0,
+            "max_wait_ms": self._wait_max * 1000,
+        }
+
+    def _shard(self, update: Update) -> int:
+        chat = update.effective_chat
+        key = chat.id if chat is not None else update.update_id
+        return key % self.worker_count
+
+    async def _work(self, queue: asyncio.Queue[tuple[float, Update]]):
+        while True:
+            enqueued_at, update = await queue.get()
+            wait = time.monotonic() - enqueued_at
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            try:
+                await self.process(update)
+                self._processed += 1
+            except Exception:
+                self._failed += 1
+                logger.exception("Error processing update %s", update.update_id)
+            finally:
+                queue.task_done()
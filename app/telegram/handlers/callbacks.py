@@ -10,8 +10,13 @@ from app.services.core.api import (
     get_counselors,
     get_group_link,
 )
-from app.services.taccount.api import create_session
+from app.services.taccount.api import create_session, session_sagas
+from app.services.taccount.model import CreateSessionResponse  # noqa: TC001
+from app.services.taccount.saga import SagaStep, SessionInProgressError, SessionSaga
+from app.services.taccount.scheduler import AccountBusyError
 from app.telegram.handlers.start import welcome_message
+from app.telegram.jobs import JobState, SessionJob, SessionJobRegistry
+from app.util.hash import get_hash
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +35,9 @@ async def callbacks(update: Update, _context: ContextTypes.DEFAULT_TYPE):
     user_id = query.from_user.id
     data = query.data
 
-    if data is None or not (data.startswith("select:")  or data.startswith("start:") or data == "home"):
+    if data is None or not (
+        data.startswith("select:") or data.startswith("start:") or data == "home"
+    ):
         print(f"Unexpected data received: {data}")
         return
 
@@ -54,32 +61,22 @@ async def callbacks(update: Update, _context: ContextTypes.DEFAULT_TYPE):
 
     elif data.startswith("start:"):
         counselor_id = int(data.split(":")[1])
-        session = await create_session(user_id, counselor_id)
-        try:
-            user_alias = await create_or_get_alias(user_id)
-            await create_group(
-                user_alias,
-                session.user_group_link,
-                session.user_group_id,
-                counselor_id,
-                session.counselor_group_id,
-            )
-        except Exception:
-            # TODO: delete group if core api data creation fails to avoid zombie groups
-            logger.exception(
-                "Error creating records for user and counselor group in core api when start handler is called"
-            )
-            raise
-
-        await query.message.edit_text(
-            "Your counseling session is ready.\n\nClick the button below to open the chat.",
-            reply_markup=InlineKeyboardMarkup(
-                [
-                    [InlineKeyboardButton("Open Chat", url=session.user_group_link)],
-                    [InlineKeyboardButton("Back to Home", callback_data="home")],
-                ]
-            ),
+        key = (get_hash(str(user_id)), counselor_id)
+        # Show progress before the job can finish, so its outcome is always the last edit
+        await query.message.edit_text("Preparing your session…")
+
+        job = session_jobs.get(key)
+        if job is not None and job.state == JobState.SUCCEEDED:
+            # A late duplicate tap; the session already exists
+            await query.message.edit_text(**session_ready(job.result))
+            return
+
+        job, started = session_jobs.submit(
+            key, lambda job: prepare_session(job, user_id, counselor_id)
         )
+        job.watch(query.message)
+        if not started:
+            logger.info("Attached duplicate session start to the running job")
 
     elif data == "home":
         alias = await create_or_get_alias(user_id)
@@ -94,4 +91,141 @@ async def callbacks(update: Update, _context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+async def prepare_session(
+    job: SessionJob, user_id: int, counselor_id: int
+) -> CreateSessionResponse:
+    # Idempotency key for this session; a retry resumes from the last logged step
+    key = f"{get_hash(str(user_id))}:{counselor_id}"
+    saga = await _claim_session(job, key, counselor_id)
+    if (
+        saga is not None
+        and saga.step == SagaStep.RECORDED
+        and not await _session_open(user_id, counselor_id)
+    ):
+        # The session was closed or removed in the Core API after it was recorded
+        await session_sagas.closed(key)
+        saga = await _claim_session(job, key, counselor_id)
+
+    if saga is not None and saga.step == SagaStep.RECORDED:
+        await _update_job_messages(job, **session_ready(saga.session))
+        return saga.session
+
+    if saga is not None:
+        # Groups were created by an earlier attempt that failed to record them
+        session = saga.session
+    else:
+        try:
+            session = await create_session(user_id, counselor_id)
+        except AccountBusyError as e:
+            await session_sagas.abort(key)
+            logger.warning("Session start for counselor %s deferred: %s", counselor_id, e)
+            await _update_job_messages(
+                job,
+                text=str(e),
+                reply_markup=InlineKeyboardMarkup(
+                    [
+                        [InlineKeyboardButton("Try Again", callback_data=f"start:{counselor_id}")],
+                        [InlineKeyboardButton("Back to Home", callback_data="home")],
+                    ]
+                ),
+            )
+            raise
+        except Exception:
+            await session_sagas.abort(key)
+            await _update_job_messages(job, **session_failed(counselor_id))
+            raise
+
+        try:
+            await session_sagas.groups_created(key, session)
+        except Exception:
+            await _update_job_messages(job, **session_failed(counselor_id))
+            raise
+
+    try:
+        user_alias = await create_or_get_alias(user_id)
+        await create_group(
+            user_alias,
+            session.user_group_link,
+            session.user_group_id,
+            counselor_id,
+            session.counselor_group_id,
+            counselor_name=session.counselor_name,
+        )
+    except Exception:
+        logger.exception(
+            "Error creating records for user and counselor group in core api when start handler is called"
+        )
+        # Keeps the groups for a retry, or hands them to background cleanup once retries run out
+        await session_sagas.record_failed(key, session)
+        await _update_job_messages(job, **session_failed(counselor_id))
+        raise
+
+    await session_sagas.recorded(key)
+    await _update_job_messages(job, **session_ready(session))
+    return session
+
+
+async def _claim_session(job: SessionJob, key: str, counselor_id: int) -> SessionSaga | None:
+    try:
+        return await session_sagas.begin(key)
+    except SessionInProgressError:
+        await _update_job_messages(job, **session_in_progress(counselor_id))
+        raise
+
+
+async def _session_open(user_id: int, counselor_id: int) -> bool:
+    try:
+        return await get_group_link(user_id, counselor_id) is not None
+    except Exception:
+        # Handing out the recorded pair beats creating a second one while the Core API is down
+        logger.warning("Could not check whether the recorded session is open", exc_info=True)
+        return True
+
+
+def session_ready(session: CreateSessionResponse) -> dict:
+    return {
+        "text": "Your counseling session is ready.\n\nClick the button below to open the chat.",
+        "reply_markup": InlineKeyboardMarkup(
+            [
+                [InlineKeyboardButton("Open Chat", url=session.user_group_link)],
+                [InlineKeyboardButton("Back to Home", callback_data="home")],
+            ]
+        ),
+    }
+
+
+def session_failed(counselor_id: int) -> dict:
+    return {
+        "text": "Sorry, we could not prepare your session. Please try again.",
+        "reply_markup": InlineKeyboardMarkup(
+            [
+                [InlineKeyboardButton("Try Again", callback_data=f"start:{counselor_id}")],
+                [InlineKeyboardButton("Back to Home", callback_data="home")],
+            ]
+        ),
+    }
+
+
+def session_in_progress(counselor_id: int) -> dict:
+    return {
+        "text": "Your session is still being prepared. Please check again in a moment.",
+        "reply_markup": InlineKeyboardMarkup(
+            [
+                [InlineKeyboardButton("Check Again", callback_data=f"start:{counselor_id}")],
+                [InlineKeyboardButton("Back to Home", callback_data="home")],
+            ]
+        ),
+    }
+
+
+async def _update_job_messages(job: SessionJob, **kwargs):
+    for message in job.messages:
+        try:
+            await message.edit_text(**kwargs)
+        except Exception:
+            logger.exception("Failed to update session progress message")
+
+
+session_jobs = SessionJobRegistry()
+
 callback_handler = CallbackQueryHandler(callbacks)
@@ -1,22 +1,242 @@
-from telegram import Update  # noqa: TC002
+from typing import Any
+
+from telegram import Animation, Audio, Document, Message, ReplyParameters, Update, Video, Voice
+from telegram.constants import MessageLimit
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, MessageHandler, filters
+from telegram.helpers import escape_markdown
 
+from app.config import settings
 from app.services.core.api import resolve_group
+from app.telegram.albums import AlbumBuffer
 from app.telegram.app import telegram_app
+from app.telegram.coalesce import RelayCoalescer, join
+from app.telegram.message_map import MessageMap, SqliteMessageLog
+from app.telegram.outbox import OutboxLog, RelayOutbox
+
+# Media relayed with copy_message; the bot never downloads or re-uploads the files
+RELAYABLE_MEDIA = (
+    filters.PHOTO
+    | filters.VIDEO
+    | filters.Document.ALL
+    | filters.AUDIO
+    | filters.ANIMATION
+    | filters.VOICE
+    | filters.VIDEO_NOTE
+    | filters.Sticker.ALL
+    | filters.LOCATION
+    | filters.CONTACT
+    | filters.POLL
+    | filters.Dice.ALL
+)
+
+CAPTIONED_MEDIA = (Animation, Audio, Document, Video, Voice)
+
+
+def header(display_name: str) -> str:
+    # Entities do not nest in Markdown v1, so inside the bold only an asterisk is special:
+    # the bold is closed before an escaped asterisk and reopened after it
+    return "*From: " + display_name.replace("*", "*\\**") + "*"
+
+
+def escape(text: str) -> str:
+    """User text made literal for ``parse_mode="Markdown"``."""
+    return escape_markdown(text, version=1)
 
 
 async def relay(update: Update, _: ContextTypes.DEFAULT_TYPE):
     message = update.message
-    if not message or not message.text:
+    if not message:
+        return
+    if not message.text and message.effective_attachment is None:
         return
+    if message.media_group_id:
+        album_buffer.add(message)
+        return
+    if relay_coalescer.enabled:
+        if message.text and message.reply_to_message is None:
+            relay_coalescer.add(message)
+            return
+        # Keep the order of the conversation: texts buffered before this message go first
+        await relay_coalescer.flush(message.chat.id)
 
     routing = await resolve_group(message.chat.id)
+    payload = {
+        "source_chat_id": message.chat.id,
+        "message_ids": [message.message_id],
+        "target_chat_id": routing.target_group_id,
+        "reply_to": await _reply_target(message),
+    }
+    if message.text:
+        payload["text"] = f"{header(routing.display_name)}\n\n{escape(message.text)}"
+        await relay_outbox.submit(routing.target_group_id, "text", payload)
+    elif (caption := _relay_caption(message, routing.display_name)) is not None:
+        payload["caption"] = caption
+        await relay_outbox.submit(routing.target_group_id, "copy", payload)
+    else:
+        # Stickers, locations and the like carry no caption, so the header goes first
+        payload["header"] = header(routing.display_name)
+        await relay_outbox.submit(routing.target_group_id, "copy", payload)
+
+
+async def relay_burst(messages: list[Message]):
+    source_chat_id = messages[0].chat.id
+    routing = await resolve_group(source_chat_id)
+    payload = {
+        "source_chat_id": source_chat_id,
+        "message_ids": [message.message_id for message in messages],
+        "target_chat_id": routing.target_group_id,
+        "reply_to": None,
+        "text": f"{header(routing.display_name)}\n\n{escape(join(messages))}",
+    }
+    await relay_outbox.submit(routing.target_group_id, "text", payload)
+    if len(messages) > 1:
+        # Edits are mirrored from the source side, where the parts are known
+        relay_coalescer.remember(source_chat_id, messages)
+
 
-    await telegram_app.bot.send_message(
-        chat_id=routing.target_group_id,
-        text=f"*From: {routing.display_name}*\n\n{message.text}",
-        parse_mode="Markdown",
+async def relay_album(messages: list[Message]):
+    source_chat_id = messages[0].chat.id
+    await relay_coalescer.flush(source_chat_id)
+    routing = await resolve_group(source_chat_id)
+    payload = {
+        "source_chat_id": source_chat_id,
+        "message_ids": [message.message_id for message in messages],
+        "target_chat_id": routing.target_group_id,
+        "reply_to": await _reply_target(messages[0]),
+        "header": header(routing.display_name),
+    }
+    await relay_outbox.submit(routing.target_group_id, "album", payload)
+
+
+async def deliver(kind: str, payload: dict[str, Any]):
+    """Sends one relay outbox entry and links the copies to their sources."""
+    target_chat_id = payload["target_chat_id"]
+    source_chat_id = payload["source_chat_id"]
+    message_ids = payload["message_ids"]
+    reply_to = (
+        ReplyParameters(message_id=payload["reply_to"], allow_sending_without_reply=True)
+        if payload["reply_to"] is not None
+        else None
     )
 
+    if kind == "text":
+        sent = await telegram_app.bot.send_message(
+            chat_id=target_chat_id,
+            text=payload["text"],
+            parse_mode="Markdown",
+            reply_parameters=reply_to,
+        )
+        copies = [sent] * len(message_ids)
+    elif kind == "copy" and "caption" in payload:
+        sent = await telegram_app.bot.copy_message(
+            chat_id=target_chat_id,
+            from_chat_id=source_chat_id,
+            message_id=message_ids[0],
+            caption=payload["caption"],
+            parse_mode="Markdown",
+            reply_parameters=reply_to,
+        )
+        copies = [sent]
+    else:
+        await telegram_app.bot.send_message(
+            chat_id=target_chat_id,
+            text=payload["header"],
+            parse_mode="Markdown",
+            reply_parameters=reply_to,
+        )
+        if kind == "album":
+            # copy_messages keeps the items grouped and their own captions
+            copies = await telegram_app.bot.copy_messages(
+                chat_id=target_chat_id, from_chat_id=source_chat_id, message_ids=message_ids
+            )
+        else:
+            copies = [
+                await telegram_app.bot.copy_message(
+                    chat_id=target_chat_id, from_chat_id=source_chat_id, message_id=message_ids[0]
+                )
+            ]
+
+    for message_id, copy in zip(message_ids, copies, strict=False):
+        await message_map.link(source_chat_id, message_id, target_chat_id, copy.message_id)
+
+
+async def relay_edit(update: Update, _: ContextTypes.DEFAULT_TYPE):
+    message = update.edited_message
+    if not message or (message.text is None and message.caption is None):
+        return
+    target_id = await message_map.get(message.chat.id, message.message_id)
+    if target_id is None:
+        return
+
+    routing = await resolve_group(message.chat.id)
+    try:
+        if message.text is not None:
+            text = relay_coalescer.edited_text(message.chat.id, message)
+            await telegram_app.bot.edit_message_text(
+                chat_id=routing.target_group_id,
+                message_id=target_id,
+                text=f"{header(routing.display_name)}\n\n{escape(text or message.text)}",
+                parse_mode="Markdown",
+            )
+            return
+
+        caption = None if message.media_group_id else _relay_caption(message, routing.display_name)
+        await telegram_app.bot.edit_message_caption(
+            chat_id=routing.target_group_id,
+            message_id=target_id,
+            caption=caption if caption is not None else message.caption,
+            parse_mode="Markdown" if caption is not None else None,
+        )
+    except BadRequest as e:
+        # The copy was deleted, or the edit did not change what the copy shows
+        if "not modified" not in e.message.lower() and "not found" not in e.message.lower():
+            raise
+
+
+async def _reply_target(message: Message) -> int | None:
+    if message.reply_to_message is None:
+        return None
+    return await message_map.get(message.chat.id, message.reply_to_message.message_id)
+
+
+def _relay_caption(message: Message, display_name: str) -> str | None:
+    """The caption for the copy, or None when the header has to be sent on its own."""
+    if not (message.photo or isinstance(message.effective_attachment, CAPTIONED_MEDIA)):
+        return None
+    caption = header(display_name)
+    if message.caption:
+        caption = f"{caption}\n\n{escape(message.caption)}"
+    return caption if len(caption) <= MessageLimit.CAPTION_LENGTH else None
+
+
+album_buffer = AlbumBuffer(relay_album, delay=settings.relay_album_delay)
+
+relay_coalescer = RelayCoalescer(
+    relay_burst,
+    window=settings.relay_coalesce_window_ms / 1000,
+    max_delay=settings.relay_coalesce_max_delay_ms / 1000,
+    # Leaves room for the header in front of the merged text
+    max_length=MessageLimit.MAX_TEXT_LENGTH - 256,
+)
+
+relay_outbox = RelayOutbox(
+    deliver,
+    log=OutboxLog(settings.relay_outbox_path) if settings.relay_outbox_path else None,
+    max_attempts=settings.relay_outbox_max_attempts,
+)
+
+message_map = MessageMap(
+    capacity=settings.message_map_capacity,
+    max_chats=settings.message_map_chats,
+    spill=SqliteMessageLog(settings.message_map_path) if settings.message_map_path else None,
+    write_through=settings.message_map_write_through,
+)
+
+relay_handler = MessageHandler(
+    filters.UpdateType.MESSAGE & filters.ChatType.GROUPS & (filters.TEXT | RELAYABLE_MEDIA), relay
+)
 
-relay_handler = MessageHandler(filters.ChatType.GROUPS & filters.TEXT, relay)
+relay_edit_handler = MessageHandler(
+    filters.UpdateType.EDITED_MESSAGE & filters.ChatType.GROUPS, relay_edit
+)
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable, Hashable  # noqa: TC003
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class JobState(StrEnum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class SessionJob:
+    key: Hashable
+    state: JobState = JobState.RUNNING
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    result: Any = None
+    error: str | None = None
+    # Messages showing this job's progress; duplicate taps add theirs so all get the outcome
+    messages: list[Any] = field(default_factory=list)
+    attached: int = 0
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def watch(self, message: Any):
+        if all(watched.message_id != message.message_id for watched in self.messages):
+            self.messages.append(message)
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "duration_s": round(self.duration, 3),
+            "attached": self.attached,
+            "error": self.error,
+        }
+
+
+class SessionJobRegistry:
+    """Runs session starts as background jobs, at most one per key at a time.
+
+    Submitting a key whose job is still running attaches to that job instead of starting a
+    new one. Finished jobs are kept (up to ``max_finished``) so their state can be queried and
+    a late duplicate tap can be answered from the result.
+    """
+
+    def __init__(self, max_finished: int = 1000, drain_timeout: float = 30.0):
+        self.max_finished = max_finished
+        self.drain_timeout = drain_timeout
+        self._running: dict[Hashable, SessionJob] = {}
+        self._finished: OrderedDict[Hashable, SessionJob] = OrderedDict()
+
+        self.started = 0
+        self.attached = 0
+        self.outcomes: Counter[str] = Counter()
+
+    def get(self, key: Hashable) -> SessionJob | None:
+        return self._running.get(key) or self._finished.get(key)
+
+    def submit(
+        self, key: Hashable, run: Callable[[SessionJob], Awaitable[Any]]
+    ) -> tuple[SessionJob, bool]:
+        """Returns the job for ``key`` and whether this call started it."""
+        job = self._running.get(key)
+        if job is not None:
+            job.attached += 1
+            self.attached += 1
+            return job, False
+
+        job = SessionJob(key)
+        self._running[key] = job
+        self._finished.pop(key, None)
+        self.started += 1
+        job.task = asyncio.create_task(self._run(job, run), name=f"session-job-{self.started}")
+        return job, True
+
+    async def stop(self):
+        tasks = [job.task for job in self._running.values() if job.task is not None]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+        if pending:
+            logger.warning("Cancelling %s session jobs on shutdown", len(pending))
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def clear(self):
+        for job in self._running.values():
+            if job.task is not None:
+                job.task.cancel()
+        self._running.clear()
+        self._finished.clear()
+        self.started = 0
+        self.attached = 0
+        self.outcomes.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": len(self._running),
+            "started": self.started,
+            "attached": self.attached,
+            "outcomes": dict(self.outcomes),
+            "oldest_running_s": round(
+                max((job.duration for job in self._running.values()), default=0.0), 3
+            ),
+        }
+
+    async def _run(self, job: SessionJob, run: Callable[[SessionJob], Awaitable[Any]]):
+        try:
+            job.result = await run(job)
+            job.state = JobState.SUCCEEDED
+        except BaseException as e:
+            job.state = JobState.FAILED
+            job.error = type(e).__name__
+            if not isinstance(e, Exception):
+                raise
+            logger.exception("Session job failed")
+        finally:
+            job.finished_at = time.monotonic()
+            self.outcomes[job.state] += 1
+            if self._running.get(job.key) is job:
+                del self._running[job.key]
+            self._finished[job.key] = job
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
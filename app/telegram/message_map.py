@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import logging
+import sqlite3
+from array import array
+from collections import OrderedDict
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteMessageLog:
+    """Message id pairs that no longer fit in memory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with contextlib.closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS message_map ("
+                "chat_id INTEGER NOT NULL, message_id INTEGER NOT NULL, "
+                "mapped_id INTEGER NOT NULL, PRIMARY KEY (chat_id, message_id))"
+            )
+
+    def write(self, rows: list[tuple[int, int, int]]):
+        with contextlib.closing(self._connect()) as db:
+            db.executemany("INSERT OR REPLACE INTO message_map VALUES (?, ?, ?)", rows)
+
+    def read(self, chat_id: int, message_id: int) -> int | None:
+        with contextlib.closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT mapped_id FROM message_map WHERE chat_id = ? AND message_id = ?",
+                (chat_id, message_id),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def clear(self):
+        with contextlib.closing(self._connect()) as db:
+            db.execute("DELETE FROM message_map")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        # A crash can only lose the newest links, which are still in the rings that wrote them
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+
+class _Ring:
+    """Direct-mapped table of one chat: message ``id`` lives in slot ``id % capacity``.
+
+    Message ids grow by one per chat, so this keeps about the last ``capacity`` messages.
+    """
+
+    __slots__ = ("capacity", "mapped", "sources")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.sources = array("q", bytes(8 * capacity))
+        self.mapped = array("q", bytes(8 * capacity))
+
+    def get(self, message_id: int) -> int | None:
+        slot = message_id % self.capacity
+        return self.mapped[slot] if self.sources[slot] == message_id else None
+
+    def put(self, message_id: int, mapped_id: int) -> tuple[int, int] | None:
+        """Stores the pair and returns the pair it displaced, if any."""
+        slot = message_id % self.capacity
+        previous = self.sources[slot]
+        displaced = (previous, self.mapped[slot]) if previous not in (0, message_id) else None
+        self.sources[slot] = message_id
+        self.mapped[slot] = mapped_id
+        return displaced
+
+    def items(self) -> list[tuple[int, int]]:
+        pairs = zip(self.sources, self.mapped, strict=True)
+        return [(source, mapped) for source, mapped in pairs if source]
+
+
+class MessageMap:
+    """Links each relayed message to its copy on the other side of the session.
+
+    Both directions are stored, so a message id in either group resolves to its counterpart
+    in the other one. Each chat keeps a fixed ``capacity`` ring of 16-byte entries and at most
+    ``max_chats`` chats are kept, least recently used first out, which bounds memory to
+    ``16 * capacity * max_chats`` bytes. With a ``spill`` log, displaced entries are written
+    there in batches and looked up on a miss. With ``write_through`` every link is written
+    to the log as it is made instead, so replicas sharing the log file resolve the messages
+    relayed by each other.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        max_chats: int = 2048,
+        spill: SqliteMessageLog | None = None,
+        spill_batch: int = 256,
+        *,
+        write_through: bool = False,
+    ):
+        self.capacity = max(1, capacity)
+        self.max_chats = max(1, max_chats)
+        self.spill = spill
+        self.spill_batch = spill_batch
+        self.write_through = write_through and spill is not None
+        self._chats: OrderedDict[int, _Ring] = OrderedDict()
+        self._pending: dict[tuple[int, int], int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.spilled = 0
+        self.spill_errors = 0
+
+    async def link(self, chat_id: int, message_id: int, other_chat_id: int, other_id: int):
+        self._put(chat_id, message_id, other_id)
+        self._put(other_chat_id, other_id, message_id)
+        if self.write_through:
+            self._pending[chat_id, message_id] = other_id
+            self._pending[other_chat_id, other_id] = message_id
+            await self.flush()
+        elif len(self._pending) >= self.spill_batch:
+            await self.flush()
+
+    async def get(self, chat_id: int, message_id: int) -> int | None:
+        ring = self._chats.get(chat_id)
+        mapped = ring.get(message_id) if ring is not None else None
+        if mapped is not None:
+            self._chats.move_to_end(chat_id)
+            self.hits += 1
+            return mapped
+
+        if self.spill is not None:
+            mapped = self._pending.get((chat_id, message_id))
+            if mapped is None:
+                try:
+                    mapped = await asyncio.to_thread(self.spill.read, chat_id, message_id)
+                except sqlite3.Error:
+                    self.spill_errors += 1
+                    logger.exception("Failed to read spilled message ids")
+            if mapped is not None:
+                self.spill_hits += 1
+                return mapped
+
+        self.misses += 1
+        return None
+
+    async def flush(self):
+        if self.spill is None or not self._pending:
+            return
+        rows = [(chat, message, mapped) for (chat, message), mapped in self._pending.items()]
+        self._pending = {}
+        try:
+            await asyncio.to_thread(self.spill.write, rows)
+            self.spilled += len(rows)
+        except sqlite3.Error:
+            self.spill_errors += 1
+            logger.exception("Failed to spill %s message ids", len(rows))
+
+    def clear(self):
+        self._chats.clear()
+        self._pending.clear()
+        if self.spill is not None:
+            self.spill.clear()
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.spilled = 0
+        self.spill_errors = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "chats": len(self._chats),
+            "memory_bytes": len(self._chats) * self.capacity * 16,
+            "hits": self.hits,
+            "misses": self.misses,
+            "write_through": self.write_through,
+            "spill_hits": self.spill_hits,
+            "spilled": self.spilled,
+            "spill_errors": self.spill_errors,
+        }
+
+    def _put(self, chat_id: int, message_id: int, mapped_id: int):
+        ring = self._chats.get(chat_id)
+        if ring is None:
+            if len(self._chats) >= self.max_chats:
+                evicted_chat, evicted = self._chats.popitem(last=False)
+                for source, mapped in evicted.items():
+                    self._spill(evicted_chat, source, mapped)
+            ring = self._chats[chat_id] = _Ring(self.capacity)
+        else:
+            self._chats.move_to_end(chat_id)
+
+        displaced = ring.put(message_id, mapped_id)
+        if displaced is not None:
+            self._spill(chat_id, *displaced)
+
+    def _spill(self, chat_id: int, message_id: int, mapped_id: int):
+        # Written through links are already in the log
+        if self.spill is not None and not self.write_through:
+            self._pending[chat_id, message_id] = mapped_id
@@ -0,0 +1,308 @@
+import asyncio
+import contextlib
+import json
+import logging
+import sqlite3
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable  # noqa: TC003
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from app.telegram.ratelimit import as_seconds
+from app.util.timing import PhaseTimings
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxState(StrEnum):
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+@dataclass
+class OutboxEntry:
+    chat_id: int
+    kind: str
+    payload: dict[str, Any]
+    id: int | None = None
+    attempts: int = 0
+
+
+class OutboxLog:
+    """SQLite log of the relay sends not yet acknowledged, synced in full on every commit.
+
+    Sends are appended before they are attempted and deleted once they are delivered or
+    given up on, so the file only ever holds the backlog.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with contextlib.closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER NOT NULL, "
+                "kind TEXT NOT NULL, payload TEXT NOT NULL, state TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, id)")
+
+    def write(self, entries: list[OutboxEntry], acks: list[int]):
+        """Appends ``entries`` and deletes the acknowledged ``acks`` in one transaction."""
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            for entry in entries:
+                entry.id = db.execute(
+                    "INSERT INTO outbox (chat_id, kind, payload, state, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entry.chat_id,
+                        entry.kind,
+                        json.dumps(entry.payload),
+                        OutboxState.PENDING,
+                        now,
+                    ),
+                ).lastrowid
+            # Delivered and failed sends carry message text that is no longer needed
+            db.executemany("DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in acks])
+            db.execute("COMMIT")
+        except BaseException:
+            with contextlib.suppress(sqlite3.Error):
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def pending(self) -> list[OutboxEntry]:
+        with contextlib.closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT id, chat_id, kind, payload, attempts FROM outbox WHERE state = ? "
+                "ORDER BY id",
+                (OutboxState.PENDING,),
+            ).fetchall()
+        return [
+            OutboxEntry(chat_id, kind, json.loads(payload), entry_id, attempts)
+            for entry_id, chat_id, kind, payload, attempts in rows
+        ]
+
+    def prune(self):
+        """Removes rows acknowledged by versions that kept them."""
+        with contextlib.closing(self._connect()) as db:
+            db.execute("DELETE FROM outbox WHERE state != ?", (OutboxState.PENDING,))
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        db.execute("PRAGMA synchronous=FULL")
+        return db
+
+
+class RelayOutbox:
+    """Makes relay sends durable before they are attempted, and retries them until delivered.
+
+    ``submit`` returns once the send is committed to the log, or once the commit failed, in
+    which case the send goes ahead without being replayable. Sends submitted while a commit
+    is running are written together by the next one, so many concurrent relays share one
+    fsync. Each target chat is drained in submission order by its own task; Bot API errors
+    other than a rejected request are retried up to ``max_attempts`` times, after the wait
+    Telegram asks for or with backoff.
+    Sends still pending on shutdown are replayed by ``start`` on the next run. Without a log,
+    ``submit`` delivers inline.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[str, dict[str, Any]], Awaitable[None]],
+        log: OutboxLog | None = None,
+        *,
+        max_attempts: int = 20,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        drain_timeout: float = 10.0,
+    ):
+        self.deliver = deliver
+        self.log = log
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.drain_timeout = drain_timeout
+        self._appends: list[tuple[OutboxEntry, asyncio.Future]] = []
+        self._acks: list[int] = []
+        self._writer: asyncio.Task | None = None
+        self._queues: dict[int, deque[OutboxEntry]] = {}
+        self._senders: dict[int, asyncio.Task] = {}
+
+        self.write_timings = PhaseTimings()
+        self.commits = 0
+        self.written = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.replayed = 0
+        self.unlogged = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.log is not None
+
+    async def submit(self, chat_id: int, kind: str, payload: dict[str, Any]):
+        if self.log is None:
+            await self.deliver(kind, payload)
+            return
+
+        entry = OutboxEntry(chat_id, kind, payload)
+        future = asyncio.get_running_loop().create_future()
+        self._appends.append((entry, future))
+        self._start_writer()
+        try:
+            await future
+        except sqlite3.Error:
+            # Failing the relay would lose the message when WEBHOOK_ACK_MODE has already
+            # acknowledged its update; it is still sent in order, just not replayed on restart
+            self.unlogged += 1
+        self._enqueue(entry)
+
+    async def start(self):
+        if self.log is None:
+            return
+        await asyncio.to_thread(self.log.prune)
+        entries = await asyncio.to_thread(self.log.pending)
+        if entries:
+            logger.info("Replaying %s undelivered relay messages", len(entries))
+        for entry in entries:
+            self._enqueue(entry)
+        self.replayed += len(entries)
+
+    async def stop(self):
+        senders = list(self._senders.values())
+        if senders:
+            _, pending = await asyncio.wait(senders, timeout=self.drain_timeout)
+            if pending:
+                logger.warning(
+                    "Leaving relay messages for %s chats to the next start", len(pending)
+                )
+            for sender in pending:
+                sender.cancel()
+            for sender in pending:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await sender
+        if self._writer is not None:
+            await asyncio.wait([self._writer])
+
+    def clear(self):
+        for task in self._senders.values():
+            task.cancel()
+        if self._writer is not None:
+            self._writer.cancel()
+        self._senders.clear()
+        self._queues.clear()
+        self._appends.clear()
+        self._acks.clear()
+        self._writer = None
+        self.write_timings.clear()
+        self.commits = 0
+        self.written = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.replayed = 0
+        self.unlogged = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": sum(len(queue) for queue in self._queues.values()),
+            "commits": self.commits,
+            "written": self.written,
+            "write": self.write_timings.stats(),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "replayed": self.replayed,
+            "unlogged": self.unlogged,
+        }
+
+    def _start_writer(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write(), name="outbox-writer")
+
+    async def _write(self):
+        try:
+            while self._appends or self._acks:
+                # Let the relays running in this loop iteration join the batch
+                await asyncio.sleep(0)
+                appends, self._appends = self._appends, []
+                acks, self._acks = self._acks, []
+                try:
+                    with self.write_timings.measure("commit"):
+                        await asyncio.to_thread(
+                            self.log.write, [entry for entry, _ in appends], acks
+                        )
+                except sqlite3.Error as e:
+                    # The sends go ahead without the log; lost acks only mean those messages
+                    # are sent again after a restart
+                    logger.exception(
+                        "Failed to write %s relay messages to the outbox", len(appends)
+                    )
+                    for _, future in appends:
+                        future.set_exception(e)
+                    continue
+                self.commits += 1
+                self.written += len(appends)
+                for _, future in appends:
+                    future.set_result(None)
+        finally:
+            self._writer = None
+
+    def _enqueue(self, entry: OutboxEntry):
+        self._queues.setdefault(entry.chat_id, deque()).append(entry)
+        if entry.chat_id not in self._senders:
+            self._senders[entry.chat_id] = asyncio.create_task(self._send(entry.chat_id))
+
+    async def _send(self, chat_id: int):
+        queue = self._queues[chat_id]
+        try:
+            while queue:
+                await self._deliver(queue[0])
+                entry = queue.popleft()
+                if entry.id is not None:
+                    self._acks.append(entry.id)
+                    self._start_writer()
+        finally:
+            self._senders.pop(chat_id, None)
+            if not queue:
+                self._queues.pop(chat_id, None)
+
+    async def _deliver(self, entry: OutboxEntry) -> OutboxState:
+        while True:
+            entry.attempts += 1
+            try:
+                await self.deliver(entry.kind, entry.payload)
+            except (BadRequest, Forbidden):  # fmt: skip
+                # Telegram rejected the message itself; sending it again would not help
+                self.failed += 1
+                logger.exception("Relay message %s was rejected", entry.id)
+                return OutboxState.FAILED
+            except Exception as e:
+                if entry.attempts >= self.max_attempts:
+                    self.failed += 1
+                    logger.exception("Giving up on relay message %s", entry.id)
+                    return OutboxState.FAILED
+                self.retries += 1
+                logger.warning("Relay message %s failed, retrying", entry.id, exc_info=True)
+                if isinstance(e, RetryAfter):
+                    # Sending before Telegram's wait is over only extends it
+                    await asyncio.sleep(as_seconds(e.retry_after))
+                else:
+                    await asyncio.sleep(
+                        min(self.max_retry_delay, self.retry_delay * 2 ** (entry.attempts - 1))
+                    )
+            else:
+                self.delivered += 1
+                return OutboxState.DELIVERED
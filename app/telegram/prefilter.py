@@ -0,0 +1,94 @@
+from collections import Counter
+from typing import Any
+
+import orjson
+
+GROUP_CHAT_TYPES = frozenset({"group", "supergroup"})
+# Message fields of the content the relay copies; service messages have none of them
+RELAYABLE_FIELDS = (
+    "text",
+    "photo",
+    "video",
+    "document",
+    "audio",
+    "animation",
+    "voice",
+    "video_note",
+    "sticker",
+    "location",
+    "contact",
+    "poll",
+    "dice",
+)
+
+
+def decode_update(body: bytes) -> dict[str, Any]:
+    return orjson.loads(body)
+
+
+class UpdateFilter:
+    """Drops raw webhook payloads that no handler would act on, before PTB parses them.
+
+    Kept in step with the registered handlers: callback queries, ``/start`` in private chats,
+    text or media messages in groups and text or caption edits in groups. Anything else is
+    counted under the reason it was dropped.
+    """
+
+    def __init__(self):
+        self.accepted = 0
+        self.dropped: Counter[str] = Counter()
+
+    def accept(self, payload: Any) -> bool:
+        reason = self._reject_reason(payload) if isinstance(payload, dict) else "malformed"
+        if reason is None:
+            self.accepted += 1
+            return True
+        self.dropped[reason] += 1
+        return False
+
+    def clear(self):
+        self.accepted = 0
+        self.dropped.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"accepted": self.accepted, "dropped": dict(self.dropped)}
+
+    @staticmethod
+    def _reject_reason(payload: dict[str, Any]) -> str | None:
+        if not isinstance(payload.get("update_id"), int):
+            return "malformed"
+        if "callback_query" in payload:
+            return None
+        message = payload.get("message")
+        if isinstance(message, dict):
+            return _reject_message(message)
+        edited = payload.get("edited_message")
+        if isinstance(edited, dict):
+            return _reject_edit(edited)
+        return "update_type"
+
+
+def _reject_message(message: dict[str, Any]) -> str | None:
+    sender = message.get("from") or {}
+    # Anonymous group admins post as a bot with sender_chat set; those are people
+    if sender.get("is_bot") and "sender_chat" not in message:
+        return "bot_sender"
+
+    chat_type = (message.get("chat") or {}).get("type")
+    text = message.get("text")
+    if chat_type == "private":
+        return None if text and _is_start_command(text) else "private_not_start"
+    if chat_type in GROUP_CHAT_TYPES:
+        return None if any(message.get(field) for field in RELAYABLE_FIELDS) else "group_no_content"
+    return "chat_type"
+
+
+def _reject_edit(message: dict[str, Any]) -> str | None:
+    if (message.get("chat") or {}).get("type") not in GROUP_CHAT_TYPES:
+        return "edit_outside_group"
+    return None if "text" in message or "caption" in message else "edit_no_text"
+
+
+def _is_start_command(text: str) -> bool:
+    words = text.split(maxsplit=1)
+    return bool(words) and words[0].split("@", 1)[0] == "/start"
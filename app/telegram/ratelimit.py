@@ -0,0 +1,162 @@
+import asyncio
+import datetime as dt
+import logging
+import time
+from collections.abc import Callable, Coroutine  # noqa: TC003
+from typing import Any
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from app.util.timing import PhaseTimings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Admits ``rate`` requests per second with bursts of up to ``burst``.
+
+    Tracked as the time the next request would be admitted if the bucket were empty, so a
+    request reserves its slot up front and waits for it instead of polling.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1 / rate
+        self.tolerance = (max(1, burst) - 1) * self.interval
+        self._next_free = 0.0
+
+    def reserve(self, at: float) -> float:
+        """Reserves the first slot at or after ``at`` and returns when it starts."""
+        start = max(at, self._next_free - self.tolerance)
+        self._next_free = max(self._next_free, at) + self.interval
+        return start
+
+    def block(self, until: float):
+        self._next_free = max(self._next_free, until + self.tolerance)
+
+    def idle(self, now: float) -> bool:
+        return self._next_free <= now
+
+
+class BotRateLimiter(BaseRateLimiter[int]):
+    """Paces Bot API requests under Telegram's global and per-chat limits.
+
+    Requests addressed to a chat take a slot in that chat's bucket (``group_rate`` for groups
+    and channels, ``private_rate`` for private chats) and, once that slot is due, one in the
+    global bucket, waiting for their turn rather than failing. A ``RetryAfter`` blocks the chat for the given time and
+    the request is retried up to ``max_retries`` times, which can be overridden per call with
+    ``rate_limit_args``. Requests without a chat, such as callback query answers, are not
+    delayed.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        group_rate: float = 20 / 60,
+        private_rate: float = 1,
+        *,
+        burst: int = 3,
+        max_retries: int = 2,
+        max_tracked_chats: int = 10000,
+    ):
+        self.group_rate = group_rate
+        self.private_rate = private_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.max_tracked_chats = max_tracked_chats
+        self._global = TokenBucket(global_rate, burst)
+        self._chats: dict[int | str, TokenBucket] = {}
+
+        self.waiting = 0
+        self.max_waiting = 0
+        self.throttle_delay = PhaseTimings()
+        self.retry_afters = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def process_request(  # noqa: PLR0917
+        self,
+        callback: Callable[..., Coroutine[Any, Any, bool | dict[str, Any] | None]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,  # noqa: ARG002
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> bool | dict[str, Any] | None:
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+
+        max_retries = self.max_retries if rate_limit_args is None else rate_limit_args
+        attempt = 0
+        while True:
+            await self._wait_for_slot(chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.retry_afters += 1
+                seconds = as_seconds(e.retry_after)
+                self._bucket(chat_id).block(time.monotonic() + seconds)
+                if attempt >= max_retries:
+                    raise
+                logger.warning("RetryAfter of %ss for chat %s, retrying", seconds, chat_id)
+            attempt += 1
+
+    def clear(self):
+        self._chats.clear()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.throttle_delay.clear()
+        self.retry_afters = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "tracked_chats": len(self._chats),
+            "throttle_delay": self.throttle_delay.stats(),
+            "retry_afters": self.retry_afters,
+        }
+
+    async def _wait_for_slot(self, chat_id: int | str):
+        # The global slot is only taken once the chat's turn has come, so a throttled chat
+        # does not hold global slots in the future and delay sends to idle chats
+        now = time.monotonic()
+        await self._wait("chat", self._bucket(chat_id).reserve(now) - now)
+        now = time.monotonic()
+        await self._wait("global", self._global.reserve(now) - now)
+
+    async def _wait(self, bucket: str, delay: float):
+        if delay <= 0:
+            return
+
+        self.throttle_delay.record(bucket, delay)
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
+    def _bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.max_tracked_chats:
+                self._prune()
+            # Group and channel ids are negative; channels may also be addressed by @username
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.private_rate, self.burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self):
+        now = time.monotonic()
+        self._chats = {chat: bucket for chat, bucket in self._chats.items() if not bucket.idle(now)}
+
+
+def as_seconds(value: int | dt.timedelta) -> float:
+    return value.total_seconds() if isinstance(value, dt.timedelta) else float(value)
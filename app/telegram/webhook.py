@@ -3,16 +3,61 @@ from telegram import Update
 
 from app.config import settings
 from app.telegram.app import telegram_app
+from app.telegram.dedup import SqliteUpdateLog, UpdateDeduplicator
+from app.telegram.dispatcher import UpdateDispatcher
+from app.telegram.prefilter import UpdateFilter, decode_update
+from app.util.context import update_scope
 
 router = APIRouter()
 
 
+async def process_update(update: Update):
+    # Handlers share memoized Core API reads for the duration of one update
+    with update_scope():
+        await telegram_app.process_update(update)
+
+
+update_filter = UpdateFilter()
+
+update_deduplicator = UpdateDeduplicator(
+    window=settings.update_dedup_window,
+    shared=(
+        SqliteUpdateLog(settings.update_dedup_path, settings.update_dedup_window)
+        if settings.update_dedup_path
+        else None
+    ),
+)
+
+update_dispatcher = UpdateDispatcher(
+    process_update,
+    workers=settings.webhook_workers,
+    max_queue_size=settings.webhook_queue_size,
+)
+
+
 @router.post("/webhook/{secret}")
 async def telegram_webhook(secret: str, request: Request):
     if secret != settings.webhook_secret:
         raise HTTPException(status_code=403, detail="Invalid webhook secret")
 
-    payload = await request.json()
+    try:
+        payload = decode_update(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid update payload") from e
+    # Acknowledge updates no handler acts on without building PTB objects for them
+    if not update_filter.accept(payload):
+        return {"ok": True}
+    if not await update_deduplicator.claim(payload["update_id"]):
+        return {"ok": True}
+
     update = Update.de_json(payload, telegram_app.bot)
-    await telegram_app.process_update(update)
+    if settings.webhook_ack_mode and update_dispatcher.running:
+        await update_dispatcher.enqueue(update)
+    else:
+        try:
+            await process_update(update)
+        except Exception:
+            # Telegram redelivers after an error response; let that attempt through
+            await update_deduplicator.release(update.update_id)
+            raise
     return {"ok": True}
@@ -0,0 +1,85 @@
+import inspect
+import logging
+from collections.abc import Callable, Hashable  # noqa: TC003
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateContext:
+    """Values memoized for the lifetime of a single Telegram update."""
+
+    def __init__(self):
+        self.values: dict[Hashable, Any] = {}
+        self.deduplicated = 0
+
+
+_current_update: ContextVar[UpdateContext | None] = ContextVar("current_update", default=None)
+
+update_context_stats = {"updates": 0, "deduplicated_calls": 0, "max_deduplicated_per_update": 0}
+
+
+@contextmanager
+def update_scope():
+    context = UpdateContext()
+    token = _current_update.set(context)
+    try:
+        yield context
+    finally:
+        _current_update.reset(token)
+        update_context_stats["updates"] += 1
+        update_context_stats["deduplicated_calls"] += context.deduplicated
+        update_context_stats["max_deduplicated_per_update"] = max(
+            update_context_stats["max_deduplicated_per_update"], context.deduplicated
+        )
+        if context.deduplicated:
+            logger.debug("Deduplicated %s calls while processing update", context.deduplicated)
+
+
+def memoize_per_update(func: Callable) -> Callable:
+    """Reuses the result of ``func`` for repeated identical calls within one update scope.
+
+    Outside of an update scope the function is called as usual. Failed calls are not memoized.
+    """
+
+    def key_for(args: tuple, kwargs: dict) -> Hashable:
+        return (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            context = _current_update.get()
+            if context is None:
+                return await func(*args, **kwargs)
+
+            key = key_for(args, kwargs)
+            if key in context.values:
+                context.deduplicated += 1
+                return context.values[key]
+
+            result = await func(*args, **kwargs)
+            context.values[key] = result
+            return result
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        context = _current_update.get()
+        if context is None:
+            return func(*args, **kwargs)
+
+        key = key_for(args, kwargs)
+        if key in context.values:
+            context.deduplicated += 1
+            return context.values[key]
+
+        result = func(*args, **kwargs)
+        context.values[key] = result
+        return result
+
+    return wrapper
@@ -2,7 +2,9 @@ import hashlib
 import hmac
 
 from app.config import settings
+from app.util.context import memoize_per_update
 
 
+@memoize_per_update
 def get_hash(plain_text: str) -> str:
     return hmac.new(settings.hash_key, plain_text.encode(), hashlib.sha256).hexdigest()
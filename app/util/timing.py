@@ -0,0 +1,40 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class PhaseTimings:
+    """Per-phase wall-clock timings for a multi-step operation."""
+
+    def __init__(self):
+        self._count: defaultdict[str, int] = defaultdict(int)
+        self._total: defaultdict[str, float] = defaultdict(float)
+        self._max: defaultdict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def measure(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - started)
+
+    def record(self, phase: str, seconds: float):
+        self._count[phase] += 1
+        self._total[phase] += seconds
+        self._max[phase] = max(self._max[phase], seconds)
+
+    def clear(self):
+        self._count.clear()
+        self._total.clear()
+        self._max.clear()
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        return {
+            phase: {
+                "count": count,
+                "avg_ms": self._total[phase] / count * 1000,
+                "max_ms": self._max[phase] * 1000,
+            }
+            for phase, count in self._count.items()
+        }
@@ -0,0 +1,52 @@
+"""Microbenchmark: Core API response decoding, dict round trip vs. direct JSON validation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_core_decode
+"""
+
+import json
+import timeit
+
+from pydantic import TypeAdapter
+
+from app.services.core.model import CounselorInfo, CounselorResponse, ResolveGroupResponse
+
+COUNSELOR_LIST = TypeAdapter(list[CounselorInfo])
+
+counselor_list = json.dumps([{"id": i, "name": f"Counselor {i}"} for i in range(50)]).encode()
+counselor = json.dumps(
+    {"id": 1, "telegram_user_id": 123456789, "name": "Dr. Smith", "bio": "Psychology " * 20}
+).encode()
+routing = json.dumps({"target_group_id": -1001234567890, "display_name": "anon-fox-42"}).encode()
+
+CASES = {
+    "get_counselors (50 rows)": (
+        lambda: [CounselorInfo(**row) for row in json.loads(counselor_list)],
+        lambda: COUNSELOR_LIST.validate_json(counselor_list),
+    ),
+    "get_counselor": (
+        lambda: CounselorResponse(**json.loads(counselor)),
+        lambda: CounselorResponse.model_validate_json(counselor),
+    ),
+    "resolve_group": (
+        lambda: ResolveGroupResponse(**json.loads(routing)),
+        lambda: ResolveGroupResponse.model_validate_json(routing),
+    ),
+}
+
+
+def per_call_us(func, number: int = 20000) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1_000_000
+
+
+def main():
+    print(f"{'payload':<28}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, (before, after) in CASES.items():
+        before_us = per_call_us(before)
+        after_us = per_call_us(after)
+        print(f"{name:<28}{before_us:>14.2f}{after_us:>14.2f}{before_us / after_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
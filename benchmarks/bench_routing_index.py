@@ -0,0 +1,91 @@
+"""Benchmark: routing index vs. a dict of response models, memory and lookup latency.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_routing_index
+"""
+
+import random
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from app.services.core.model import ResolveGroupResponse
+from app.services.core.routing_index import RoutingIndex
+
+ROUTES = 1_000_000
+# Sessions get one alias each, counselor groups share a name per counselor
+COUNSELORS = 500
+
+
+def routes() -> list[tuple[int, int, str]]:
+    rows = []
+    for i in range(ROUTES // 2):
+        user_group, counselor_group = -1001000000000 - i, -1002000000000 - i
+        rows.append((user_group, counselor_group, f"anon-{i:07d}"))
+        rows.append((counselor_group, user_group, f"Counselor {i % COUNSELORS}"))
+    return rows
+
+
+def measure(build) -> tuple[object, int]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def per_call_us(func, number: int = 200_000) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1_000_000
+
+
+def main():
+    group_ids = [group_id for group_id, _, _ in routes()]
+    lookups = iter(random.Random(0).choices(group_ids, k=10_000_000))
+
+    # Each store builds its own rows, so the display names count towards its memory
+    models, models_bytes = measure(
+        lambda: {
+            group_id: ResolveGroupResponse(target_group_id=target, display_name=name)
+            for group_id, target, name in routes()
+        }
+    )
+    index, index_bytes = measure(lambda: _loaded(routes()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "routes.snapshot")
+        index.save_snapshot(path)
+        snapshot_bytes = Path(path).stat().st_size
+        mapped, mapped_bytes = measure(lambda: _mapped(path))
+        load_s = min(timeit.repeat(lambda: RoutingIndex().load_snapshot(path), number=1, repeat=3))
+
+        print(f"{'store':<28}{'MB / 1M routes':>16}{'lookup (us)':>14}")
+        cases = {
+            "dict of models": (models_bytes, lambda: models.get(next(lookups))),
+            "routing index": (index_bytes, lambda: index.get(next(lookups))),
+            # The mapped arrays sit in the page cache, so only the name table is counted
+            "routing index (mmap)": (mapped_bytes, lambda: mapped.get(next(lookups))),
+        }
+        for name, (size, lookup) in cases.items():
+            print(f"{name:<28}{size / 2**20:>16.1f}{per_call_us(lookup):>14.2f}")
+        print(
+            f"\nsnapshot: {snapshot_bytes / 2**20:.1f} MB on disk, mapped in {load_s * 1000:.0f} ms"
+        )
+        mapped.clear()
+
+
+def _loaded(rows: list[tuple[int, int, str]]) -> RoutingIndex:
+    index = RoutingIndex()
+    index.load(rows)
+    return index
+
+
+def _mapped(path: str) -> RoutingIndex:
+    index = RoutingIndex()
+    index.load_snapshot(path)
+    return index
+
+
+if __name__ == "__main__":
+    main()
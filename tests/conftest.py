@@ -1,7 +1,8 @@
 """Pytest configuration and shared fixtures."""
 
 import os
-from unittest.mock import AsyncMock, MagicMock
+import tempfile
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -19,6 +20,7 @@ _env_vars = {
     "HASH_KEY": "test-hash",
     "API_KEY": "1234",
     "API_HASH": "test-api-hash",
+    "SESSION_SAGA_PATH": os.path.join(tempfile.mkdtemp(), "sessions.sqlite3"),  # noqa: PTH118
 }
 
 for key, value in _env_vars.items():
@@ -89,3 +91,58 @@ def mock_context():
     context.bot = MagicMock()
     context.bot.send_message = AsyncMock()
     return context
+
+
+@pytest.fixture(autouse=True)
+def reset_core_caches():
+    """Clear module-level caches and job state so tests do not leak state into each other."""
+    from app.services.core.api import (  # noqa: PLC0415
+        counselor_directory,
+        routing_cache,
+        routing_index,
+    )
+    from app.services.taccount.api import session_sagas  # noqa: PLC0415
+    from app.telegram.handlers.callbacks import session_jobs  # noqa: PLC0415
+    from app.telegram.handlers.relay import (  # noqa: PLC0415
+        album_buffer,
+        message_map,
+        relay_coalescer,
+        relay_outbox,
+    )
+    from app.telegram.webhook import update_deduplicator, update_filter  # noqa: PLC0415
+
+    routing_cache.clear()
+    routing_index.clear()
+    counselor_directory.clear()
+    session_jobs.clear()
+    session_sagas.clear()
+    update_deduplicator.clear()
+    update_filter.clear()
+    album_buffer.clear()
+    message_map.clear()
+    relay_coalescer.clear()
+    relay_outbox.clear()
+    yield
+    routing_cache.clear()
+    routing_index.clear()
+    counselor_directory.clear()
+    session_jobs.clear()
+    session_sagas.clear()
+    update_deduplicator.clear()
+    update_filter.clear()
+    album_buffer.clear()
+    message_map.clear()
+    relay_coalescer.clear()
+    relay_outbox.clear()
+
+
+@pytest.fixture
+async def fake_core_api():
+    """Route Core API calls to an in-process fake with 200 paired groups."""
+    from tests.fake_core_api import FakeCoreApi  # noqa: PLC0415
+
+    fake = FakeCoreApi({-100000 - i: (-200000 - i, f"alias-{i}") for i in range(200)})
+    client = fake.client()
+    with patch("app.services.core.api.auth_client", client):
+        yield fake
+    await client.aclose()
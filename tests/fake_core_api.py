@@ -0,0 +1,53 @@
+"""In-process fake of the Core API routing endpoints, served through httpx.MockTransport."""
+
+import asyncio
+import json
+
+import httpx
+
+
+class FakeCoreApi:
+    def __init__(self, routes: dict[int, tuple[int, str]], latency: float = 0.0):
+        self.routes = routes
+        self.latency = latency
+        self.requests: list[httpx.Request] = []
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+    def count(self, path: str) -> int:
+        return sum(1 for request in self.requests if request.url.path == path)
+
+    def _route(self, group_id: int) -> dict:
+        target_group_id, display_name = self.routes[group_id]
+        return {"target_group_id": target_group_id, "display_name": display_name}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(self.latency)
+        body = json.loads(request.content or b"{}")
+
+        if request.url.path == "/groups/resolve":
+            if body["group_id"] not in self.routes:
+                return httpx.Response(404, json={"detail": "Group not found"})
+            return httpx.Response(200, json=self._route(body["group_id"]))
+
+        if request.url.path == "/groups/resolve/bulk":
+            groups = [
+                {"group_id": group_id, **self._route(group_id)}
+                for group_id in body["group_ids"]
+                if group_id in self.routes
+            ]
+            return httpx.Response(200, json={"groups": groups})
+
+        if request.url.path == "/groups/routes":
+            group_ids = sorted(self.routes)
+            start = int(request.url.params.get("cursor", "0"))
+            end = start + int(request.url.params["limit"])
+            groups = [
+                {"group_id": group_id, **self._route(group_id)} for group_id in group_ids[start:end]
+            ]
+            next_cursor = str(end) if end < len(group_ids) else None
+            return httpx.Response(200, json={"groups": groups, "next_cursor": next_cursor})
+
+        return httpx.Response(404, json={"detail": "Not found"})
@@ -1,5 +1,8 @@
 """Tests for app.services.core.api module."""
 
+import asyncio
+import json
+from dataclasses import replace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
@@ -7,12 +10,15 @@ import pytest
 
 from app.config import settings
 from app.services.core.api import (
+    JSON_HEADERS,
+    counselor_directory,
     create_group,
     create_or_get_alias,
     get_counselor,
     get_counselors,
     get_group_link,
     resolve_group,
+    routing_cache,
 )
 from app.services.core.model import (
     AliasRequest,
@@ -37,9 +43,8 @@ async def test_create_or_get_alias_success():
         patch("app.services.core.api.get_hash") as mock_get_hash,
     ):
         # 1. Setup the response mock
-        # Note: .json() is a regular function on the response, not awaited
         mock_response = MagicMock()
-        mock_response.json.return_value = mock_response_data
+        mock_response.content = json.dumps(mock_response_data).encode()
         mock_response.raise_for_status = MagicMock()
 
         # 2. Configure our mocks
@@ -54,7 +59,9 @@ async def test_create_or_get_alias_success():
 
         # Ensure the post call used the correct URL and the hashed data
         expected_data = AliasRequest(telegram_user_id=hashed_id).model_dump_json()
-        mock_post.assert_called_once_with(f"{settings.core_api_base}/aliases", data=expected_data)
+        mock_post.assert_called_once_with(
+            f"{settings.core_api_base}/aliases", content=expected_data, headers=JSON_HEADERS
+        )
 
         assert result == "test_alias_123"
         mock_response.raise_for_status.assert_called_once()
@@ -97,7 +104,7 @@ async def test_get_counselors_success():
     with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
         # Configure the response mock
         mock_response = MagicMock()
-        mock_response.json.return_value = mock_response_data
+        mock_response.content = json.dumps(mock_response_data).encode()
         mock_response.raise_for_status = MagicMock()
 
         # Link the mock response to the GET call
@@ -126,7 +133,7 @@ async def test_get_counselor_success():
 
     with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
         mock_response = MagicMock()
-        mock_response.json.return_value = mock_data
+        mock_response.content = json.dumps(mock_data).encode()
         mock_get.return_value = mock_response
 
         result = await get_counselor(c_id)
@@ -147,7 +154,7 @@ async def test_get_group_link_success():
         patch("app.services.core.api.get_hash", return_value=hashed_user),
     ):
         mock_response = MagicMock()
-        mock_response.json.return_value = {"group_link": mock_link}
+        mock_response.content = json.dumps({"group_link": mock_link}).encode()
         mock_post.return_value = mock_response
 
         result = await get_group_link(t_id, c_id)
@@ -158,7 +165,7 @@ async def test_get_group_link_success():
         ).model_dump_json()
 
         mock_post.assert_called_once_with(
-            f"{settings.core_api_base}/groups/link", data=expected_payload
+            f"{settings.core_api_base}/groups/link", content=expected_payload, headers=JSON_HEADERS
         )
         assert result == mock_link
 
@@ -179,7 +186,7 @@ async def test_get_group_link_without_link():
     ):
         # Configure response mock
         mock_response = MagicMock()
-        mock_response.json.return_value = mock_response_data
+        mock_response.content = json.dumps(mock_response_data).encode()
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -192,7 +199,7 @@ async def test_get_group_link_without_link():
         ).model_dump_json()
 
         mock_post.assert_called_once_with(
-            f"{settings.core_api_base}/groups/link", data=expected_payload
+            f"{settings.core_api_base}/groups/link", content=expected_payload, headers=JSON_HEADERS
         )
         assert result is None
 
@@ -205,14 +212,14 @@ async def test_resolve_group_success():
 
     with patch("app.services.core.api.auth_client.post", new_callable=AsyncMock) as mock_post:
         mock_response = MagicMock()
-        mock_response.json.return_value = mock_data
+        mock_response.content = json.dumps(mock_data).encode()
         mock_post.return_value = mock_response
 
         result = await resolve_group(g_id)
 
         expected_data = ResolveGroupRequest(group_id=g_id).model_dump_json()
         mock_post.assert_called_once_with(
-            f"{settings.core_api_base}/groups/resolve", data=expected_data
+            f"{settings.core_api_base}/groups/resolve", content=expected_data, headers=JSON_HEADERS
         )
         assert isinstance(result, ResolveGroupResponse)
         assert result.target_group_id == t_id
@@ -295,3 +302,145 @@ async def test_create_group_success():
         call_args = mock_post.call_args
         assert call_args[0][0] == f"{settings.core_api_base}/groups"
         mock_response.raise_for_status.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_resolve_group_uses_routing_cache():
+    """Test that a second resolve for the same group is served from the routing cache."""
+    g_id = 777
+    mock_data = {"target_group_id": 999, "display_name": "Dr. John"}
+
+    with patch("app.services.core.api.auth_client.post", new_callable=AsyncMock) as mock_post:
+        mock_response = MagicMock()
+        mock_response.content = json.dumps(mock_data).encode()
+        mock_post.return_value = mock_response
+
+        first = await resolve_group(g_id)
+        second = await resolve_group(g_id)
+
+        mock_post.assert_called_once()
+        assert first == second
+        assert routing_cache.stats()["hits"] == 1
+        assert routing_cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_create_group_seeds_routing_cache_both_directions():
+    """Test that a successful create_group pre-seeds routing for both groups."""
+    with patch("app.services.core.api.auth_client.post", new_callable=AsyncMock) as mock_post:
+        mock_post.return_value = MagicMock()
+
+        await create_group("anon123", "https://t.me/link", 111, 5, 333, counselor_name="Dr. Joe")
+        user_routing = await resolve_group(-100111)
+        counselor_routing = await resolve_group(-100333)
+
+        mock_post.assert_called_once()
+        assert user_routing == ResolveGroupResponse(target_group_id=-100333, display_name="anon123")
+        assert counselor_routing == ResolveGroupResponse(
+            target_group_id=-100111, display_name="Dr. Joe"
+        )
+
+
+@pytest.mark.asyncio
+async def test_create_group_failure_does_not_seed_routing_cache():
+    """Test that routing is not cached when the Core API rejects the group."""
+    mock_response = MagicMock(spec=httpx.Response)
+    mock_response.status_code = 500
+    mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
+        message="Internal Server Error",
+        request=MagicMock(spec=httpx.Request),
+        response=mock_response,
+    )
+
+    with patch("app.services.core.api.auth_client.post", new_callable=AsyncMock) as mock_post:
+        mock_post.return_value = mock_response
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await create_group(
+                "anon123", "https://t.me/link", 111, 5, 333, counselor_name="Dr. Joe"
+            )
+
+        assert len(routing_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_counselors_served_from_directory_cache():
+    """Test that repeated directory reads only hit the Core API once."""
+    with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = json.dumps([{"id": 1, "name": "John Doe"}]).encode()
+        mock_get.return_value = mock_response
+
+        first = await get_counselors()
+        second = await get_counselors()
+
+        mock_get.assert_called_once()
+        assert first == second == [CounselorInfo(id=1, name="John Doe")]
+
+
+@pytest.mark.asyncio
+async def test_get_counselors_fills_profiles_from_full_listing():
+    """Test that a listing with full records lets get_counselor skip the network."""
+    row = {"id": 1, "name": "Dr. Smith", "bio": "Psychology", "telegram_user_id": 123123}
+
+    with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = json.dumps([row]).encode()
+        mock_get.return_value = mock_response
+
+        await get_counselors()
+        counselor = await get_counselor(1)
+
+        mock_get.assert_called_once_with(f"{settings.core_api_base}/counselors")
+        assert counselor == CounselorResponse(**row)
+
+
+@pytest.mark.asyncio
+async def test_get_counselors_fills_profiles_per_record():
+    """Test that records without a full profile do not stop the others from being cached."""
+    full = {"id": 1, "name": "Dr. Smith", "bio": "Psychology", "telegram_user_id": 123123}
+    partial = {"id": 2, "name": "Dr. Jones", "bio": "Family therapy"}
+
+    with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
+        mock_response = MagicMock()
+        mock_response.content = json.dumps([full, partial]).encode()
+        mock_get.return_value = mock_response
+
+        counselors = await get_counselors()
+        counselor = await get_counselor(1)
+
+        mock_get.assert_called_once_with(f"{settings.core_api_base}/counselors")
+        assert counselors == [
+            CounselorInfo(id=1, name="Dr. Smith"),
+            CounselorInfo(id=2, name="Dr. Jones"),
+        ]
+        assert counselor == CounselorResponse(**full)
+
+
+@pytest.mark.asyncio
+async def test_get_counselors_revalidates_with_conditional_request():
+    """Test that a stale directory is revalidated with its ETag and kept on 304."""
+    ok_response = MagicMock()
+    ok_response.headers = httpx.Headers({"ETag": '"v1"'})
+    ok_response.content = json.dumps([{"id": 1, "name": "John Doe"}]).encode()
+
+    not_modified = MagicMock()
+    not_modified.status_code = 304
+
+    with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
+        mock_get.side_effect = [ok_response, not_modified]
+
+        await get_counselors()
+        entry = counselor_directory._entries["counselors"]
+        counselor_directory._entries["counselors"] = replace(
+            entry, stored_at=entry.stored_at - settings.counselor_cache_ttl - 1
+        )
+
+        result = await get_counselors()
+        await asyncio.gather(*counselor_directory._revalidating.values())
+
+        assert result == [CounselorInfo(id=1, name="John Doe")]
+        mock_get.assert_called_with(
+            f"{settings.core_api_base}/counselors", headers={"If-None-Match": '"v1"'}
+        )
+        assert counselor_directory._entries["counselors"].stored_at > entry.stored_at
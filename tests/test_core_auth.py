@@ -1,10 +1,15 @@
 """Tests for app.services.core.auth module."""
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import base64
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
-from app.services.core.auth import BearerAuthWithRefresh
+from app.services.core.auth import BearerAuthWithRefresh, _jwt_expires_in
 from app.services.core.model import LoginRequest
 
 
@@ -46,193 +51,161 @@ class TestBearerAuthWithRefreshInit:
         assert auth.max_retries == 3  # noqa: PLR2004
 
 
-class TestSyncGetToken:
-    """Tests for sync_get_token method."""
+class TestSyncAuthFlow:
+    """Tests for the sync auth path."""
 
-    def test_sync_get_token_success(self, auth_instance):
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"access_token": "new_token_123"}
-
-        with patch("app.services.core.auth.httpx.Client") as mock_client_class:
-            mock_client = MagicMock()
-            mock_client.__enter__.return_value = mock_client
-            mock_client.__exit__.return_value = None
-            mock_client.post.return_value = mock_response
-            mock_client_class.return_value = mock_client
-
-            result = auth_instance.sync_get_token()
-
-            assert result == "new_token_123"
-            mock_client.post.assert_called_once_with(
-                auth_instance.token_url,
-                data=auth_instance.client_credentials.model_dump_json(),
-            )
+    def test_sync_auth_flow_is_not_supported(self, auth_instance):
+        with pytest.raises(RuntimeError, match="AsyncClient"):
+            next(auth_instance.sync_auth_flow(MagicMock()))
 
 
-class TestAuthFlow:
-    """Tests for sync auth_flow generator."""
+class TestAsyncAuthFlow:
+    """Tests for async_auth_flow method."""
 
-    def test_auth_flow_sets_token_on_first_request(self, auth_instance):
+    @pytest.mark.asyncio
+    async def test_async_auth_flow_sets_token_on_first_request(self, auth_instance):
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        with patch.object(auth_instance, "sync_get_token", return_value="initial_token"):
-            gen = auth_instance.auth_flow(mock_request)
+        with patch.object(
+            auth_instance, "_async_get_new_token", return_value="async_initial_token"
+        ):
+            gen = auth_instance.async_auth_flow(mock_request)
 
-            # First yield sends the request
-            yielded_request = next(gen)
+            yielded_request = await gen.asend(None)
 
             assert yielded_request is mock_request
-            assert mock_request.headers["Authorization"] == "Bearer initial_token"
-            assert auth_instance._token == "initial_token"
+            assert mock_request.headers["Authorization"] == "Bearer async_initial_token"
+            assert auth_instance._token == "async_initial_token"
 
-    def test_auth_flow_uses_existing_token(self, auth_instance):
-        auth_instance._token = "existing_token"
+    @pytest.mark.asyncio
+    async def test_async_auth_flow_uses_existing_token(self, auth_instance):
+        auth_instance._token = "existing_async_token"
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        with patch.object(auth_instance, "sync_get_token") as mock_get_token:
-            gen = auth_instance.auth_flow(mock_request)
-            next(gen)
+        with patch.object(auth_instance, "_async_get_new_token") as mock_get_token:
+            gen = auth_instance.async_auth_flow(mock_request)
+            await gen.asend(None)
 
             mock_get_token.assert_not_called()
-            assert mock_request.headers["Authorization"] == "Bearer existing_token"
+            assert mock_request.headers["Authorization"] == "Bearer existing_async_token"
 
-    def test_auth_flow_retries_on_401(self, auth_instance):
+    @pytest.mark.asyncio
+    async def test_async_auth_flow_retries_on_401(self, auth_instance):
         mock_request = MagicMock()
         mock_request.headers = {}
 
         mock_response_401 = MagicMock()
         mock_response_401.status_code = 401
 
-        mock_response_200 = MagicMock()
-        mock_response_200.status_code = 200
-
-        with patch.object(auth_instance, "sync_get_token", side_effect=["token1", "token2"]):
-            gen = auth_instance.auth_flow(mock_request)
+        with patch.object(auth_instance, "_async_get_new_token", side_effect=["token1", "token2"]):
+            gen = auth_instance.async_auth_flow(mock_request)
 
-            # First request
-            next(gen)
+            await gen.asend(None)
             assert mock_request.headers["Authorization"] == "Bearer token1"
 
-            # Send 401 response, should retry
-            gen.send(mock_response_401)
-            assert mock_request.headers["Authorization"] == "Bearer token2"
-
-    def test_auth_flow_retries_on_403(self, auth_instance):
-        mock_request = MagicMock()
-        mock_request.headers = {}
-
-        mock_response_403 = MagicMock()
-        mock_response_403.status_code = 403
-
-        with patch.object(auth_instance, "sync_get_token", side_effect=["token1", "token2"]):
-            gen = auth_instance.auth_flow(mock_request)
-            next(gen)
-
-            gen.send(mock_response_403)
+            await gen.asend(mock_response_401)
             assert mock_request.headers["Authorization"] == "Bearer token2"
 
-    def test_auth_flow_stops_after_max_retries(self, auth_instance):
-        auth_instance.max_retries = 2
+    @pytest.mark.asyncio
+    async def test_async_auth_flow_does_not_retry_on_404(self, auth_instance):
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        mock_response_401 = MagicMock()
-        mock_response_401.status_code = 401
+        mock_response_404 = MagicMock()
+        mock_response_404.status_code = 404
 
-        with patch.object(auth_instance, "sync_get_token", side_effect=["t1", "t2", "t3", "t4"]):
-            gen = auth_instance.auth_flow(mock_request)
-            next(gen)  # Initial request
+        with patch.object(
+            auth_instance, "_async_get_new_token", side_effect=["token1", "token2"]
+        ) as mock_get_token:
+            gen = auth_instance.async_auth_flow(mock_request)
+            await gen.asend(None)
 
-            # First retry
-            gen.send(mock_response_401)
-            # Second retry
-            gen.send(mock_response_401)
+            with pytest.raises(StopAsyncIteration):
+                await gen.asend(mock_response_404)
 
-            # Third attempt should stop (max_retries=2 exceeded)
-            with pytest.raises(StopIteration):
-                gen.send(mock_response_401)
+            mock_get_token.assert_awaited_once()
 
-    def test_auth_flow_no_retry_on_success(self, auth_instance):
+    @pytest.mark.asyncio
+    async def test_async_auth_flow_backs_off_on_retryable_status(self, auth_instance):
+        auth_instance._token = "token1"
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        mock_response_200 = MagicMock()
-        mock_response_200.status_code = 200
-
-        with patch.object(auth_instance, "sync_get_token", return_value="token1"):
-            gen = auth_instance.auth_flow(mock_request)
-            next(gen)
+        mock_response_503 = MagicMock()
+        mock_response_503.status_code = 503
+        mock_response_503.headers = {}
 
-            # Send success response, generator should complete
-            with pytest.raises(StopIteration):
-                gen.send(mock_response_200)
+        with patch("app.services.core.auth.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            gen = auth_instance.async_auth_flow(mock_request)
+            await gen.asend(None)
 
+            retried = await gen.asend(mock_response_503)
 
-class TestAsyncAuthFlow:
-    """Tests for async_sync_auth_flow method."""
+            assert retried is mock_request
+            mock_sleep.assert_awaited_once()
+            assert mock_request.headers["Authorization"] == "Bearer token1"
+            assert auth_instance.retries["status_503"] == 1
 
     @pytest.mark.asyncio
-    async def test_async_auth_flow_sets_token_on_first_request(self, auth_instance):
+    async def test_async_auth_flow_honors_retry_after(self, auth_instance):
+        auth_instance._token = "token1"
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        with patch.object(
-            auth_instance, "_async_get_new_token", return_value="async_initial_token"
-        ):
-            gen = auth_instance.async_sync_auth_flow(mock_request)
-
-            yielded_request = await gen.asend(None)
+        mock_response_429 = MagicMock()
+        mock_response_429.status_code = 429
+        mock_response_429.headers = {"Retry-After": "1"}
 
-            assert yielded_request is mock_request
-            assert mock_request.headers["Authorization"] == "Bearer async_initial_token"
-            assert auth_instance._token == "async_initial_token"
-
-    @pytest.mark.asyncio
-    async def test_async_auth_flow_uses_existing_token(self, auth_instance):
-        auth_instance._token = "existing_async_token"
-        mock_request = MagicMock()
-        mock_request.headers = {}
-
-        with patch.object(auth_instance, "_async_get_new_token") as mock_get_token:
-            gen = auth_instance.async_sync_auth_flow(mock_request)
+        with patch("app.services.core.auth.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            gen = auth_instance.async_auth_flow(mock_request)
             await gen.asend(None)
+            await gen.asend(mock_response_429)
 
-            mock_get_token.assert_not_called()
-            assert mock_request.headers["Authorization"] == "Bearer existing_async_token"
+            mock_sleep.assert_awaited_once_with(1.0)
 
     @pytest.mark.asyncio
-    async def test_async_auth_flow_retries_on_401(self, auth_instance):
+    async def test_async_auth_flow_gives_up_when_retry_after_is_too_long(self, auth_instance):
+        auth_instance._token = "token1"
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        mock_response_401 = MagicMock()
-        mock_response_401.status_code = 401
-
-        with patch.object(auth_instance, "_async_get_new_token", side_effect=["token1", "token2"]):
-            gen = auth_instance.async_sync_auth_flow(mock_request)
+        mock_response_429 = MagicMock()
+        mock_response_429.status_code = 429
+        mock_response_429.headers = {"Retry-After": "120"}
 
+        with patch("app.services.core.auth.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            gen = auth_instance.async_auth_flow(mock_request)
             await gen.asend(None)
-            assert mock_request.headers["Authorization"] == "Bearer token1"
 
-            await gen.asend(mock_response_401)
-            assert mock_request.headers["Authorization"] == "Bearer token2"
+            with pytest.raises(StopAsyncIteration):
+                await gen.asend(mock_response_429)
+
+            mock_sleep.assert_not_awaited()
+            assert auth_instance.retries["retry_after_too_long"] == 1
 
     @pytest.mark.asyncio
-    async def test_async_auth_flow_retries_on_404(self, auth_instance):
+    async def test_async_auth_flow_stops_when_retry_budget_is_spent(self, auth_instance):
+        auth_instance._token = "token1"
         mock_request = MagicMock()
         mock_request.headers = {}
 
-        mock_response_404 = MagicMock()
-        mock_response_404.status_code = 404
+        mock_response_502 = MagicMock()
+        mock_response_502.status_code = 502
+        mock_response_502.headers = {}
 
-        with patch.object(auth_instance, "_async_get_new_token", side_effect=["token1", "token2"]):
-            gen = auth_instance.async_sync_auth_flow(mock_request)
+        with patch("app.services.core.auth.asyncio.sleep", new_callable=AsyncMock):
+            gen = auth_instance.async_auth_flow(mock_request)
             await gen.asend(None)
+            await gen.asend(mock_response_502)  # Retry 1
+            await gen.asend(mock_response_502)  # Retry 2
 
-            await gen.asend(mock_response_404)
-            assert mock_request.headers["Authorization"] == "Bearer token2"
+            with pytest.raises(StopAsyncIteration):
+                await gen.asend(mock_response_502)
+
+            assert auth_instance.retries["status_502"] == 2  # noqa: PLR2004
+            assert auth_instance.retries["budget_exhausted"] == 1
 
     @pytest.mark.asyncio
     async def test_async_auth_flow_stops_after_max_retries(self, auth_instance):
@@ -246,7 +219,7 @@ class TestAsyncAuthFlow:
         with patch.object(
             auth_instance, "_async_get_new_token", side_effect=["t1", "t2", "t3", "t4"]
         ):
-            gen = auth_instance.async_sync_auth_flow(mock_request)
+            gen = auth_instance.async_auth_flow(mock_request)
             await gen.asend(None)  # Initial
 
             await gen.asend(mock_response_401)  # Retry 1
@@ -264,8 +237,157 @@ class TestAsyncAuthFlow:
         mock_response_200.status_code = 200
 
         with patch.object(auth_instance, "_async_get_new_token", return_value="token1"):
-            gen = auth_instance.async_sync_auth_flow(mock_request)
+            gen = auth_instance.async_auth_flow(mock_request)
             await gen.asend(None)
 
             with pytest.raises(StopAsyncIteration):
                 await gen.asend(mock_response_200)
+
+
+def make_jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+
+class TestGetToken:
+    """Tests for single-flight and proactive token refresh."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_refresh(self, auth_instance):
+        async def slow_login():
+            await asyncio.sleep(0.01)
+            return "shared_token"
+
+        with patch.object(
+            auth_instance, "_async_get_new_token", side_effect=slow_login
+        ) as mock_get_token:
+            tokens = await asyncio.gather(*(auth_instance.get_token() for _ in range(10)))
+
+        assert tokens == ["shared_token"] * 10
+        mock_get_token.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_rejected_token_is_refreshed_once(self, auth_instance):
+        auth_instance._token = "rejected"
+
+        with patch.object(
+            auth_instance, "_async_get_new_token", return_value="fresh"
+        ) as mock_get_token:
+            tokens = await asyncio.gather(
+                *(auth_instance.get_token(stale_token="rejected") for _ in range(5))
+            )
+
+        assert tokens == ["fresh"] * 5
+        mock_get_token.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_expired_token_is_refreshed_before_use(self, auth_instance):
+        auth_instance._token = "expired"
+        auth_instance._expires_at = time.monotonic() - 1
+
+        with patch.object(auth_instance, "_async_get_new_token", return_value="fresh"):
+            assert await auth_instance.get_token() == "fresh"
+
+    @pytest.mark.asyncio
+    async def test_token_near_expiry_is_refreshed_in_background(self, auth_instance):
+        auth_instance._token = "current"
+        auth_instance._expires_at = time.monotonic() + auth_instance.refresh_margin / 2
+
+        with patch.object(auth_instance, "_async_get_new_token", return_value="next"):
+            # The caller is not made to wait for the login
+            assert await auth_instance.get_token() == "current"
+            await auth_instance._background_refresh
+
+        assert auth_instance._token == "next"
+
+    @pytest.mark.asyncio
+    async def test_refresh_uses_jwt_exp_claim(self, auth_instance):
+        token = make_jwt({"exp": time.time() + 600})
+
+        with patch.object(auth_instance, "_async_get_new_token", return_value=token):
+            await auth_instance.get_token()
+
+        assert auth_instance._expires_at == pytest.approx(time.monotonic() + 600, abs=5)
+
+    @pytest.mark.asyncio
+    async def test_refresh_falls_back_to_configured_lifetime(self, credentials):
+        auth = BearerAuthWithRefresh(
+            token_url="https://api.test.com/token",
+            client_credentials=credentials,
+            token_lifetime=300,
+        )
+
+        with patch.object(auth, "_async_get_new_token", return_value="opaque-token"):
+            await auth.get_token()
+
+        assert auth._expires_at == pytest.approx(time.monotonic() + 300, abs=5)
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_failure_keeps_current_token(self, auth_instance):
+        auth_instance._token = "current"
+        auth_instance._expires_at = time.monotonic() + 1
+
+        with patch.object(
+            auth_instance, "_async_get_new_token", new_callable=AsyncMock
+        ) as mock_get_token:
+            mock_get_token.side_effect = Exception("login down")
+            assert await auth_instance.get_token() == "current"
+            await auth_instance._background_refresh
+
+        assert auth_instance._token == "current"
+
+
+def test_jwt_expires_in_handles_opaque_tokens():
+    assert _jwt_expires_in("not-a-jwt") is None
+    assert _jwt_expires_in(make_jwt({"sub": "svc"})) is None
+
+
+class TestTokenEndpoint:
+    """Tests for the token endpoint call."""
+
+    @pytest.mark.asyncio
+    async def test_login_reuses_shared_client_without_auth(self, auth_instance):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"access_token": "pooled_token"}).encode()
+        auth_instance.client = MagicMock()
+        auth_instance.client.post = AsyncMock(return_value=mock_response)
+
+        result = await auth_instance._async_get_new_token()
+
+        assert result == "pooled_token"
+        auth_instance.client.post.assert_awaited_once_with(
+            auth_instance.token_url,
+            content=auth_instance.client_credentials.model_dump_json(),
+            headers={"Content-Type": "application/json"},
+            auth=None,
+        )
+
+    @pytest.mark.asyncio
+    async def test_shared_client_refreshes_token_through_same_pool(self, auth_instance):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.path == "/token":
+                return httpx.Response(200, json={"access_token": "pooled_token"})
+            return httpx.Response(200, json={"ok": True})
+
+        client = httpx.AsyncClient(auth=auth_instance, transport=httpx.MockTransport(handler))
+        auth_instance.client = client
+
+        async with client:
+            response = await client.get("https://api.test.com/counselors")
+
+        assert response.status_code == 200  # noqa: PLR2004
+        assert [r.url.path for r in requests] == ["/token", "/counselors"]
+        assert "Authorization" not in requests[0].headers
+        assert requests[1].headers["Authorization"] == "Bearer pooled_token"
+
+
+def test_auth_client_is_tuned_from_settings():
+    from app.services.core.auth import _auth, auth_client  # noqa: PLC0415
+
+    assert _auth.client is auth_client
+    assert auth_client.timeout.connect == 5  # noqa: PLR2004
+    assert auth_client.timeout.read == 10  # noqa: PLR2004
@@ -0,0 +1,101 @@
+"""Tests for app.services.core.batch module and batched resolve_group."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import HTTPStatusError
+
+from app.services.core.api import resolve_batcher, resolve_group
+from app.services.core.batch import MicroBatcher
+from app.services.core.model import ResolveGroupResponse
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_groups_lookups_within_window():
+    """Test that lookups in the same window are resolved by one bulk call."""
+    resolve_many = AsyncMock(side_effect=lambda keys: {key: key * 10 for key in keys})
+    batcher = MicroBatcher(resolve_many, window=0.01, max_size=100)
+
+    results = await asyncio.gather(*(batcher.submit(key) for key in (1, 2, 3, 2)))
+
+    assert results == [10, 20, 30, 20]
+    resolve_many.assert_awaited_once_with([1, 2, 3])
+    assert batcher.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_when_size_cap_is_reached():
+    """Test that a full batch is sent without waiting for the window."""
+    resolve_many = AsyncMock(side_effect=lambda keys: {key: key for key in keys})
+    batcher = MicroBatcher(resolve_many, window=60, max_size=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.submit(1), batcher.submit(2)), timeout=1
+    )
+
+    assert results == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_reports_missing_keys():
+    """Test that keys missing from the bulk result fail with LookupError."""
+    batcher = MicroBatcher(AsyncMock(return_value={1: "one"}), window=0.001, max_size=10)
+
+    found, missing = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+
+    assert found == "one"
+    assert isinstance(missing, LookupError)
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_bulk_failure():
+    """Test that a failed bulk call fails every waiter in the batch."""
+    batcher = MicroBatcher(AsyncMock(side_effect=ValueError("boom")), window=0.001, max_size=10)
+
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batched_resolve_group_uses_bulk_endpoint(fake_core_api):
+    """Test that concurrent resolves are answered by a single bulk request."""
+    with patch("app.services.core.api.settings.core_api_resolve_batching", True):
+        routes = await asyncio.gather(*(resolve_group(-100000 - i) for i in range(50)))
+
+    assert routes[7] == ResolveGroupResponse(target_group_id=-200007, display_name="alias-7")
+    assert fake_core_api.count("/groups/resolve/bulk") == 1
+    assert fake_core_api.count("/groups/resolve") == 0
+
+
+@pytest.mark.asyncio
+async def test_batched_resolve_group_raises_for_unpaired_group(fake_core_api):  # noqa: ARG001
+    """Test that an unknown group fails only its own waiter, with the unbatched 404 error."""
+    with patch("app.services.core.api.settings.core_api_resolve_batching", True):
+        known, unknown = await asyncio.gather(
+            resolve_group(-100001), resolve_group(-999), return_exceptions=True
+        )
+    with pytest.raises(HTTPStatusError) as unbatched:
+        await resolve_group(-998)
+
+    assert known.target_group_id == -200001  # noqa: PLR2004
+    assert isinstance(unknown, HTTPStatusError)
+    assert unknown.response.status_code == unbatched.value.response.status_code == 404  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_batching_reduces_round_trips_under_load(fake_core_api):
+    """Test that 100 concurrent lookups take one bulk request instead of 100."""
+    fake_core_api.latency = 0.02
+    group_ids = [-100000 - i for i in range(200)]
+
+    await asyncio.gather(*(resolve_group(group_id) for group_id in group_ids[:100]))
+    with patch("app.services.core.api.settings.core_api_resolve_batching", True):
+        await asyncio.gather(*(resolve_group(group_id) for group_id in group_ids[100:]))
+
+    assert fake_core_api.count("/groups/resolve") == 100  # noqa: PLR2004
+    assert fake_core_api.count("/groups/resolve/bulk") == 1
+    assert resolve_batcher.stats()["largest_batch"] == 100  # noqa: PLR2004
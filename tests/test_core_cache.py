@@ -0,0 +1,129 @@
+"""Tests for app.services.core.cache module."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.core.cache import CacheEntry, StaleWhileRevalidateCache, TTLCache
+
+
+def test_ttl_cache_hit_and_miss():
+    """Test that the cache counts hits and misses."""
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 1, "maxsize": 10, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_ttl_cache_expires_entries():
+    """Test that entries older than the TTL are evicted on read."""
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    with patch("app.services.core.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+    with patch("app.services.core.cache.time.monotonic", return_value=1061.0):
+        assert cache.get("a") is None
+
+    assert len(cache) == 0
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the cache stays within maxsize by evicting the LRU entry."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3  # noqa: PLR2004
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_disabled_with_zero_size():
+    """Test that a zero-sized cache never stores anything."""
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_loads_on_miss_and_serves_fresh_hits():
+    """Test that a fresh entry is served without calling the loader again."""
+    cache = StaleWhileRevalidateCache(fresh_ttl=60, max_stale=600)
+    load = AsyncMock(return_value=CacheEntry("v1"))
+
+    assert await cache.get("k", load) == "v1"
+    assert await cache.get("k", load) == "v1"
+
+    load.assert_awaited_once_with(None)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_serves_stale_and_revalidates_in_background():
+    """Test that a stale entry is returned immediately while it is refreshed."""
+    cache = StaleWhileRevalidateCache(fresh_ttl=60, max_stale=600)
+    stale = CacheEntry("old", stored_at=time.monotonic() - 120)
+    cache._entries["k"] = stale
+    load = AsyncMock(return_value=CacheEntry("new"))
+
+    assert await cache.get("k", load) == "old"
+    await asyncio.gather(*cache._revalidating.values())
+
+    load.assert_awaited_once_with(stale)
+    assert await cache.get("k", load) == "new"
+    assert cache.stats()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_revalidates_each_key_once_at_a_time():
+    """Test that concurrent stale reads share one background revalidation."""
+    cache = StaleWhileRevalidateCache(fresh_ttl=60, max_stale=600)
+    cache._entries["k"] = CacheEntry("old", stored_at=time.monotonic() - 120)
+    release = asyncio.Event()
+
+    async def load(_cached):
+        await release.wait()
+        return CacheEntry("new")
+
+    results = [await cache.get("k", load) for _ in range(3)]
+    assert results == ["old"] * 3
+    assert cache.stats()["revalidating"] == 1
+
+    release.set()
+    await asyncio.gather(*cache._revalidating.values())
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_keeps_stale_entry_when_revalidation_fails():
+    """Test that a failed background refresh keeps the stale entry."""
+    cache = StaleWhileRevalidateCache(fresh_ttl=60, max_stale=600)
+    cache._entries["k"] = CacheEntry("old", stored_at=time.monotonic() - 120)
+    load = AsyncMock(side_effect=Exception("core api down"))
+
+    assert await cache.get("k", load) == "old"
+    await asyncio.gather(*cache._revalidating.values())
+
+    assert cache._entries["k"].value == "old"
+    assert cache.stats()["revalidation_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_blocks_on_entries_past_max_stale():
+    """Test that entries older than the stale window are reloaded before returning."""
+    cache = StaleWhileRevalidateCache(fresh_ttl=60, max_stale=600)
+    cache._entries["k"] = CacheEntry("ancient", stored_at=time.monotonic() - 3600)
+    load = AsyncMock(return_value=CacheEntry("new"))
+
+    assert await cache.get("k", load) == "new"
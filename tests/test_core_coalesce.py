@@ -0,0 +1,110 @@
+"""Tests for app.services.core.coalesce module."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.config import settings
+from app.services.core.coalesce import RequestCoalescer
+
+
+@pytest.mark.asyncio
+async def test_coalescer_shares_one_call_between_concurrent_callers():
+    """Test that concurrent callers with the same key share a single call."""
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+
+    waiters = [asyncio.create_task(coalescer.run("key", call)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert coalescer.inflight()[0]["waiters"] == 5  # noqa: PLR2004
+
+    release.set()
+    assert await asyncio.gather(*waiters) == ["result"] * 5
+    assert calls == 1
+    assert coalescer.stats()["coalesced"] == 4  # noqa: PLR2004
+    assert coalescer.inflight() == []
+
+
+@pytest.mark.asyncio
+async def test_coalescer_does_not_share_finished_calls():
+    """Test that sequential callers each get a fresh call."""
+    coalescer = RequestCoalescer()
+    call = AsyncMock(return_value="result")
+
+    await coalescer.run("key", call)
+    await coalescer.run("key", call)
+
+    assert call.await_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_coalescer_propagates_errors_to_all_waiters():
+    """Test that a failed shared call fails every waiter."""
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(coalescer.run("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_survives_cancelled_waiter():
+    """Test that cancelling one waiter does not cancel the shared call."""
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(coalescer.run("key", call))
+    second = asyncio.create_task(coalescer.run("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "result"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_counselor_reads_share_one_http_call():
+    """Test that identical in-flight Core API reads are coalesced."""
+    from app.services.core.api import get_counselor, read_coalescer  # noqa: PLC0415
+
+    release = asyncio.Event()
+    mock_response = MagicMock()
+    mock_response.content = json.dumps(
+        {"id": 1, "name": "Dr. Smith", "bio": "Psychology", "telegram_user_id": 123123}
+    ).encode()
+
+    async def slow_get(*_args, **_kwargs):
+        await release.wait()
+        return mock_response
+
+    with patch("app.services.core.api.auth_client.get", new_callable=AsyncMock) as mock_get:
+        mock_get.side_effect = slow_get
+        readers = [asyncio.create_task(get_counselor(1)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*readers)
+
+    mock_get.assert_called_once_with(f"{settings.core_api_base}/counselors/1")
+    assert {result.id for result in results} == {1}
+    assert read_coalescer.stats()["coalesced"] >= 9  # noqa: PLR2004
@@ -0,0 +1,53 @@
+"""Tests for app.services.core.retry module."""
+
+import httpx
+import pytest
+
+from app.services.core.retry import DEFAULT_POLICY, Outcome, RetryPolicy, policy_for
+
+
+@pytest.mark.parametrize(
+    ("status_code", "outcome"),
+    [
+        (200, Outcome.SUCCESS),
+        (304, Outcome.SUCCESS),
+        (401, Outcome.AUTH),
+        (403, Outcome.AUTH),
+        (404, Outcome.TERMINAL),
+        (422, Outcome.TERMINAL),
+        (429, Outcome.RETRY),
+        (500, Outcome.TERMINAL),
+        (503, Outcome.RETRY),
+    ],
+)
+def test_default_policy_classifies_statuses(status_code, outcome):
+    assert DEFAULT_POLICY.classify(status_code) is outcome
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(backoff_base=0.1, backoff_max=0.5)
+
+    for attempt in range(10):
+        delay = policy.backoff(attempt)
+        assert 0 <= delay <= min(0.5, 0.1 * 2**attempt)
+
+
+def test_backoff_uses_retry_after_within_cap():
+    policy = RetryPolicy(backoff_max=2.0)
+
+    assert policy.backoff(0, retry_after=1.5) == 1.5  # noqa: PLR2004
+    assert policy.backoff(0, retry_after=30) is None
+
+
+def test_policy_for_group_creation_does_not_retry_server_errors():
+    request = httpx.Request("POST", "https://core.test.com/groups")
+
+    policy = policy_for(request)
+
+    assert policy.classify(502) is Outcome.TERMINAL
+    assert policy.classify(503) is Outcome.RETRY
+
+
+def test_policy_for_matches_counselor_reads():
+    assert policy_for(httpx.Request("GET", "https://core.test.com/counselors/12")).max_retries == 3  # noqa: PLR2004
+    assert policy_for(httpx.Request("POST", "https://core.test.com/groups/link")) is DEFAULT_POLICY
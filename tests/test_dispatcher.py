@@ -0,0 +1,125 @@
+"""Tests for app.telegram.dispatcher module."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.telegram.dispatcher import UpdateDispatcher
+
+
+def make_update(update_id, chat_id):
+    update = MagicMock()
+    update.update_id = update_id
+    update.effective_chat.id = chat_id
+    return update
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_processes_enqueued_updates():
+    """Test that enqueued updates are processed by the workers."""
+    process = AsyncMock()
+    dispatcher = UpdateDispatcher(process, workers=2, max_queue_size=10)
+    await dispatcher.start()
+
+    updates = [make_update(i, chat_id=i) for i in range(4)]
+    for update in updates:
+        await dispatcher.enqueue(update)
+    await dispatcher.stop()
+
+    assert process.await_count == 4  # noqa: PLR2004
+    stats = dispatcher.stats()
+    assert stats["enqueued"] == 4  # noqa: PLR2004
+    assert stats["processed"] == 4  # noqa: PLR2004
+    assert stats["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_keeps_per_chat_order():
+    """Test that updates from the same chat are processed in arrival order."""
+    processed = []
+
+    async def process(update):
+        # Earlier updates sleep longer, so any reordering would show up
+        await asyncio.sleep(0.001 * (5 - update.update_id))
+        processed.append((update.effective_chat.id, update.update_id))
+
+    dispatcher = UpdateDispatcher(process, workers=4, max_queue_size=40)
+    await dispatcher.start()
+    for update_id in range(5):
+        await dispatcher.enqueue(make_update(update_id, chat_id=-1001))
+        await dispatcher.enqueue(make_update(update_id, chat_id=-1002))
+    await dispatcher.stop()
+
+    for chat_id in (-1001, -1002):
+        assert [u for c, u in processed if c == chat_id] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_runs_different_chats_concurrently():
+    """Test that a slow chat does not block updates from another chat."""
+    release = asyncio.Event()
+    fast_done = asyncio.Event()
+
+    async def process(update):
+        if update.effective_chat.id == 0:
+            await release.wait()
+        else:
+            fast_done.set()
+
+    dispatcher = UpdateDispatcher(process, workers=2, max_queue_size=10)
+    await dispatcher.start()
+    await dispatcher.enqueue(make_update(1, chat_id=0))
+    await dispatcher.enqueue(make_update(2, chat_id=1))
+
+    await asyncio.wait_for(fast_done.wait(), timeout=1)
+    release.set()
+    await dispatcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_counts_failures_and_keeps_working():
+    """Test that a failing update is logged and does not stop the worker."""
+    process = AsyncMock(side_effect=[Exception("boom"), None])
+    dispatcher = UpdateDispatcher(process, workers=1, max_queue_size=10)
+    await dispatcher.start()
+    await dispatcher.enqueue(make_update(1, chat_id=1))
+    await dispatcher.enqueue(make_update(2, chat_id=1))
+    await dispatcher.stop()
+
+    stats = dispatcher.stats()
+    assert stats["failed"] == 1
+    assert stats["processed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_enqueue_requires_start():
+    """Test that enqueue fails when the workers are not running."""
+    dispatcher = UpdateDispatcher(AsyncMock())
+
+    with pytest.raises(RuntimeError, match="not running"):
+        await dispatcher.enqueue(make_update(1, chat_id=1))
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_stats_report_depth_and_wait():
+    """Test that queue depth and wait time are reported."""
+    release = asyncio.Event()
+
+    async def process(_update):
+        await release.wait()
+
+    dispatcher = UpdateDispatcher(process, workers=1, max_queue_size=10)
+    await dispatcher.start()
+    for update_id in range(3):
+        await dispatcher.enqueue(make_update(update_id, chat_id=7))
+    await asyncio.sleep(0.01)
+
+    stats = dispatcher.stats()
+    assert stats["queue_depth"] == 2  # noqa: PLR2004
+    assert stats["queue_capacity"] == 10  # noqa: PLR2004
+    assert stats["max_queue_depth"] >= 2  # noqa: PLR2004
+
+    release.set()
+    await dispatcher.stop()
+    assert dispatcher.stats()["max_wait_ms"] > 0
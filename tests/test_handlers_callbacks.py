@@ -1,12 +1,16 @@
 """Tests for app.telegram.handlers.callbacks module."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from app.services.core.model import CounselorInfo
 from app.services.taccount.model import CreateSessionResponse
-from app.telegram.handlers.callbacks import callbacks
+from app.services.taccount.scheduler import AccountBusyError
+from app.telegram.handlers.callbacks import callbacks, session_jobs
+from app.telegram.jobs import JobState
+from app.util.hash import get_hash
 
 
 @pytest.mark.asyncio
@@ -110,6 +114,7 @@ async def test_callbacks_start_session(mock_update):
         mock_create_session.return_value = mock_session
 
         await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
 
         mock_create_or_get_alias.assert_called_once_with(mock_update.callback_query.from_user.id)
 
@@ -119,11 +124,12 @@ async def test_callbacks_start_session(mock_update):
             mock_session.user_group_id,
             mock_counselor_id,
             mock_session.counselor_group_id,
+            counselor_name=mock_session.counselor_name,
         )
 
         # Verify message was edited
         call_args = mock_update.callback_query.message.edit_text.call_args
-        assert "Your counseling session is ready" in call_args[0][0]
+        assert "Your counseling session is ready" in call_args[1]["text"]
 
         # Check keyboard
         keyboard = call_args[1]["reply_markup"].inline_keyboard
@@ -175,8 +181,8 @@ async def test_callbacks_home(mock_update):
 
 
 @pytest.mark.asyncio
-async def test_callbacks_start_session_logs_and_reraises_on_create_group_error(mock_update):
-    """Test that start session callback logs and re-raises exceptions from create_group."""
+async def test_callbacks_start_session_logs_and_reports_create_group_error(mock_update):
+    """Test that a create_group failure is logged and shown to the user by the session job."""
     mock_counselor_id = 1
     mock_update.callback_query.data = f"start:{mock_counselor_id}"
 
@@ -201,9 +207,138 @@ async def test_callbacks_start_session_logs_and_reraises_on_create_group_error(m
         mock_create_session.return_value = mock_session
         mock_create_group.side_effect = Exception("Core API error")
 
-        with pytest.raises(Exception, match="Core API error"):
-            await callbacks(mock_update, MagicMock())
+        await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
 
         # Verify logger.exception was called
         mock_logger.exception.assert_called_once()
         assert "Error creating records" in mock_logger.exception.call_args[0][0]
+
+        job = session_jobs.get((get_hash("22222"), mock_counselor_id))
+        assert job.state == JobState.FAILED
+        call_args = mock_update.callback_query.message.edit_text.call_args
+        assert "could not prepare your session" in call_args[1]["text"]
+
+
+@pytest.mark.asyncio
+async def test_callbacks_start_session_reports_retry_delay_when_account_is_busy(mock_update):
+    """Test that a long FloodWait is shown to the user instead of failing the callback."""
+    mock_update.callback_query.data = "start:1"
+
+    with (
+        patch(
+            "app.telegram.handlers.callbacks.create_session", new_callable=AsyncMock
+        ) as mock_create_session,
+        patch(
+            "app.telegram.handlers.callbacks.create_group", new_callable=AsyncMock
+        ) as mock_create_group,
+    ):
+        mock_create_session.side_effect = AccountBusyError(seconds=120, queue_position=3)
+
+        await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
+
+        mock_create_group.assert_not_awaited()
+        call_args = mock_update.callback_query.message.edit_text.call_args
+        assert "try again in about 120 seconds" in call_args[1]["text"]
+        keyboard = call_args[1]["reply_markup"].inline_keyboard
+        assert keyboard[0][0].callback_data == "start:1"
+
+
+@pytest.mark.asyncio
+async def test_callbacks_start_session_shows_progress_and_attaches_duplicate_taps(mock_update):
+    """Test that the callback returns at once and a second tap joins the running job."""
+    mock_update.callback_query.data = "start:1"
+    release = asyncio.Event()
+    mock_session = CreateSessionResponse(
+        user_group_id=222, counselor_group_id=333, user_group_link="user_group_link"
+    )
+
+    async def slow_create_session(*_args):
+        await release.wait()
+        return mock_session
+
+    with (
+        patch(
+            "app.telegram.handlers.callbacks.create_session", side_effect=slow_create_session
+        ) as mock_create_session,
+        patch("app.telegram.handlers.callbacks.create_or_get_alias", new_callable=AsyncMock),
+        patch("app.telegram.handlers.callbacks.create_group", new_callable=AsyncMock),
+    ):
+        await callbacks(mock_update, MagicMock())
+        await callbacks(mock_update, MagicMock())
+
+        edit_text = mock_update.callback_query.message.edit_text
+        assert edit_text.call_args[0][0] == "Preparing your session…"
+        job = session_jobs.get((get_hash("22222"), 1))
+        assert job.state == JobState.RUNNING
+        assert job.attached == 1
+
+        release.set()
+        await session_jobs.stop()
+
+    mock_create_session.assert_called_once()
+    assert job.state == JobState.SUCCEEDED
+    assert "Your counseling session is ready" in edit_text.call_args[1]["text"]
+
+
+@pytest.mark.asyncio
+async def test_callbacks_start_session_retry_resumes_without_recreating_groups(mock_update):
+    """Test that retrying after a Core API failure only records the existing groups."""
+    mock_update.callback_query.data = "start:1"
+    mock_session = CreateSessionResponse(
+        user_group_id=222, counselor_group_id=333, user_group_link="user_group_link"
+    )
+
+    with (
+        patch(
+            "app.telegram.handlers.callbacks.create_session", new_callable=AsyncMock
+        ) as mock_create_session,
+        patch("app.telegram.handlers.callbacks.create_or_get_alias", new_callable=AsyncMock),
+        patch(
+            "app.telegram.handlers.callbacks.create_group", new_callable=AsyncMock
+        ) as mock_create_group,
+    ):
+        mock_create_session.return_value = mock_session
+        mock_create_group.side_effect = [Exception("Core API error"), None]
+
+        await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
+        await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
+
+    mock_create_session.assert_awaited_once()
+    assert mock_create_group.await_count == 2  # noqa: PLR2004
+    call_args = mock_update.callback_query.message.edit_text.call_args
+    assert "Your counseling session is ready" in call_args[1]["text"]
+
+
+@pytest.mark.asyncio
+async def test_callbacks_start_session_replaces_recorded_session_closed_in_core(mock_update):
+    """Test that a recorded session the Core API no longer links to is created again."""
+    mock_update.callback_query.data = "start:1"
+    mock_session = CreateSessionResponse(
+        user_group_id=222, counselor_group_id=333, user_group_link="user_group_link"
+    )
+
+    with (
+        patch(
+            "app.telegram.handlers.callbacks.create_session", new_callable=AsyncMock
+        ) as mock_create_session,
+        patch("app.telegram.handlers.callbacks.create_or_get_alias", new_callable=AsyncMock),
+        patch("app.telegram.handlers.callbacks.create_group", new_callable=AsyncMock),
+        patch(
+            "app.telegram.handlers.callbacks.get_group_link", new_callable=AsyncMock
+        ) as mock_get_group_link,
+    ):
+        mock_create_session.return_value = mock_session
+        mock_get_group_link.return_value = None
+
+        await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
+        session_jobs.clear()
+        await callbacks(mock_update, MagicMock())
+        await session_jobs.stop()
+
+    assert mock_create_session.await_count == 2  # noqa: PLR2004
+    mock_get_group_link.assert_awaited_once()
@@ -1,10 +1,43 @@
 """Tests for app.telegram.handlers.relay module."""
 
+import datetime as dt
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from telegram import Chat, Location, Message, MessageId, PhotoSize
 
-from app.telegram.handlers.relay import relay
+from app.telegram.handlers.relay import (
+    album_buffer,
+    header,
+    message_map,
+    relay,
+    relay_edit,
+    relay_outbox,
+)
+from app.telegram.outbox import OutboxLog
+
+SOURCE_CHAT = Chat(id=12345, type=Chat.SUPERGROUP)
+
+
+def media_message(message_id: int = 1, **kwargs) -> Message:
+    return Message(message_id=message_id, date=dt.datetime.now(dt.UTC), chat=SOURCE_CHAT, **kwargs)
+
+
+def photo(file_id: str = "photo") -> tuple[PhotoSize, ...]:
+    return (PhotoSize(file_id=file_id, file_unique_id=file_id, width=1, height=1),)
+
+
+@pytest.fixture
+def routing():
+    mock_routing = MagicMock()
+    mock_routing.target_group_id = 67890
+    mock_routing.display_name = "Test User"
+    with patch(
+        "app.telegram.handlers.relay.resolve_group",
+        new_callable=AsyncMock,
+        return_value=mock_routing,
+    ):
+        yield mock_routing
 
 
 @pytest.mark.asyncio
@@ -12,6 +45,9 @@ async def test_relay_with_text_message(mock_update, mock_context):
     """Test relay handler with text message."""
     mock_update.message.text = "Test message"
     mock_update.message.chat.id = 12345
+    mock_update.message.message_id = 1
+    mock_update.message.media_group_id = None
+    mock_update.message.reply_to_message = None
 
     mock_routing = MagicMock()
     mock_routing.target_group_id = 67890
@@ -22,6 +58,7 @@ async def test_relay_with_text_message(mock_update, mock_context):
         patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot,
     ):
         mock_resolve.return_value = mock_routing
+        mock_bot.send_message.return_value = MagicMock(message_id=555)
 
         await relay(mock_update, mock_context)
 
@@ -33,6 +70,7 @@ async def test_relay_with_text_message(mock_update, mock_context):
             chat_id=mock_routing.target_group_id,
             text=f"*From: {mock_routing.display_name}*\n\n{mock_update.message.text}",
             parse_mode="Markdown",
+            reply_parameters=None,
         )
 
 
@@ -51,8 +89,9 @@ async def test_relay_without_message(mock_update, mock_context):
 
 @pytest.mark.asyncio
 async def test_relay_without_text(mock_update, mock_context):
-    """Test relay handler when message has no text."""
+    """Test relay handler when message has neither text nor media."""
     mock_update.message.text = None
+    mock_update.message.effective_attachment = None
 
     with patch("app.telegram.handlers.relay.resolve_group", new_callable=AsyncMock) as mock_resolve:
         await relay(mock_update, mock_context)
@@ -66,6 +105,7 @@ async def test_relay_without_text(mock_update, mock_context):
 async def test_relay_empty_text(mock_update, mock_context):
     """Test relay handler with empty text."""
     mock_update.message.text = ""
+    mock_update.message.effective_attachment = None
 
     with patch("app.telegram.handlers.relay.resolve_group", new_callable=AsyncMock) as mock_resolve:
         await relay(mock_update, mock_context)
@@ -73,3 +113,152 @@ async def test_relay_empty_text(mock_update, mock_context):
         # Should return early (empty string is falsy)
         mock_resolve.assert_not_called()
         mock_context.bot.send_message.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_relay_photo_is_copied_with_caption_header(mock_update, mock_context, routing):
+    """Test that a photo is copied server-side with the sender header in its caption."""
+    mock_update.message = media_message(photo=photo(), caption="Look")
+
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        mock_bot.copy_message.return_value = MessageId(message_id=555)
+        await relay(mock_update, mock_context)
+
+    mock_bot.copy_message.assert_awaited_once_with(
+        chat_id=routing.target_group_id,
+        from_chat_id=12345,
+        message_id=1,
+        caption="*From: Test User*\n\nLook",
+        parse_mode="Markdown",
+        reply_parameters=None,
+    )
+    mock_bot.send_message.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_relay_escapes_markdown_in_caption(mock_update, mock_context, routing):  # noqa: ARG001
+    """Test that Markdown characters in a caption are sent literally instead of failing."""
+    mock_update.message = media_message(photo=photo(), caption="my_file *draft")
+
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        mock_bot.copy_message.return_value = MessageId(message_id=555)
+        await relay(mock_update, mock_context)
+
+    caption = mock_bot.copy_message.await_args.kwargs["caption"]
+    assert caption == "*From: Test User*\n\nmy\\_file \\*draft"
+
+
+def test_header_keeps_asterisks_in_display_name_literal():
+    """Test that an asterisk in a display name does not end the bold header early."""
+    assert header("a*b") == "*From: a*\\**b*"
+
+
+@pytest.mark.asyncio
+async def test_relay_media_without_caption_sends_header_first(mock_update, mock_context, routing):
+    """Test that media that cannot carry a caption is preceded by a header message."""
+    mock_update.message = media_message(location=Location(longitude=1.0, latitude=2.0))
+
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        mock_bot.copy_message.return_value = MessageId(message_id=555)
+        await relay(mock_update, mock_context)
+
+    mock_bot.send_message.assert_awaited_once_with(
+        chat_id=routing.target_group_id,
+        text="*From: Test User*",
+        parse_mode="Markdown",
+        reply_parameters=None,
+    )
+    mock_bot.copy_message.assert_awaited_once_with(
+        chat_id=routing.target_group_id, from_chat_id=12345, message_id=1
+    )
+
+
+@pytest.mark.asyncio
+async def test_relay_album_is_copied_as_a_unit(mock_update, mock_context, routing):
+    """Test that the items of a media group are relayed together with one header."""
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        mock_bot.copy_messages.return_value = tuple(MessageId(message_id=i) for i in (7, 8, 9))
+        for message_id in (2, 1, 3):
+            mock_update.message = media_message(
+                message_id, photo=photo(str(message_id)), media_group_id="album"
+            )
+            await relay(mock_update, mock_context)
+
+        mock_bot.copy_messages.assert_not_called()
+        await album_buffer.stop()
+
+    mock_bot.send_message.assert_awaited_once_with(
+        chat_id=routing.target_group_id,
+        text="*From: Test User*",
+        parse_mode="Markdown",
+        reply_parameters=None,
+    )
+    mock_bot.copy_messages.assert_awaited_once_with(
+        chat_id=routing.target_group_id, from_chat_id=12345, message_ids=[1, 2, 3]
+    )
+    assert album_buffer.stats()["albums"] == 1
+    assert await message_map.get(67890, 9) == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_relay_reply_points_at_the_relayed_copy(mock_update, mock_context, routing):  # noqa: ARG001
+    """Test that replying to a relayed message replies to its counterpart on the other side."""
+    await message_map.link(67890, 40, 12345, 4)
+    mock_update.message = media_message(
+        5, text="Thanks", reply_to_message=media_message(4, text="Hello")
+    )
+
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        mock_bot.send_message.return_value = MessageId(message_id=41)
+        await relay(mock_update, mock_context)
+
+    reply_to = mock_bot.send_message.call_args[1]["reply_parameters"]
+    assert reply_to.message_id == 40  # noqa: PLR2004
+    assert await message_map.get(67890, 41) == 5  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_relay_edit_updates_the_relayed_copy(mock_update, mock_context, routing):
+    """Test that editing a relayed message edits its copy with the header kept."""
+    await message_map.link(12345, 4, 67890, 40)
+    mock_update.edited_message = media_message(4, text="Fixed typo")
+
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        await relay_edit(mock_update, mock_context)
+
+    mock_bot.edit_message_text.assert_awaited_once_with(
+        chat_id=routing.target_group_id,
+        message_id=40,
+        text="*From: Test User*\n\nFixed typo",
+        parse_mode="Markdown",
+    )
+
+
+@pytest.mark.asyncio
+async def test_relay_edit_of_unknown_message_is_ignored(mock_update, mock_context, routing):  # noqa: ARG001
+    """Test that edits of messages that were never relayed are dropped."""
+    mock_update.edited_message = media_message(4, text="Fixed typo")
+
+    with patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot:
+        await relay_edit(mock_update, mock_context)
+
+    mock_bot.edit_message_text.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_relay_with_outbox_sends_after_commit(mock_update, mock_context, routing, tmp_path):  # noqa: ARG001
+    """Test that with an outbox the relay only commits the send and the sender delivers it."""
+    mock_update.message = media_message(4, text="Hello")
+
+    with (
+        patch.object(relay_outbox, "log", OutboxLog(str(tmp_path / "outbox.sqlite3"))),
+        patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot,
+    ):
+        mock_bot.send_message.return_value = MessageId(message_id=40)
+        await relay(mock_update, mock_context)
+        assert relay_outbox.stats()["written"] == 1
+
+        await relay_outbox.stop()
+
+    mock_bot.send_message.assert_awaited_once()
+    assert await message_map.get(12345, 4) == 40  # noqa: PLR2004
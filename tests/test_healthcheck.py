@@ -2,7 +2,7 @@
 
 import pytest
 
-from app.healthcheck import health
+from app.healthcheck import health, stats
 
 
 @pytest.mark.asyncio
@@ -11,3 +11,12 @@ async def test_health_returns_ok_status():
     result = await health()
 
     assert result == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_stats_reports_dispatcher():
+    """Test that stats endpoint includes dispatcher stats."""
+    result = await stats()
+
+    assert "queue_depth" in result["dispatcher"]
+    assert "avg_wait_ms" in result["dispatcher"]
@@ -14,30 +14,48 @@ async def test_lifespan_startup_shutdown():
     """Test lifespan context manager startup and shutdown."""
     with (
         patch("app.main.telegram_app") as mock_telegram_app,
-        patch("app.main.telegram_client") as mock_telegram_client,
+        patch("app.main.account_owner") as mock_account_owner,
+        patch("app.main.forward_client") as mock_forward_client,
         patch("app.main.set_webhook", new_callable=AsyncMock) as mock_set_webhook,
-        patch("httpx.AsyncClient") as mock_httpx,
+        patch("app.main.auth_client") as mock_auth_client,
     ):
         mock_telegram_app.initialize = AsyncMock()
         mock_telegram_app.shutdown = AsyncMock()
         mock_api = MagicMock(spec=FastAPI)
         mock_api.state = MagicMock()
 
-        mock_telegram_client.start = AsyncMock()
+        mock_account_owner.start = AsyncMock()
+        mock_account_owner.stop = AsyncMock()
+        mock_forward_client.aclose = AsyncMock()
 
-        mock_client_instance = AsyncMock()
-        mock_client_instance.aclose = AsyncMock()
-        mock_httpx.return_value = mock_client_instance
+        mock_auth_client.aclose = AsyncMock()
 
         async with lifespan(mock_api):
             # During context (startup complete)
             mock_telegram_app.initialize.assert_called_once()
             mock_set_webhook.assert_called_once()
-            mock_telegram_client.start.assert_called_once()
+            mock_account_owner.start.assert_called_once()
 
         # After context (shutdown complete)
         mock_telegram_app.shutdown.assert_called_once()
-        mock_client_instance.aclose.assert_called_once()
+        mock_auth_client.aclose.assert_called_once()
+        mock_account_owner.stop.assert_called_once()
+        mock_forward_client.aclose.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_refuses_leader_mode_without_internal_secret():
+    """Test that leader mode without an internal secret fails at startup."""
+    with (
+        patch("app.main.settings.leader_mode", True),
+        patch("app.main.settings.internal_secret", ""),
+        patch("app.main.telegram_app") as mock_telegram_app,
+        pytest.raises(RuntimeError, match="INTERNAL_SECRET"),
+    ):
+        async with lifespan(MagicMock(spec=FastAPI)):
+            pass
+
+    mock_telegram_app.initialize.assert_not_called()
 
 
 def test_app_creation():
@@ -0,0 +1,71 @@
+"""Tests for app.telegram.message_map module."""
+
+import pytest
+
+from app.telegram.message_map import MessageMap, SqliteMessageLog
+
+
+@pytest.mark.asyncio
+async def test_link_resolves_both_directions():
+    """Test that a linked pair can be looked up from either chat."""
+    message_map = MessageMap(capacity=8)
+
+    await message_map.link(-1, 10, -2, 20)
+
+    assert await message_map.get(-1, 10) == 20  # noqa: PLR2004
+    assert await message_map.get(-2, 20) == 10  # noqa: PLR2004
+    assert await message_map.get(-1, 11) is None
+    assert message_map.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ring_keeps_only_recent_messages():
+    """Test that a message is forgotten once a newer one takes its slot."""
+    message_map = MessageMap(capacity=4)
+
+    for message_id in range(1, 6):
+        await message_map.link(-1, message_id, -2, message_id + 100)
+
+    assert await message_map.get(-1, 1) is None
+    assert await message_map.get(-1, 5) == 105  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_least_recent_chat_is_evicted():
+    """Test that memory is bounded by dropping the least recently used chat."""
+    message_map = MessageMap(capacity=4, max_chats=2)
+
+    await message_map.link(-1, 1, -2, 2)
+    await message_map.link(-3, 3, -4, 4)
+
+    assert message_map.stats()["chats"] == 2  # noqa: PLR2004
+    assert await message_map.get(-1, 1) is None
+
+
+@pytest.mark.asyncio
+async def test_spilled_entries_are_found_in_sqlite(tmp_path):
+    """Test that displaced entries are written to the spill log and read back on a miss."""
+    spill = SqliteMessageLog(str(tmp_path / "messages.sqlite3"))
+    message_map = MessageMap(capacity=2, spill=spill, spill_batch=1)
+
+    for message_id in range(1, 5):
+        await message_map.link(-1, message_id, -2, message_id + 100)
+
+    assert message_map.stats()["spilled"] > 0
+    assert await message_map.get(-1, 1) == 101  # noqa: PLR2004
+    assert await message_map.get(-2, 101) == 1
+    assert message_map.stats()["spill_hits"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_write_through_links_are_found_by_another_replica(tmp_path):
+    """Test that a replica sharing the log resolves messages relayed by another one."""
+    path = str(tmp_path / "messages.sqlite3")
+    replica_1 = MessageMap(spill=SqliteMessageLog(path), write_through=True)
+    replica_2 = MessageMap(spill=SqliteMessageLog(path), write_through=True)
+
+    await replica_1.link(-100, 7, -200, 70)
+
+    assert await replica_2.get(-100, 7) == 70  # noqa: PLR2004
+    assert await replica_2.get(-200, 70) == 7  # noqa: PLR2004
+    assert replica_2.stats()["spill_hits"] == 2  # noqa: PLR2004
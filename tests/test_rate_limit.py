@@ -0,0 +1,147 @@
+"""Tests for app.telegram.ratelimit module."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from telegram.error import RetryAfter
+
+from app.telegram.ratelimit import BotRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with (
+        patch("app.telegram.ratelimit.time.monotonic", fake.monotonic),
+        patch("app.telegram.ratelimit.asyncio.sleep", fake.sleep),
+    ):
+        yield fake
+
+
+async def send(limiter: BotRateLimiter, callback: AsyncMock, chat_id: int | None, **kwargs):
+    data = {"chat_id": chat_id} if chat_id is not None else {}
+    return await limiter.process_request(
+        callback, (), {}, "sendMessage", data, kwargs.get("retries")
+    )
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    """Test that a bucket admits a burst at once and then one request per interval."""
+    bucket = TokenBucket(rate=1, burst=3)
+
+    starts = [bucket.reserve(0.0) for _ in range(5)]
+
+    assert starts == [0.0, 0.0, 0.0, 1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_group_sends_are_queued_at_group_rate(clock):
+    """Test that sends to one group beyond the burst wait instead of failing."""
+    limiter = BotRateLimiter(group_rate=20 / 60, burst=2)
+    callback = AsyncMock(return_value=True)
+
+    for _ in range(4):
+        assert await send(limiter, callback, -100) is True
+
+    assert callback.await_count == 4  # noqa: PLR2004
+    assert clock.sleeps == pytest.approx([3.0, 3.0])
+    assert limiter.stats()["throttle_delay"]["chat"]["count"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_chats_do_not_throttle_each_other(clock):
+    """Test that different chats only share the global bucket."""
+    limiter = BotRateLimiter(group_rate=1 / 60, burst=3)
+    callback = AsyncMock()
+
+    for chat_id in (-1, -2, -3):
+        await send(limiter, callback, chat_id)
+
+    assert clock.sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_global_rate_applies_across_chats(clock):
+    """Test that the global bucket spaces sends to many chats."""
+    limiter = BotRateLimiter(global_rate=2, burst=1)
+    callback = AsyncMock()
+
+    for chat_id in (1, 2, 3):
+        await send(limiter, callback, chat_id)
+
+    assert clock.sleeps == pytest.approx([0.5, 0.5])
+    assert "global" in limiter.stats()["throttle_delay"]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_waited_out_and_retried(clock):
+    """Test that a RetryAfter blocks the chat for the given time and the send is retried."""
+    limiter = BotRateLimiter()
+    callback = AsyncMock(side_effect=[RetryAfter(7), True])
+
+    assert await send(limiter, callback, -100) is True
+
+    assert callback.await_count == 2  # noqa: PLR2004
+    assert clock.sleeps == pytest.approx([7.0])
+    assert limiter.stats()["retry_afters"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_raised_after_max_retries(clock):  # noqa: ARG001
+    """Test that a chat that keeps flooding fails after the configured retries."""
+    limiter = BotRateLimiter(max_retries=1)
+    callback = AsyncMock(side_effect=RetryAfter(1))
+
+    with pytest.raises(RetryAfter):
+        await send(limiter, callback, -100)
+
+    assert callback.await_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_requests_without_chat_are_not_delayed(clock):
+    """Test that requests such as callback query answers bypass the buckets."""
+    limiter = BotRateLimiter(global_rate=1, burst=1)
+    callback = AsyncMock()
+
+    for _ in range(3):
+        await send(limiter, callback, None)
+
+    assert clock.sleeps == []
+    assert limiter.stats()["tracked_chats"] == 0
+
+
+@pytest.mark.asyncio
+async def test_throttled_group_does_not_delay_other_chats():
+    """Test that a group waiting for its chat slot does not hold global slots from other chats."""
+    limiter = BotRateLimiter(global_rate=100, group_rate=20, burst=1)
+    sent: list[int] = []
+
+    async def deliver(chat_id: int):
+        sent.append(chat_id)
+        return True
+
+    await asyncio.gather(
+        *(
+            limiter.process_request(
+                deliver, (chat_id,), {}, "sendMessage", {"chat_id": chat_id}, None
+            )
+            for chat_id in (-100, -100, -100, -100, 7)
+        )
+    )
+
+    assert sent == [-100, 7, -100, -100, -100]
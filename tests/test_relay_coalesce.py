@@ -0,0 +1,100 @@
+"""Tests for app.telegram.coalesce module."""
+
+import asyncio
+import datetime as dt
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram import Chat, Message, MessageId
+
+from app.telegram.coalesce import RelayCoalescer
+from app.telegram.handlers.relay import relay, relay_coalescer
+
+
+def text_message(message_id: int, text: str, chat_id: int = 12345, **kwargs) -> Message:
+    return Message(
+        message_id=message_id,
+        date=dt.datetime.now(dt.UTC),
+        chat=Chat(id=chat_id, type=Chat.SUPERGROUP),
+        text=text,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_burst_is_sent_as_one_message():
+    """Test that messages arriving within the window are sent together."""
+    send = AsyncMock()
+    coalescer = RelayCoalescer(send, window=0.01, max_delay=1)
+
+    for message_id, text in enumerate(("hi", "are you there", "?"), start=1):
+        coalescer.add(text_message(message_id, text))
+    await asyncio.sleep(0.05)
+
+    send.assert_awaited_once()
+    assert [message.text for message in send.call_args[0][0]] == ["hi", "are you there", "?"]
+    assert coalescer.stats()["sends_saved"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_split_at_max_length():
+    """Test that a burst is sent before the next message would exceed the length limit."""
+    send = AsyncMock()
+    coalescer = RelayCoalescer(send, window=10, max_delay=10, max_length=10)
+
+    coalescer.add(text_message(1, "12345"))
+    coalescer.add(text_message(2, "6789"))
+    coalescer.add(text_message(3, "abc"))
+    await coalescer.stop()
+
+    assert [len(call[0][0]) for call in send.call_args_list] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_chats_are_coalesced_separately():
+    """Test that bursts of different groups are never merged."""
+    send = AsyncMock()
+    coalescer = RelayCoalescer(send, window=10, max_delay=10)
+
+    coalescer.add(text_message(1, "a", chat_id=1))
+    coalescer.add(text_message(1, "b", chat_id=2))
+    await coalescer.flush(1)
+
+    send.assert_awaited_once()
+    assert coalescer.stats()["pending"] == 1
+
+
+@pytest.mark.asyncio
+async def test_edited_text_rebuilds_merged_message():
+    """Test that editing one part of a merged message yields the whole updated text."""
+    coalescer = RelayCoalescer(AsyncMock())
+    coalescer.remember(12345, [text_message(1, "hi"), text_message(2, "tpyo")])
+
+    assert coalescer.edited_text(12345, text_message(2, "typo")) == "hi\ntypo"
+    assert coalescer.edited_text(12345, text_message(3, "typo")) is None
+
+
+@pytest.mark.asyncio
+async def test_relay_flushes_burst_before_media(mock_context):
+    """Test that buffered texts are relayed before a message that is not coalesced."""
+    routing = MagicMock(target_group_id=67890, display_name="Test User")
+    calls = []
+
+    with (
+        patch.object(relay_coalescer, "window", 10),
+        patch("app.telegram.handlers.relay.resolve_group", AsyncMock(return_value=routing)),
+        patch("app.telegram.handlers.relay.telegram_app.bot", new_callable=AsyncMock) as mock_bot,
+    ):
+        mock_bot.send_message.side_effect = lambda **kwargs: calls.append(kwargs) or MessageId(50)
+        for message_id, text in enumerate(("one", "two"), start=1):
+            await relay(MagicMock(message=text_message(message_id, text)), mock_context)
+        assert calls == []
+
+        reply = text_message(3, "re", reply_to_message=text_message(1, "one"))
+        await relay(MagicMock(message=reply), mock_context)
+
+    assert [call["text"] for call in calls] == [
+        "*From: Test User*\n\none\ntwo",
+        "*From: Test User*\n\nre",
+    ]
+    assert relay_coalescer.stats()["sends_saved"] == 1
@@ -0,0 +1,138 @@
+"""Tests for app.telegram.outbox module."""
+
+import asyncio
+import sqlite3
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from app.telegram.outbox import OutboxLog, RelayOutbox
+
+
+@pytest.fixture
+def outbox_log(tmp_path):
+    return OutboxLog(str(tmp_path / "outbox.sqlite3"))
+
+
+@pytest.mark.asyncio
+async def test_submitted_message_is_delivered(outbox_log):
+    """Test that a submitted send is delivered and then removed from the log."""
+    deliver = AsyncMock()
+    outbox = RelayOutbox(deliver, outbox_log)
+
+    await outbox.submit(-1, "text", {"text": "hi"})
+    await outbox.stop()
+
+    deliver.assert_awaited_once_with("text", {"text": "hi"})
+    with sqlite3.connect(outbox_log.path) as db:
+        assert db.execute("SELECT COUNT(*) FROM outbox").fetchone() == (0,)
+    assert outbox.stats()["delivered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_commit(outbox_log):
+    """Test that sends submitted together are written by a single commit."""
+    outbox = RelayOutbox(AsyncMock(), outbox_log)
+
+    await asyncio.gather(*(outbox.submit(-index, "text", {}) for index in range(1, 6)))
+
+    assert outbox.stats()["written"] == 5  # noqa: PLR2004
+    assert outbox.stats()["commits"] == 1
+    await outbox.stop()
+
+
+@pytest.mark.asyncio
+async def test_sends_to_one_chat_keep_their_order(outbox_log):
+    """Test that a chat's sends are delivered in submission order, even across retries."""
+    delivered = []
+    failed_once = set()
+
+    async def deliver(_kind, payload):
+        if payload["n"] == 1 and 1 not in failed_once:
+            failed_once.add(1)
+            raise NetworkError("Bad Gateway")
+        delivered.append(payload["n"])
+
+    outbox = RelayOutbox(deliver, outbox_log, retry_delay=0)
+    for n in (1, 2, 3):
+        await outbox.submit(-1, "text", {"n": n})
+    await outbox.stop()
+
+    assert delivered == [1, 2, 3]
+    assert outbox.stats()["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_waits_as_long_as_telegram_asks(outbox_log):
+    """Test that a RetryAfter is retried after its own wait instead of the backoff."""
+    deliver = AsyncMock(side_effect=[RetryAfter(7), None])
+    outbox = RelayOutbox(deliver, outbox_log, retry_delay=0)
+
+    with patch("app.telegram.outbox.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        await outbox.submit(-1, "text", {})
+        await outbox.stop()
+
+    assert deliver.await_count == 2  # noqa: PLR2004
+    assert 7 in [call.args[0] for call in mock_sleep.await_args_list]  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_failed_log_write_still_delivers():
+    """Test that a send is delivered even when the log cannot record it."""
+    log = MagicMock()
+    log.write.side_effect = sqlite3.OperationalError("disk I/O error")
+    deliver = AsyncMock()
+    outbox = RelayOutbox(deliver, log)
+
+    await outbox.submit(-1, "text", {"text": "hi"})
+    await outbox.stop()
+
+    deliver.assert_awaited_once_with("text", {"text": "hi"})
+    assert outbox.stats()["unlogged"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_message_is_not_retried(outbox_log):
+    """Test that a request Telegram rejects is marked failed instead of retried."""
+    deliver = AsyncMock(side_effect=BadRequest("Chat not found"))
+    outbox = RelayOutbox(deliver, outbox_log, retry_delay=0)
+
+    await outbox.submit(-1, "text", {})
+    await outbox.stop()
+
+    deliver.assert_awaited_once()
+    assert outbox.stats()["failed"] == 1
+    assert outbox_log.pending() == []
+
+
+@pytest.mark.asyncio
+async def test_undelivered_messages_are_replayed_on_start(outbox_log):
+    """Test that sends still pending at shutdown are delivered by the next run."""
+    stuck = RelayOutbox(AsyncMock(side_effect=NetworkError("timeout")), outbox_log, retry_delay=60)
+    stuck.drain_timeout = 0.01
+    await stuck.submit(-1, "text", {"text": "hi"})
+    await stuck.stop()
+
+    assert [entry.payload for entry in outbox_log.pending()] == [{"text": "hi"}]
+
+    deliver = AsyncMock()
+    restarted = RelayOutbox(deliver, outbox_log)
+    await restarted.start()
+    await restarted.stop()
+
+    deliver.assert_awaited_once_with("text", {"text": "hi"})
+    assert restarted.stats()["replayed"] == 1
+    assert outbox_log.pending() == []
+
+
+@pytest.mark.asyncio
+async def test_outbox_without_log_delivers_inline():
+    """Test that a disabled outbox sends straight away."""
+    deliver = AsyncMock()
+    outbox = RelayOutbox(deliver)
+
+    await outbox.submit(-1, "text", {})
+
+    deliver.assert_awaited_once()
+    assert outbox.stats()["written"] == 0
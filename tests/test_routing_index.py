@@ -0,0 +1,129 @@
+"""Tests for app.services.core.routing_index and the routing index preload."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services.core.api import (
+    load_routing_index,
+    resolve_group,
+    routing_index,
+    save_routing_index,
+)
+from app.services.core.model import ResolveGroupResponse
+from app.services.core.routing_index import RoutingIndex
+
+ROUTES = [
+    (-100003, -200003, "alias-3"),
+    (-100001, -200001, "alias-1"),
+    (-100002, -200002, "alias-1"),
+]
+
+
+def test_routing_index_finds_loaded_routes():
+    """Test that routes loaded out of order are found and names are interned."""
+    index = RoutingIndex()
+    index.load(ROUTES)
+
+    assert index.get(-100002) == ResolveGroupResponse(
+        target_group_id=-200002, display_name="alias-1"
+    )
+    assert index.get(-100003).target_group_id == -200003  # noqa: PLR2004
+    assert index.get(-100004) is None
+    assert index.stats()["names"] == 2  # noqa: PLR2004
+    assert index.stats()["misses"] == 1
+
+
+def test_routing_index_learns_routes_only_once_loaded():
+    """Test that routes added before loading are ignored and kept after it."""
+    index = RoutingIndex()
+    routing = ResolveGroupResponse(target_group_id=-200009, display_name="alias-9")
+
+    index.add(-100009, routing)
+    assert index.get(-100009) is None
+
+    index.load(ROUTES)
+    index.add(-100009, routing)
+    assert index.get(-100009) == routing
+    assert len(index) == 4  # noqa: PLR2004
+
+
+def test_routing_index_snapshot_round_trip(tmp_path):
+    """Test that a snapshot keeps loaded and learned routes and is mapped back in."""
+    path = str(tmp_path / "routes.snapshot")
+    index = RoutingIndex()
+    index.load(ROUTES)
+    index.add(-100009, ResolveGroupResponse(target_group_id=-200009, display_name="alias-9"))
+    index.save_snapshot(path)
+
+    restored = RoutingIndex()
+    restored.load_snapshot(path)
+
+    assert sorted(restored.items()) == sorted(index.items())
+    assert restored.stats()["source"] == "snapshot"
+    assert restored.get(-100009).display_name == "alias-9"
+
+    # The mapped file can be replaced while it is in use
+    restored.save_snapshot(path)
+    restored.load_snapshot(path)
+    assert len(restored) == 4  # noqa: PLR2004
+
+
+def test_routing_index_rejects_truncated_snapshot(tmp_path):
+    """Test that a cut-off snapshot is refused instead of being read past its end."""
+    path = tmp_path / "routes.snapshot"
+    index = RoutingIndex()
+    index.load(ROUTES)
+    index.save_snapshot(str(path))
+    path.write_bytes(path.read_bytes()[:-5])
+
+    with pytest.raises(ValueError, match="truncated"):
+        RoutingIndex().load_snapshot(str(path))
+
+
+@pytest.mark.asyncio
+async def test_load_routing_index_pages_through_core_api(fake_core_api):
+    """Test that the preload walks every page of the route listing."""
+    with patch("app.services.core.api.settings.routing_index_page_size", 64):
+        await load_routing_index()
+
+    assert len(routing_index) == 200  # noqa: PLR2004
+    assert fake_core_api.count("/groups/routes") == 4  # noqa: PLR2004
+    assert routing_index.stats()["source"] == "core_api"
+
+
+@pytest.mark.asyncio
+async def test_load_routing_index_prefers_snapshot(fake_core_api, tmp_path):
+    """Test that a snapshot written on shutdown warm-starts without the Core API."""
+    path = str(tmp_path / "routes.snapshot")
+    with patch("app.services.core.api.settings.routing_index_snapshot_path", path):
+        await load_routing_index()
+        await save_routing_index()
+        routing_index.clear()
+
+        await load_routing_index()
+
+    assert len(routing_index) == 200  # noqa: PLR2004
+    assert fake_core_api.count("/groups/routes") == 1
+    assert routing_index.stats()["source"] == "snapshot"
+
+
+@pytest.mark.asyncio
+async def test_load_routing_index_failure_leaves_index_empty(fake_core_api):  # noqa: ARG001
+    """Test that a failed listing is logged and resolves fall back to the Core API."""
+    with patch("app.services.core.api.settings.core_api_base", "http://core/missing"):
+        await load_routing_index()
+
+    assert not routing_index.loaded
+
+
+@pytest.mark.asyncio
+async def test_resolve_group_reads_routing_index_first(fake_core_api):
+    """Test that preloaded routes are resolved without any request to the Core API."""
+    await load_routing_index()
+
+    routing = await resolve_group(-100042)
+
+    assert routing == ResolveGroupResponse(target_group_id=-200042, display_name="alias-42")
+    assert fake_core_api.count("/groups/resolve") == 0
+    assert routing_index.stats()["hits"] == 1
@@ -0,0 +1,154 @@
+"""Tests for app.services.taccount.accounts module."""
+
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.taccount.accounts import AccountPool, ServiceAccount
+from app.services.taccount.api import _create_session_groups
+from app.services.taccount.scheduler import AccountBusyError
+
+
+def make_pool(*names: str) -> AccountPool:
+    return AccountPool([ServiceAccount(name, MagicMock(), {}) for name in names])
+
+
+@pytest.mark.asyncio
+async def test_lease_prefers_least_loaded_account():
+    """Test that concurrent leases are spread over the accounts."""
+    pool = make_pool("a", "b")
+
+    async with pool.lease() as first, pool.lease() as second:
+        assert {first.name, second.name} == {"a", "b"}
+        assert pool.current() is second
+
+    assert pool.current() is pool.accounts[0]
+
+
+@pytest.mark.asyncio
+async def test_flooded_account_leaves_rotation():
+    """Test that an account hitting a long FloodWait is skipped until the wait is over."""
+    pool = make_pool("a", "b")
+
+    with pytest.raises(AccountBusyError):
+        async with pool.lease() as account:
+            assert account.name == "a"
+            raise AccountBusyError(seconds=300, queue_position=1)
+
+    assert [account.name for account in pool.available()] == ["b"]
+    async with pool.lease() as account:
+        assert account.name == "b"
+    assert pool.stats()["a"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_fails_fast_when_every_account_is_flooded():
+    """Test that leasing reports the shortest remaining wait when all accounts are flooded."""
+    pool = make_pool("a")
+    pool.accounts[0].flooded_until = time.monotonic() + 60
+
+    with pytest.raises(AccountBusyError, match="about 60 seconds"):
+        async with pool.lease():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_session_groups_move_to_another_account_when_flooded():
+    """Test that session group creation is retried on the next account after a flood."""
+    pool = make_pool("a", "b")
+    for account in pool.accounts:
+        account.bot_entity = AsyncMock(return_value=f"bot@{account.name}")
+
+    async def provision(bot_entity, *_groups):
+        if bot_entity == "bot@a":
+            raise AccountBusyError(seconds=300, queue_position=1)
+        return [1, 2]
+
+    with (
+        patch("app.services.taccount.api.account_pool", pool),
+        patch("app.services.taccount.api.provision_telegram_groups", side_effect=provision),
+        patch("app.services.taccount.api.leave_telegram_group", new_callable=AsyncMock),
+    ):
+        result = await _create_session_groups((10, "first"), (20, "second"))
+
+    assert result == [1, 2]
+    assert pool.stats()["b"]["leases"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flood_while_leaving_does_not_create_another_pair():
+    """Test that a flood after provisioning deletes the groups instead of moving accounts."""
+    pool = make_pool("a", "b")
+    for account in pool.accounts:
+        account.bot_entity = AsyncMock(return_value=f"bot@{account.name}")
+    provision = AsyncMock(return_value=[1, 2])
+
+    with (
+        patch("app.services.taccount.api.account_pool", pool),
+        patch("app.services.taccount.api.provision_telegram_groups", provision),
+        patch(
+            "app.services.taccount.api.leave_telegram_group",
+            AsyncMock(side_effect=AccountBusyError(seconds=300, queue_position=1)),
+        ),
+        patch("app.services.taccount.api.delete_telegram_group", new_callable=AsyncMock) as delete,
+        patch(
+            "app.services.taccount.api.abandon_telegram_group", new_callable=AsyncMock
+        ) as abandon,
+        pytest.raises(AccountBusyError),
+    ):
+        await _create_session_groups((10, "first"), (20, "second"))
+
+    provision.assert_awaited_once()
+    assert sorted(call.args[0] for call in delete.await_args_list) == [1, 2]
+    abandon.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_leave_is_retried_on_the_same_groups():
+    """Test that a failed leave is retried only for the group the account is still in."""
+    pool = make_pool("a")
+    pool.accounts[0].bot_entity = AsyncMock(return_value="bot@a")
+    leave = AsyncMock(side_effect=[None, RuntimeError("network"), None])
+
+    with (
+        patch("app.services.taccount.api.account_pool", pool),
+        patch(
+            "app.services.taccount.api.provision_telegram_groups", AsyncMock(return_value=[1, 2])
+        ),
+        patch("app.services.taccount.api.leave_telegram_group", leave),
+        patch("app.services.taccount.api.delete_telegram_group", new_callable=AsyncMock) as delete,
+    ):
+        result = await _create_session_groups((10, "first"), (20, "second"))
+
+    assert result == [1, 2]
+    assert [call.args[0] for call in leave.await_args_list] == [1, 2, 2]
+    delete.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_groups_already_left_are_abandoned_not_deleted():
+    """Test that only the group the account is still in is deleted when leaving keeps failing."""
+    pool = make_pool("a")
+    pool.accounts[0].bot_entity = AsyncMock(return_value="bot@a")
+
+    async def leave_group(group_id: int):
+        if group_id == 2:  # noqa: PLR2004
+            raise RuntimeError("network")
+
+    with (
+        patch("app.services.taccount.api.account_pool", pool),
+        patch(
+            "app.services.taccount.api.provision_telegram_groups", AsyncMock(return_value=[1, 2])
+        ),
+        patch("app.services.taccount.api.leave_telegram_group", AsyncMock(side_effect=leave_group)),
+        patch("app.services.taccount.api.delete_telegram_group", new_callable=AsyncMock) as delete,
+        patch(
+            "app.services.taccount.api.abandon_telegram_group", new_callable=AsyncMock
+        ) as abandon,
+        pytest.raises(RuntimeError, match="network"),
+    ):
+        await _create_session_groups((10, "first"), (20, "second"))
+
+    delete.assert_awaited_once_with(2)
+    abandon.assert_awaited_once_with(1)
@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -5,9 +6,12 @@ from telegram import ChatMember
 
 from app.services.core.model import CounselorResponse
 from app.services.taccount.api import (
+    account_pool,
     create_session,
     create_telegram_group,
     get_telegram_group_link,
+    provision_telegram_group,
+    provision_telegram_groups,
 )
 from app.services.taccount.model import CreateSessionResponse
 
@@ -31,22 +35,25 @@ async def test_create_session_happy_path():
         patch(
             "app.services.taccount.api.get_counselor", new_callable=AsyncMock
         ) as mock_get_counselor,
-        patch(
-            "app.services.taccount.api.telegram_client.get_input_entity", new_callable=AsyncMock
+        patch.object(
+            account_pool.accounts[0], "bot_entity", new_callable=AsyncMock
         ) as mock_get_input_entity,
         patch("app.services.taccount.api.settings") as mock_setting,
         patch(
             "app.services.taccount.api.create_or_get_alias", new_callable=AsyncMock
         ) as mock_create_or_get_alias,
         patch(
-            "app.services.taccount.api.create_telegram_group", new_callable=AsyncMock
-        ) as mock_create_telegram_group,
+            "app.services.taccount.api.provision_telegram_group", new_callable=AsyncMock
+        ) as mock_provision_telegram_group,
+        patch(
+            "app.services.taccount.api.leave_telegram_group", new_callable=AsyncMock
+        ) as mock_leave_telegram_group,
         patch(
             "app.services.taccount.api.get_telegram_group_link", new_callable=AsyncMock
         ) as mock_get_group_link,
     ):
 
-        def create_telegram_group_side_effects(bot_entity, target_user_id, group_name):  # noqa: ARG001
+        def provision_telegram_group_side_effects(bot_entity, target_user_id, group_name):  # noqa: ARG001
             if target_user_id == telegram_user_id:
                 return user_group_id
             if target_user_id == counselor.telegram_user_id:
@@ -58,7 +65,7 @@ async def test_create_session_happy_path():
         mock_get_counselor.return_value = counselor
         mock_get_input_entity.return_value = mock_get_input_entity
         mock_create_or_get_alias.return_value = "anon123"
-        mock_create_telegram_group.side_effect = create_telegram_group_side_effects
+        mock_provision_telegram_group.side_effect = provision_telegram_group_side_effects
         mock_get_group_link.return_value = "https://t.me/invite/link"
 
         # Act
@@ -74,12 +81,14 @@ async def test_create_session_happy_path():
         mock_create_or_get_alias.assert_awaited_once_with(telegram_user_id)
         mock_get_input_entity.assert_called_once_with("bot-username")
 
-        mock_create_telegram_group.assert_any_await(
+        mock_provision_telegram_group.assert_any_await(
             mock_get_input_entity, counselor.telegram_user_id, "Counseling with anon123"
         )
-        mock_create_telegram_group.assert_any_await(
+        mock_provision_telegram_group.assert_any_await(
             mock_get_input_entity, telegram_user_id, "Counseling with Joe"
         )
+        mock_leave_telegram_group.assert_any_await(counselor_group_id)
+        mock_leave_telegram_group.assert_any_await(user_group_id)
 
         mock_get_group_link.assert_awaited_once_with(user_group_id)
 
@@ -152,7 +161,82 @@ async def test_create_telegram_group_success():
         side_effect=[mock_created_chat, mock_migrate_result, None, None],
     )
 
-    with patch("app.services.taccount.api.telegram_client", mock_client):
+    with patch.object(account_pool.accounts[0], "client", mock_client):
         result = await create_telegram_group(bot_entity, target_user_id, group_name)
 
         assert result == supergroup_id
+
+
+@pytest.mark.asyncio
+async def test_provision_telegram_groups_deletes_sibling_when_one_fails():
+    """Test that a provisioned group is deleted when its sibling fails."""
+    bot_entity = MagicMock()
+
+    async def provision(_bot_entity, target_user_id, _group_name):
+        if target_user_id == 1:
+            return 100
+        await asyncio.sleep(0)
+        raise RuntimeError("flood")
+
+    with (
+        patch("app.services.taccount.api.provision_telegram_group", side_effect=provision),
+        patch(
+            "app.services.taccount.api.delete_telegram_group", new_callable=AsyncMock
+        ) as mock_delete,
+        pytest.raises(RuntimeError, match="flood"),
+    ):
+        await provision_telegram_groups(bot_entity, (1, "first"), (2, "second"))
+
+    mock_delete.assert_awaited_once_with(100)
+
+
+@pytest.mark.asyncio
+async def test_provision_telegram_groups_cancels_pending_sibling():
+    """Test that a sibling still in flight is cancelled when the other group fails."""
+    bot_entity = MagicMock()
+    cancelled = asyncio.Event()
+
+    async def provision(_bot_entity, target_user_id, _group_name):
+        if target_user_id == 1:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        raise RuntimeError("flood")
+
+    with (
+        patch("app.services.taccount.api.provision_telegram_group", side_effect=provision),
+        patch(
+            "app.services.taccount.api.delete_telegram_group", new_callable=AsyncMock
+        ) as mock_delete,
+        pytest.raises(RuntimeError, match="flood"),
+    ):
+        await provision_telegram_groups(bot_entity, (1, "first"), (2, "second"))
+
+    assert cancelled.is_set()
+    mock_delete.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_provision_telegram_group_deletes_supergroup_when_promotion_fails():
+    """Test that the supergroup is deleted when promoting the bot fails."""
+    supergroup_id = 200
+    mock_created_chat = MagicMock()
+    mock_created_chat.updates.chats = [MagicMock(id=100)]
+    mock_migrate_result = MagicMock()
+    mock_migrate_result.chats = [MagicMock(), MagicMock(id=supergroup_id)]
+
+    mock_client = AsyncMock(
+        side_effect=[mock_created_chat, mock_migrate_result, RuntimeError("promote"), None],
+    )
+
+    with (
+        patch.object(account_pool.accounts[0], "client", mock_client),
+        pytest.raises(RuntimeError, match="promote"),
+    ):
+        await provision_telegram_group(MagicMock(), 12345, "Test Group")
+
+    delete_request = mock_client.await_args_list[-1].args[0]
+    assert type(delete_request).__name__ == "DeleteChannelRequest"
+    assert delete_request.channel == supergroup_id
@@ -0,0 +1,170 @@
+"""Tests for app.services.taccount.leader module, forwarding and the internal endpoint."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.internal import internal_create_session, session_job_state
+from app.services.taccount.api import create_session
+from app.services.taccount.leader import LeaderElection, SqliteLease
+from app.services.taccount.model import CreateSessionRequest, CreateSessionResponse
+from app.services.taccount.scheduler import AccountBusyError
+
+SESSION = CreateSessionResponse(
+    counselor_group_id=333, user_group_id=222, user_group_link="https://t.me/+abc"
+)
+
+
+def make_lease(path, holder: str) -> SqliteLease:
+    return SqliteLease(str(path), "accounts", holder, f"http://{holder}:8000", ttl=15)
+
+
+def test_lease_is_held_by_one_replica_until_it_expires(tmp_path):
+    """Test that only one holder gets the lease and another takes over after expiry."""
+    path = tmp_path / "leader.sqlite3"
+    first, second = make_lease(path, "one"), make_lease(path, "two")
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert first.try_acquire()  # renewal
+    assert second.current().address == "http://one:8000"
+
+    with patch("app.services.taccount.leader.time.time", return_value=10**10):
+        assert second.try_acquire()
+        assert first.current().holder == "two"
+
+
+def test_released_lease_is_free(tmp_path):
+    """Test that releasing the lease lets another replica take it at once."""
+    path = tmp_path / "leader.sqlite3"
+    first, second = make_lease(path, "one"), make_lease(path, "two")
+
+    first.try_acquire()
+    first.release()
+
+    assert first.current() is None
+    assert second.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_election_hands_ownership_over_on_failover(tmp_path):
+    """Test that a replica takes the accounts when elected and releases them when demoted."""
+    path = tmp_path / "leader.sqlite3"
+    elected, demoted = AsyncMock(), AsyncMock()
+    election = LeaderElection(make_lease(path, "one"), elected, demoted, heartbeat_interval=5)
+
+    await election.heartbeat()
+    assert election.is_leader
+    elected.assert_awaited_once()
+
+    # Our lease lapsed (e.g. the process stalled) and another replica took over
+    with patch("app.services.taccount.leader.time.time", return_value=10**10):
+        make_lease(path, "two").try_acquire()
+        await election.heartbeat()
+
+    assert not election.is_leader
+    demoted.assert_awaited_once()
+    assert election.stats()["demotions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_follower_forwards_create_session_to_leader():
+    """Test that a replica without the accounts forwards session starts to the owner."""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, content=SESSION.model_dump_json())
+
+    with (
+        patch("app.services.taccount.api.account_owner") as mock_owner,
+        patch(
+            "app.services.taccount.api.forward_client",
+            httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        ),
+        patch.object(settings, "internal_secret", "s3cret"),
+    ):
+        mock_owner.is_leader = False
+        mock_owner.leader_address = AsyncMock(return_value="http://leader:8000")
+
+        result = await create_session(12345, 1)
+
+    assert result == SESSION
+    assert str(seen[0].url) == "http://leader:8000/internal/sessions"
+    assert seen[0].headers["X-Internal-Secret"] == "s3cret"
+    assert json.loads(seen[0].content) == {"telegram_user_id": 12345, "counselor_id": 1}
+
+
+@pytest.mark.asyncio
+async def test_forwarded_busy_response_raises_account_busy():
+    """Test that the owner's 429 reaches the follower as AccountBusyError."""
+    detail = {"detail": {"seconds": 90, "queue_position": 4}}
+
+    with (
+        patch("app.services.taccount.api.account_owner") as mock_owner,
+        patch(
+            "app.services.taccount.api.forward_client",
+            httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda _r: httpx.Response(429, json=detail))
+            ),
+        ),
+    ):
+        mock_owner.is_leader = False
+        mock_owner.leader_address = AsyncMock(return_value="http://leader:8000")
+
+        with pytest.raises(AccountBusyError, match="try again in about 90 seconds"):
+            await create_session(12345, 1)
+
+
+@pytest.mark.asyncio
+async def test_internal_endpoint_rejects_wrong_secret():
+    """Test that the internal endpoint requires the shared secret."""
+    with (
+        patch.object(settings, "internal_secret", "s3cret"),
+        pytest.raises(HTTPException) as exc_info,
+    ):
+        await internal_create_session(
+            CreateSessionRequest(telegram_user_id=1, counselor_id=1), "nope"
+        )
+
+    assert exc_info.value.status_code == 403  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_internal_endpoint_creates_session_on_leader():
+    """Test that the owner serves forwarded session starts."""
+    with (
+        patch.object(settings, "internal_secret", "s3cret"),
+        patch("app.internal.account_owner", MagicMock(is_leader=True)),
+        patch("app.internal.create_session", AsyncMock(return_value=SESSION)) as mock_create,
+    ):
+        result = await internal_create_session(
+            CreateSessionRequest(telegram_user_id=1, counselor_id=2), "s3cret"
+        )
+
+    assert result == SESSION
+    mock_create.assert_awaited_once_with(1, 2)
+
+
+@pytest.mark.asyncio
+async def test_session_job_state_is_queryable():
+    """Test that the internal endpoint reports the state of a session job."""
+    job = MagicMock()
+    job.describe.return_value = {"state": "running"}
+
+    with (
+        patch.object(settings, "internal_secret", "s3cret"),
+        patch("app.internal.session_jobs") as mock_jobs,
+    ):
+        mock_jobs.get.return_value = job
+        assert await session_job_state(1, 2, "s3cret") == {"state": "running"}
+
+        mock_jobs.get.return_value = None
+        with pytest.raises(HTTPException) as exc_info:
+            await session_job_state(1, 2, "s3cret")
+
+    assert exc_info.value.status_code == 404  # noqa: PLR2004
@@ -0,0 +1,127 @@
+"""Tests for app.services.taccount.pool module and pooled session groups."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from app.services.taccount.api import provision_telegram_groups
+from app.services.taccount.pool import PooledGroup, WarmGroupPool
+
+
+async def wait_for_depth(pool: WarmGroupPool, depth: int):
+    for _ in range(100):
+        if len(pool) >= depth:
+            return
+        await asyncio.sleep(0)
+    pytest.fail(f"pool never reached depth {depth}")
+
+
+@pytest.mark.asyncio
+async def test_pool_refills_to_target_size_and_persists(tmp_path):
+    """Test that the pool provisions up to its target and writes the inventory to disk."""
+    path = tmp_path / "pool.json"
+    provision = AsyncMock(side_effect=[PooledGroup(101, "a"), PooledGroup(102, "b")])
+    pool = WarmGroupPool(provision, path=str(path), target_size=2, refill_interval=0)
+
+    await pool.start()
+    await wait_for_depth(pool, 2)
+    await pool.stop()
+
+    assert provision.await_count == 2  # noqa: PLR2004
+    assert json.loads(path.read_text()) == {"groups": [[101, "a"], [102, "b"]]}
+
+
+@pytest.mark.asyncio
+async def test_pool_restores_inventory_and_claims_oldest_owned_group(tmp_path):
+    """Test that groups persisted before a restart are claimed by the account that owns them."""
+    path = tmp_path / "pool.json"
+    path.write_text(json.dumps({"groups": [[6, "b"], [7, "a"], [8, "a"]]}))
+    provision = AsyncMock(side_effect=[PooledGroup(9, "a")])
+    pool = WarmGroupPool(provision, path=str(path), target_size=3, refill_interval=0)
+
+    await pool.start()
+    assert pool.claim("a") == 7  # noqa: PLR2004
+    await wait_for_depth(pool, 3)
+    await pool.stop()
+
+    assert json.loads(path.read_text()) == {"groups": [[6, "b"], [8, "a"], [9, "a"]]}
+    assert pool.stats()["claimed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_restores_legacy_inventory_to_legacy_account(tmp_path):
+    """Test that bare group ids from the single-account format go to the legacy account."""
+    path = tmp_path / "pool.json"
+    path.write_text(json.dumps({"groups": [6, [7, "b"]]}))
+    pool = WarmGroupPool(
+        AsyncMock(), path=str(path), target_size=2, refill_interval=0, legacy_account="a"
+    )
+
+    await pool.start()
+    await pool.stop()
+
+    assert pool.claim("a") == 6  # noqa: PLR2004
+    assert pool.claim("b") == 7  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_pool_sleeps_out_flood_wait(tmp_path):
+    """Test that a FloodWait pauses the refill for the requested time."""
+    provision = AsyncMock(
+        side_effect=[FloodWaitError(request=None, capture=42), PooledGroup(5, "a")]
+    )
+    pool = WarmGroupPool(
+        provision, path=str(tmp_path / "pool.json"), target_size=1, refill_interval=0
+    )
+
+    real_sleep = asyncio.sleep
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        await real_sleep(0)
+
+    with patch("app.services.taccount.pool.asyncio.sleep", fake_sleep):
+        await pool.start()
+        await wait_for_depth(pool, 1)
+        await pool.stop()
+
+    assert 42 in slept  # noqa: PLR2004
+    assert pool.stats()["flood_waits"] == 1
+
+
+def test_claim_on_empty_pool_counts_miss(tmp_path):
+    """Test that claiming from an empty pool returns None and records a miss."""
+    pool = WarmGroupPool(
+        AsyncMock(), path=str(tmp_path / "pool.json"), target_size=1, refill_interval=0
+    )
+
+    assert pool.claim("a") is None
+    assert pool.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_provision_telegram_groups_uses_pooled_groups():
+    """Test that session groups are claimed from the pool before creating new ones."""
+    bot_entity = MagicMock()
+
+    with (
+        patch("app.services.taccount.api.group_pool") as mock_pool,
+        patch(
+            "app.services.taccount.api.assign_pooled_group", new_callable=AsyncMock
+        ) as mock_assign,
+        patch(
+            "app.services.taccount.api.provision_telegram_group", new_callable=AsyncMock
+        ) as mock_provision,
+    ):
+        mock_pool.claim.side_effect = [500, None]
+        mock_provision.return_value = 600
+
+        result = await provision_telegram_groups(bot_entity, (1, "first"), (2, "second"))
+
+    assert result == [500, 600]
+    mock_assign.assert_awaited_once_with(500, 1, "first")
+    mock_provision.assert_awaited_once_with(bot_entity, 2, "second")
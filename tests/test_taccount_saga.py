@@ -0,0 +1,102 @@
+"""Tests for app.services.taccount.saga module."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.taccount.model import CreateSessionResponse
+from app.services.taccount.saga import SagaStep, SessionInProgressError, SessionSagaLog
+
+SESSION = CreateSessionResponse(
+    counselor_group_id=333, user_group_id=222, user_group_link="https://t.me/+abc"
+)
+
+
+@pytest.fixture
+def saga_log(tmp_path):
+    return SessionSagaLog(str(tmp_path / "sessions.sqlite3"), AsyncMock(), max_record_attempts=2)
+
+
+async def drain(log: SessionSagaLog):
+    await asyncio.gather(*log._compensating.values())
+
+
+@pytest.mark.asyncio
+async def test_claim_blocks_duplicates_until_groups_are_logged(saga_log):
+    """Test that a live claim rejects duplicates and logged groups are resumed."""
+    assert await saga_log.begin("user:1") is None
+
+    with pytest.raises(SessionInProgressError):
+        await saga_log.begin("user:1")
+
+    await saga_log.groups_created("user:1", SESSION)
+    saga = await saga_log.begin("user:1")
+
+    assert saga.step == SagaStep.GROUPS_CREATED
+    assert saga.session == SESSION
+    assert saga_log.stats()["resumed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_aborted_claim_starts_over(saga_log):
+    """Test that a failed group creation releases the claim."""
+    await saga_log.begin("user:1")
+    await saga_log.abort("user:1")
+
+    assert await saga_log.begin("user:1") is None
+
+
+@pytest.mark.asyncio
+async def test_recorded_session_is_reused(saga_log):
+    """Test that a finished session is returned instead of being created again."""
+    await saga_log.begin("user:1")
+    await saga_log.groups_created("user:1", SESSION)
+    await saga_log.recorded("user:1")
+
+    saga = await saga_log.begin("user:1")
+
+    assert saga.step == SagaStep.RECORDED
+
+
+@pytest.mark.asyncio
+async def test_closed_session_starts_over(saga_log):
+    """Test that forgetting a recorded session lets the next start create new groups."""
+    await saga_log.begin("user:1")
+    await saga_log.groups_created("user:1", SESSION)
+    await saga_log.recorded("user:1")
+
+    await saga_log.closed("user:1")
+
+    assert await saga_log.begin("user:1") is None
+    assert saga_log.stats()["closed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_groups_are_compensated_after_repeated_record_failures(saga_log):
+    """Test that unrecordable groups are cleaned up in the background."""
+    await saga_log.begin("user:1")
+    await saga_log.groups_created("user:1", SESSION)
+
+    await saga_log.record_failed("user:1", SESSION)
+    saga_log.compensate.assert_not_awaited()
+    await saga_log.record_failed("user:1", SESSION)
+    await drain(saga_log)
+
+    saga_log.compensate.assert_awaited_once_with(SESSION)
+    assert saga_log.stats()["compensated"] == 1
+    # The next tap starts from scratch
+    assert await saga_log.begin("user:1") is None
+
+
+@pytest.mark.asyncio
+async def test_sweep_compensates_abandoned_groups(saga_log):
+    """Test that groups nobody retried recording are cleaned up by the sweeper."""
+    await saga_log.begin("user:1")
+    await saga_log.groups_created("user:1", SESSION)
+
+    with patch("app.services.taccount.saga.time.time", return_value=10**10):
+        await saga_log.sweep()
+    await drain(saga_log)
+
+    saga_log.compensate.assert_awaited_once_with(SESSION)
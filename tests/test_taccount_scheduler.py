@@ -0,0 +1,93 @@
+"""Tests for app.services.taccount.scheduler module."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from telethon.errors import FloodWaitError
+from telethon.tl import functions
+
+from app.services.taccount.scheduler import AccountBusyError, AccountScheduler, Priority, lane
+
+
+def flood(seconds: int) -> FloodWaitError:
+    return FloodWaitError(request=None, capture=seconds)
+
+
+@pytest.fixture
+def no_sleep():
+    real_sleep = asyncio.sleep
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        await real_sleep(0)
+
+    with patch("app.services.taccount.scheduler.asyncio.sleep", fake_sleep):
+        yield slept
+
+
+@pytest.mark.asyncio
+async def test_short_flood_wait_is_slept_out_and_retried(no_sleep):
+    """Test that a FloodWait under the limit is waited out and the request retried."""
+    send = AsyncMock(side_effect=[flood(3), "ok"])
+    scheduler = AccountScheduler(send, max_sleep=10)
+    request = functions.channels.LeaveChannelRequest(channel=1)
+
+    assert await scheduler.call(request) == "ok"
+
+    assert send.await_count == 2  # noqa: PLR2004
+    assert no_sleep == [pytest.approx(3, abs=0.1)]
+    stats = scheduler.stats()
+    assert stats["flood_waits"] == {"LeaveChannelRequest": 1}
+    assert stats["flood_retries"] == 1
+    assert stats["intervals"]["LeaveChannelRequest"] > 0
+
+
+@pytest.mark.asyncio
+async def test_long_flood_wait_fails_fast(no_sleep):
+    """Test that a long FloodWait raises AccountBusyError and blocks the method."""
+    send = AsyncMock(side_effect=flood(300))
+    scheduler = AccountScheduler(send, max_sleep=10)
+    request = functions.messages.CreateChatRequest(users=[], title="x")
+
+    with pytest.raises(AccountBusyError, match="try again in about 300 seconds") as exc_info:
+        await scheduler.call(request)
+    assert exc_info.value.seconds == 300  # noqa: PLR2004
+
+    # The method stays blocked, so the next call fails without reaching Telegram
+    with pytest.raises(AccountBusyError):
+        await scheduler.call(request)
+    send.assert_awaited_once()
+    assert no_sleep == []
+    assert scheduler.stats()["rejected"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_are_admitted_before_background():
+    """Test that queued interactive requests jump ahead of queued background work."""
+    release = asyncio.Event()
+    order = []
+
+    async def send(request):
+        await release.wait()
+        order.append(request.channel)
+
+    scheduler = AccountScheduler(send, max_concurrency=1)
+
+    async def call(channel, priority):
+        with lane(priority):
+            await scheduler.call(functions.channels.LeaveChannelRequest(channel=channel))
+
+    first = asyncio.create_task(call(1, Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(call(2, Priority.BACKGROUND))
+    interactive = asyncio.create_task(call(3, Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth() == 2  # noqa: PLR2004
+
+    release.set()
+    await asyncio.gather(first, background, interactive)
+
+    assert order == [1, 3, 2]
+    assert set(scheduler.stats()["queue_wait"]) == {"background", "interactive"}
@@ -18,4 +18,4 @@ async def test_set_webhook_configures_webhook_correctly():
         mock_telegram_app.bot.set_webhook.assert_awaited_once()
         call_kwargs = mock_telegram_app.bot.set_webhook.call_args[1]
         assert "webhook" in call_kwargs["url"]
-        assert call_kwargs["allowed_updates"] == ["message", "callback_query"]
+        assert call_kwargs["allowed_updates"] == ["message", "edited_message", "callback_query"]
@@ -0,0 +1,115 @@
+"""Tests for app.util.context module."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.util.context import memoize_per_update, update_context_stats, update_scope
+
+
+def wrap(mock):
+    async def fetch(*args, **kwargs):
+        return await mock(*args, **kwargs)
+
+    return fetch
+
+
+@pytest.mark.asyncio
+async def test_memoize_per_update_reuses_result_within_scope():
+    """Test that identical calls inside one update scope run once."""
+    fetch = AsyncMock(return_value="alias")
+    memoized = memoize_per_update(wrap(fetch))
+
+    with update_scope() as context:
+        assert await memoized(1) == "alias"
+        assert await memoized(1) == "alias"
+        assert await memoized(2) == "alias"
+
+    assert fetch.await_count == 2  # noqa: PLR2004
+    assert context.deduplicated == 1
+
+
+@pytest.mark.asyncio
+async def test_memoize_per_update_does_not_share_between_scopes():
+    """Test that each update starts with an empty memo."""
+    fetch = AsyncMock(return_value="alias")
+    memoized = memoize_per_update(wrap(fetch))
+
+    with update_scope():
+        await memoized(1)
+    with update_scope():
+        await memoized(1)
+
+    assert fetch.await_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_memoize_per_update_passes_through_outside_scope():
+    """Test that calls outside an update scope are never memoized."""
+    fetch = AsyncMock(return_value="alias")
+    memoized = memoize_per_update(wrap(fetch))
+
+    await memoized(1)
+    await memoized(1)
+
+    assert fetch.await_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_memoize_per_update_does_not_memoize_failures():
+    """Test that a failed call is retried by the next caller."""
+    fetch = AsyncMock(side_effect=[Exception("boom"), "alias"])
+    memoized = memoize_per_update(wrap(fetch))
+
+    with update_scope():
+        with pytest.raises(Exception, match="boom"):
+            await memoized(1)
+        assert await memoized(1) == "alias"
+
+
+def test_memoize_per_update_supports_sync_functions():
+    """Test that derived values such as hashes are memoized too."""
+    compute = MagicMock(return_value="digest")
+
+    def get_digest(value):
+        return compute(value)
+
+    memoized = memoize_per_update(get_digest)
+
+    with update_scope() as context:
+        memoized("123")
+        memoized("123")
+
+    compute.assert_called_once_with("123")
+    assert context.deduplicated == 1
+
+
+def test_update_scope_reports_deduplicated_calls():
+    """Test that finished scopes are added to the aggregate stats."""
+    before = dict(update_context_stats)
+
+    with update_scope() as context:
+        context.deduplicated = 3
+
+    assert update_context_stats["updates"] == before["updates"] + 1
+    assert update_context_stats["deduplicated_calls"] == before["deduplicated_calls"] + 3
+    assert update_context_stats["max_deduplicated_per_update"] >= 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_core_api_alias_is_fetched_once_per_update():
+    """Test that create_or_get_alias and get_hash are deduplicated inside one update."""
+    from app.services.core.api import create_or_get_alias  # noqa: PLC0415
+
+    with patch("app.services.core.api.auth_client.post", new_callable=AsyncMock) as mock_post:
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({"alias": "anon123"}).encode()
+        mock_post.return_value = mock_response
+
+        with update_scope() as context:
+            assert await create_or_get_alias(42) == "anon123"
+            assert await create_or_get_alias(42) == "anon123"
+
+        mock_post.assert_called_once()
+        assert context.deduplicated == 1
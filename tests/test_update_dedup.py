@@ -0,0 +1,101 @@
+"""Tests for app.telegram.dedup module."""
+
+import asyncio
+import sqlite3
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.telegram.dedup import SqliteUpdateLog, UpdateDeduplicator
+
+
+@pytest.mark.asyncio
+async def test_duplicate_update_is_dropped():
+    """Test that only the first delivery of an update_id is accepted."""
+    dedup = UpdateDeduplicator(window=10)
+
+    assert await dedup.claim(1) is True
+    assert await dedup.claim(1) is False
+    assert await dedup.claim(2) is True
+
+    stats = dedup.stats()
+    assert stats["accepted"] == 2  # noqa: PLR2004
+    assert stats["duplicates_dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_window_is_bounded():
+    """Test that the oldest update_ids are forgotten once the window is full."""
+    dedup = UpdateDeduplicator(window=2)
+
+    for update_id in (1, 2, 3):
+        await dedup.claim(update_id)
+
+    assert dedup.stats()["window"] == 2  # noqa: PLR2004
+    assert await dedup.claim(1) is True
+    assert await dedup.claim(3) is False
+
+
+@pytest.mark.asyncio
+async def test_released_update_is_accepted_again():
+    """Test that a released update can be claimed by its redelivery."""
+    dedup = UpdateDeduplicator(window=10)
+
+    await dedup.claim(1)
+    await dedup.release(1)
+
+    assert await dedup.claim(1) is True
+
+
+@pytest.mark.asyncio
+async def test_shared_log_drops_redelivery_to_another_replica(tmp_path):
+    """Test that replicas sharing a SQLite file agree on which updates were seen."""
+    path = str(tmp_path / "updates.sqlite3")
+    replica_1 = UpdateDeduplicator(window=10, shared=SqliteUpdateLog(path, window=10))
+    replica_2 = UpdateDeduplicator(window=10, shared=SqliteUpdateLog(path, window=10))
+
+    assert await replica_1.claim(1) is True
+    assert await replica_2.claim(1) is False
+    assert replica_2.stats()["shared_duplicates_dropped"] == 1
+
+    await replica_1.release(1)
+    assert await replica_1.claim(1) is True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_share_one_shared_write(tmp_path):
+    """Test that updates claimed together are written to the shared log in one transaction."""
+    dedup = UpdateDeduplicator(
+        window=10, shared=SqliteUpdateLog(str(tmp_path / "updates.sqlite3"), window=10)
+    )
+
+    results = await asyncio.gather(*(dedup.claim(update_id) for update_id in range(1, 6)))
+
+    assert results == [True] * 5
+    assert dedup.stats()["shared_writes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_log_prunes_old_update_ids(tmp_path):
+    """Test that ids far behind the newest one are removed from the shared log."""
+    path = str(tmp_path / "updates.sqlite3")
+    log = SqliteUpdateLog(path, window=2)
+
+    for update_id in range(1, 7):
+        log.claim([update_id])
+
+    with sqlite3.connect(path) as db:
+        remaining = [row[0] for row in db.execute("SELECT update_id FROM seen_updates")]
+    assert 1 not in remaining
+    assert 6 in remaining  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_shared_log_failure_accepts_update():
+    """Test that an unavailable shared log does not drop updates."""
+    shared = MagicMock()
+    shared.claim.side_effect = sqlite3.OperationalError("database is locked")
+    dedup = UpdateDeduplicator(window=10, shared=shared)
+
+    assert await dedup.claim(1) is True
+    assert dedup.stats()["shared_errors"] == 1
@@ -1,29 +1,42 @@
 """Tests for app.telegram.webhook module."""
 
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException, Request
 from telegram import Update
 
-from app.telegram.webhook import telegram_webhook
+from app.telegram.webhook import telegram_webhook, update_filter
+
+GROUP_MESSAGE = {
+    "update_id": 123,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": -100, "type": "supergroup"},
+        "from": {"id": 1, "is_bot": False, "first_name": "A"},
+        "text": "test",
+    },
+}
+
+
+def make_request(payload) -> MagicMock:
+    mock_request = MagicMock(spec=Request)
+    mock_request.body = AsyncMock(return_value=json.dumps(payload).encode())
+    return mock_request
 
 
 @pytest.mark.asyncio
 async def test_telegram_webhook_valid_secret():
     """Test webhook with valid secret."""
-    mock_payload = {"update_id": 123, "message": {"text": "test"}}
-
     with patch("app.telegram.webhook.telegram_app") as mock_app:
         mock_app.bot = MagicMock()
         mock_update = MagicMock()
         Update.de_json = MagicMock(return_value=mock_update)
         mock_app.process_update = AsyncMock()
 
-        mock_request = MagicMock(spec=Request)
-        mock_request.json = AsyncMock(return_value=mock_payload)
-
-        result = await telegram_webhook("test_secret", mock_request)
+        result = await telegram_webhook("test_secret", make_request(GROUP_MESSAGE))
 
         assert result == {"ok": True}
         mock_app.process_update.assert_called_once_with(mock_update)
@@ -41,21 +54,169 @@ async def test_telegram_webhook_invalid_secret():
     assert "Invalid webhook secret" in str(exc_info.value.detail)
 
 
+@pytest.mark.asyncio
+async def test_telegram_webhook_invalid_body():
+    """Test that a body that is not JSON is rejected."""
+    mock_request = MagicMock(spec=Request)
+    mock_request.body = AsyncMock(return_value=b"not json")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await telegram_webhook("test_secret", mock_request)
+
+    assert exc_info.value.status_code == 400  # noqa: PLR2004
+
+
 @pytest.mark.asyncio
 async def test_telegram_webhook_payload_processing():
     """Test that webhook processes payload correctly."""
-    mock_payload = {"update_id": 123, "message": {"text": "test"}}
-
     with patch("app.telegram.webhook.telegram_app") as mock_app:
         mock_app.bot = MagicMock()
         mock_update = MagicMock()
         Update.de_json = MagicMock(return_value=mock_update)
         mock_app.process_update = AsyncMock()
 
-        mock_request = MagicMock(spec=Request)
-        mock_request.json = AsyncMock(return_value=mock_payload)
-
-        await telegram_webhook("test_secret", mock_request)
+        await telegram_webhook("test_secret", make_request(GROUP_MESSAGE))
 
-        Update.de_json.assert_called_once_with(mock_payload, mock_app.bot)
+        Update.de_json.assert_called_once_with(GROUP_MESSAGE, mock_app.bot)
         mock_app.process_update.assert_called_once_with(mock_update)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("payload", "reason"),
+    [
+        ({"update_id": 1, "my_chat_member": {}}, "update_type"),
+        (
+            {
+                "update_id": 1,
+                "edited_message": {
+                    **GROUP_MESSAGE["message"],
+                    "chat": {"id": 1, "type": "private"},
+                },
+            },
+            "edit_outside_group",
+        ),
+        (
+            {"update_id": 1, "message": {**GROUP_MESSAGE["message"], "text": None}},
+            "group_no_content",
+        ),
+        (
+            {
+                "update_id": 1,
+                "message": {**GROUP_MESSAGE["message"], "chat": {"id": 1, "type": "private"}},
+            },
+            "private_not_start",
+        ),
+        (
+            {
+                "update_id": 1,
+                "message": {**GROUP_MESSAGE["message"], "from": {"id": 2, "is_bot": True}},
+            },
+            "bot_sender",
+        ),
+        ({"message": GROUP_MESSAGE["message"]}, "malformed"),
+    ],
+)
+async def test_telegram_webhook_drops_irrelevant_updates(payload, reason):
+    """Test that updates no handler acts on are acknowledged without being parsed."""
+    with patch("app.telegram.webhook.telegram_app") as mock_app:
+        Update.de_json = MagicMock()
+        mock_app.process_update = AsyncMock()
+
+        result = await telegram_webhook("test_secret", make_request(payload))
+
+        assert result == {"ok": True}
+        Update.de_json.assert_not_called()
+        mock_app.process_update.assert_not_called()
+        assert update_filter.stats()["dropped"] == {reason: 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"update_id": 1, "callback_query": {"id": "1", "data": "select:1"}},
+        {
+            "update_id": 1,
+            "message": {**GROUP_MESSAGE["message"], "text": None, "photo": [{"file_id": "p"}]},
+        },
+        {
+            "update_id": 1,
+            "message": {
+                **GROUP_MESSAGE["message"],
+                "chat": {"id": 1, "type": "private"},
+                "text": "/start@testbot",
+            },
+        },
+        {
+            "update_id": 1,
+            "message": {
+                **GROUP_MESSAGE["message"],
+                "from": {"id": 1087968824, "is_bot": True},
+                "sender_chat": {"id": -100, "type": "supergroup"},
+            },
+        },
+    ],
+)
+async def test_telegram_webhook_passes_handled_updates(payload):
+    """Test that callback queries, group media, private /start and anonymous admins pass."""
+    with patch("app.telegram.webhook.telegram_app") as mock_app:
+        Update.de_json = MagicMock(return_value=MagicMock(update_id=1))
+        mock_app.process_update = AsyncMock()
+
+        await telegram_webhook("test_secret", make_request(payload))
+
+        mock_app.process_update.assert_called_once()
+        assert update_filter.stats()["accepted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_telegram_webhook_ack_mode_enqueues_update():
+    """Test that ack mode hands the update to the dispatcher instead of processing inline."""
+    with (
+        patch("app.telegram.webhook.telegram_app") as mock_app,
+        patch("app.telegram.webhook.settings") as mock_settings,
+        patch("app.telegram.webhook.update_dispatcher") as mock_dispatcher,
+    ):
+        mock_settings.webhook_secret = "test_secret"
+        mock_settings.webhook_ack_mode = True
+        mock_dispatcher.running = True
+        mock_dispatcher.enqueue = AsyncMock()
+        mock_app.process_update = AsyncMock()
+        mock_update = MagicMock()
+        Update.de_json = MagicMock(return_value=mock_update)
+
+        result = await telegram_webhook("test_secret", make_request(GROUP_MESSAGE))
+
+        assert result == {"ok": True}
+        mock_dispatcher.enqueue.assert_awaited_once_with(mock_update)
+        mock_app.process_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_telegram_webhook_drops_redelivered_update():
+    """Test that a redelivered update_id is acknowledged without being processed again."""
+    with patch("app.telegram.webhook.telegram_app") as mock_app:
+        mock_app.bot = MagicMock()
+        Update.de_json = MagicMock(return_value=MagicMock(update_id=123))
+        mock_app.process_update = AsyncMock()
+
+        assert await telegram_webhook("test_secret", make_request(GROUP_MESSAGE)) == {"ok": True}
+        assert await telegram_webhook("test_secret", make_request(GROUP_MESSAGE)) == {"ok": True}
+
+        mock_app.process_update.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_telegram_webhook_failed_update_is_processed_on_redelivery():
+    """Test that an update that failed inline is not dropped when Telegram redelivers it."""
+    with patch("app.telegram.webhook.telegram_app") as mock_app:
+        mock_app.bot = MagicMock()
+        Update.de_json = MagicMock(return_value=MagicMock(update_id=123))
+        mock_app.process_update = AsyncMock(side_effect=[RuntimeError("boom"), None])
+
+        with pytest.raises(RuntimeError):
+            await telegram_webhook("test_secret", make_request(GROUP_MESSAGE))
+        await telegram_webhook("test_secret", make_request(GROUP_MESSAGE))
+
+        assert mock_app.process_update.call_count == 2  # noqa: PLR2004